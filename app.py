@@ -13,83 +13,96 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Import dei capitoli
-from capitoli import (
-    capitolo_01, capitolo_02, capitolo_03, capitolo_04, 
-    capitolo_05, capitolo_06, capitolo_07, capitolo_08,
-    capitolo_09, capitolo_10, capitolo_11, capitolo_12,
-    capitolo_13, capitolo_14, capitolo_15, capitolo_16
-)
+# I capitoli vengono importati solo dallo script della pagina aperta
+from capitoli.utenti import utente_corrente, utente_amministratore
+from archivio.progressi import progressi_utente, riepilogo_corso
+from finanza.tempi import cronometra, misura
 
-# Dizionario dei capitoli disponibili
+# Dizionario dei capitoli disponibili (script della pagina, in pagine/)
 CAPITOLI = {
     1: {
         "titolo": "Introduzione alla finanza personale",
-        "modulo": capitolo_01
+        "pagina": "pagine/capitolo_01.py"
     },
     2: {
         "titolo": "Interesse, inflazione e rischio",
-        "modulo": capitolo_02
+        "pagina": "pagine/capitolo_02.py"
     },
     3: {
         "titolo": "Risparmio e obiettivi finanziari",
-        "modulo": capitolo_03
+        "pagina": "pagine/capitolo_03.py"
     },
     4: {
         "titolo": "Il fondo di emergenza",
-        "modulo": capitolo_04
+        "pagina": "pagine/capitolo_04.py"
     },
     5: {
         "titolo": "Scelta del conto e struttura dei conti personali",
-        "modulo": capitolo_05
+        "pagina": "pagine/capitolo_05.py"
     },
     6: {
         "titolo": "Gestione del debito: strategie e priorità",
-        "modulo": capitolo_06
+        "pagina": "pagine/capitolo_06.py"
     },
     7: {
         "titolo": "Credito e punteggio creditizio",
-        "modulo": capitolo_07
+        "pagina": "pagine/capitolo_07.py"
     },
     8: {
         "titolo": "Introduzione agli investimenti",
-        "modulo": capitolo_08
+        "pagina": "pagine/capitolo_08.py"
     },
     9: {
         "titolo": "Rendimento, rischio e diversificazione",
-        "modulo": capitolo_09
+        "pagina": "pagine/capitolo_09.py"
     },
     10: {
         "titolo": "Asset allocation e costruzione del portafoglio",
-        "modulo": capitolo_10
+        "pagina": "pagine/capitolo_10.py"
     },
     11: {
         "titolo": "Strumenti di investimento: ETF, fondi e azioni",
-        "modulo": capitolo_11
+        "pagina": "pagine/capitolo_11.py"
     },
     12: {
         "titolo": "Piani di accumulo (PAC) e investimenti periodici",
-        "modulo": capitolo_12
+        "pagina": "pagine/capitolo_12.py"
     },
     13: {
         "titolo": "Ribilanciamento del portafoglio",
-        "modulo": capitolo_13
+        "pagina": "pagine/capitolo_13.py"
     },
     14: {
         "titolo": "Fiscalità degli investimenti",
-        "modulo": capitolo_14
+        "pagina": "pagine/capitolo_14.py"
     },
     15: {
         "titolo": "Psicologia dell'investitore e bias comportamentali",
-        "modulo": capitolo_15
+        "pagina": "pagine/capitolo_15.py"
     },
     16: {
         "titolo": "Errori comuni e checklist finale",
-        "modulo": capitolo_16
+        "pagina": "pagine/capitolo_16.py"
     }
 }
 
 
+# Gruppi di capitoli nel menu di navigazione
+SEZIONI_MENU = {
+    "Fondamentali (1-5)": range(1, 6),
+    "Credito e debito (6-7)": range(6, 8),
+    "Investimenti (8-13)": range(8, 14),
+    "Ottimizzazione (14-16)": range(14, 17)
+}
+
+# Pagine dei capitoli, con URL /capitolo-N
+PAGINE = {
+    num: st.Page(cap["pagina"], title=f"{num}. {cap['titolo']}", url_path=f"capitolo-{num}")
+    for num, cap in CAPITOLI.items()
+}
+
+
+@cronometra(nome="app.render_home")
 def render_home():
     """Pagina principale"""
     st.title("📊 InvestAccademy")
@@ -134,6 +147,23 @@ def render_home():
     ### 📖 Capitoli disponibili
     """)
     
+    # Progressi dell'utente, dai totali per capitolo aggiornati a ogni evento
+    progressi = progressi_utente(utente_corrente())
+    
+    if progressi:
+        riepilogo = riepilogo_corso(progressi, len(CAPITOLI))
+        
+        c1, c2, c3 = st.columns(3)
+        with c1:
+            st.metric("Capitoli completati", f"{riepilogo['capitoli_completati']}/{len(CAPITOLI)}")
+        with c2:
+            accuratezza = riepilogo["accuratezza"]
+            st.metric("Risposte corrette ai quiz", f"{accuratezza:.0%}" if accuratezza is not None else "-")
+        with c3:
+            st.metric("Calcolatori utilizzati", riepilogo["utilizzi_calcolatori"])
+        
+        st.progress(riepilogo["percentuale_completamento"])
+    
     # Organizza capitoli in 3 colonne
     cols = st.columns(3)
     for i, (num, cap) in enumerate(CAPITOLI.items()):
@@ -141,90 +171,42 @@ def render_home():
             with st.container(border=True):
                 st.markdown(f"**Capitolo {num}**")
                 st.markdown(f"### {cap['titolo']}")
-                if st.button(f"Inizia →", key=f"btn_cap_{num}", use_container_width=True):
-                    st.session_state.pagina = f"capitolo_{num}"
-                    st.rerun()
+                progresso = progressi.get(num)
+                if progresso and progresso["completato"]:
+                    st.caption(f"✅ Completato - miglior punteggio {progresso['miglior_punteggio']:.0%}")
+                elif progresso and progresso["tentativi_quiz"]:
+                    st.caption(f"📝 Quiz: miglior punteggio {progresso['miglior_punteggio']:.0%}")
+                elif progresso:
+                    st.caption("🧮 Iniziato")
+                st.page_link(PAGINE[num], label="Inizia →", use_container_width=True)
     
     st.markdown("---")
     st.caption("© InvestAccademy - Costruisci il tuo futuro finanziario con consapevolezza")
 
 
 def main():
-    # Inizializza stato sessione
-    if "pagina" not in st.session_state:
-        st.session_state.pagina = "home"
-    
-    # Sidebar navigazione
-    with st.sidebar:
-        st.image("https://img.icons8.com/fluency/96/chart.png", width=80)
-        st.title("InvestAccademy")
-        st.markdown("---")
-        
-        if st.button("🏠 Home", use_container_width=True):
-            st.session_state.pagina = "home"
-            st.rerun()
-        
-        st.markdown("### 📖 Capitoli")
-        
-        # Organizza capitoli in sezioni
-        st.markdown("**Fondamentali (1-5)**")
-        for num in range(1, 6):
-            cap = CAPITOLI[num]
-            if st.button(
-                f"{num}. {cap['titolo'][:30]}{'...' if len(cap['titolo']) > 30 else ''}", 
-                key=f"nav_{num}",
-                use_container_width=True
-            ):
-                st.session_state.pagina = f"capitolo_{num}"
-                st.rerun()
-        
-        st.markdown("**Credito e debito (6-7)**")
-        for num in range(6, 8):
-            cap = CAPITOLI[num]
-            if st.button(
-                f"{num}. {cap['titolo'][:30]}{'...' if len(cap['titolo']) > 30 else ''}", 
-                key=f"nav_{num}",
-                use_container_width=True
-            ):
-                st.session_state.pagina = f"capitolo_{num}"
-                st.rerun()
-        
-        st.markdown("**Investimenti (8-13)**")
-        for num in range(8, 14):
-            cap = CAPITOLI[num]
-            if st.button(
-                f"{num}. {cap['titolo'][:30]}{'...' if len(cap['titolo']) > 30 else ''}", 
-                key=f"nav_{num}",
-                use_container_width=True
-            ):
-                st.session_state.pagina = f"capitolo_{num}"
-                st.rerun()
+    # Navigazione nativa: a ogni rerun viene eseguito solo lo script della pagina aperta
+    with misura("app.navigazione"):
+        pagine = {
+            "": [st.Page(render_home, title="Home", icon="🏠", url_path="home", default=True)],
+            **{sezione: [PAGINE[num] for num in numeri] for sezione, numeri in SEZIONI_MENU.items()}
+        }
+        if utente_amministratore():
+            pagine["Amministrazione"] = [
+                st.Page("pagine/prestazioni.py", title="Prestazioni", icon="⏱️", url_path="prestazioni")
+            ]
+        navigazione = st.navigation(pagine)
         
-        st.markdown("**Ottimizzazione (14-16)**")
-        for num in range(14, 17):
-            cap = CAPITOLI[num]
-            if st.button(
-                f"{num}. {cap['titolo'][:30]}{'...' if len(cap['titolo']) > 30 else ''}", 
-                key=f"nav_{num}",
-                use_container_width=True
-            ):
-                st.session_state.pagina = f"capitolo_{num}"
-                st.rerun()
+        st.logo("https://img.icons8.com/fluency/96/chart.png")
         
-        st.markdown("---")
-        st.caption("Versione 1.0.0 - Corso completo")
+        with st.sidebar:
+            st.markdown("---")
+            st.caption("Versione 1.0.0 - Corso completo")
     
-    # Rendering pagina corrente
-    if st.session_state.pagina == "home":
-        render_home()
-    elif st.session_state.pagina.startswith("capitolo_"):
-        num_cap = int(st.session_state.pagina.split("_")[1])
-        if num_cap in CAPITOLI:
-            CAPITOLI[num_cap]["modulo"].render()
-        else:
-            st.error("Capitolo non trovato")
-            render_home()
+    with misura("app.pagina"):
+        navigazione.run()
 
 
 if __name__ == "__main__":
-    main()
+    with misura("app.rerun"):
+        main()
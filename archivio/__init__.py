@@ -0,0 +1,22 @@
+"""
+Persistenza locale dei dati degli utenti del corso InvestAccademy
+
+Un database SQLite condiviso dal processo (`archivio.database`) e i moduli che ne
+definiscono le tabelle, senza dipendenze da Streamlit. I sottomoduli vengono
+importati alla prima richiesta.
+"""
+
+import importlib
+
+__all__ = [
+    "database",
+    "diario",
+    "progressi"
+]
+
+
+def __getattr__(nome: str):
+    """Importa un sottomodulo al primo accesso (es. `archivio.diario`)"""
+    if nome in __all__:
+        return importlib.import_module(f"{__name__}.{nome}")
+    raise AttributeError(f"module {__name__!r} has no attribute {nome!r}")
@@ -0,0 +1,226 @@
+"""
+Database SQLite condiviso dalle sessioni
+InvestAccademy - Corso di Finanza Personale
+
+Un solo file SQLite in modalità WAL: le letture usano un pool di connessioni e
+non bloccano le scritture, che passano tutte da un unico thread scrittore. Il
+thread raccoglie le richieste in coda e le esegue a lotti, una transazione per
+lotto, così molte sessioni che salvano insieme non si contendono il lock.
+"""
+
+import atexit
+import os
+import queue
+import sqlite3
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager
+from pathlib import Path
+
+# Percorso del database, modificabile con la variabile d'ambiente INVESTACCADEMY_DB
+PERCORSO_PREDEFINITO = Path(os.environ.get(
+    "INVESTACCADEMY_DB",
+    Path(__file__).resolve().parent.parent / "dati" / "investaccademy.db"
+))
+
+# Connessioni di sola lettura aperte al massimo contemporaneamente
+DIMENSIONE_POOL = 4
+
+# Scritture eseguite al massimo nella stessa transazione
+DIMENSIONE_LOTTO = 256
+
+# Attesa massima per un lock prima di segnalare errore (ms)
+ATTESA_LOCK = 5000
+
+
+def _apri(percorso: Path) -> sqlite3.Connection:
+    """Nuova connessione con le impostazioni comuni"""
+    connessione = sqlite3.connect(percorso, check_same_thread=False, isolation_level=None)
+    connessione.row_factory = sqlite3.Row
+    connessione.execute(f"PRAGMA busy_timeout = {ATTESA_LOCK}")
+    connessione.execute("PRAGMA journal_mode = WAL")
+    connessione.execute("PRAGMA synchronous = NORMAL")
+    return connessione
+
+
+class _Righe(list):
+    """Parametri di una scrittura ripetuta con `executemany`"""
+
+
+def _esegui(connessione: sqlite3.Connection, sql: str, parametri):
+    """Esegue una scrittura: id dell'ultima riga inserita, o righe scritte per `executemany`"""
+    if isinstance(parametri, _Righe):
+        return connessione.executemany(sql, parametri).rowcount
+    return connessione.execute(sql, parametri).lastrowid
+
+
+class Database:
+    """Pool di connessioni in lettura più un thread scrittore con coda"""
+
+    def __init__(self, percorso=PERCORSO_PREDEFINITO, dimensione_pool: int = DIMENSIONE_POOL):
+        self.percorso = Path(percorso)
+        self.percorso.parent.mkdir(parents=True, exist_ok=True)
+
+        self._pool = queue.LifoQueue()
+        self._posti = threading.BoundedSemaphore(dimensione_pool)
+        self._coda = queue.Queue()
+        self._scrittore = threading.Thread(target=self._ciclo_scrittura, name="archivio-scrittore", daemon=True)
+        self._scrittore.start()
+
+    # Letture
+
+    @contextmanager
+    def connessione(self):
+        """Connessione in prestito dal pool, restituita all'uscita dal blocco"""
+        self._posti.acquire()
+        try:
+            try:
+                connessione = self._pool.get_nowait()
+            except queue.Empty:
+                connessione = _apri(self.percorso)
+            try:
+                yield connessione
+            finally:
+                self._pool.put(connessione)
+        finally:
+            self._posti.release()
+
+    def leggi(self, sql: str, parametri=()) -> list:
+        """Esegue una query e restituisce le righe come dizionari"""
+        with self.connessione() as connessione:
+            return [dict(riga) for riga in connessione.execute(sql, parametri)]
+
+    # Scritture
+
+    def scrivi(self, sql: str, parametri=()) -> Future:
+        """Accoda una scrittura; il Future restituisce l'id dell'ultima riga inserita"""
+        futuro = Future()
+        self._coda.put((sql, parametri, futuro))
+        return futuro
+
+    def scrivi_molti(self, sql: str, righe) -> Future:
+        """Accoda la stessa scrittura per molte righe (es. un'importazione); il Future restituisce il numero di righe"""
+        futuro = Future()
+        self._coda.put((sql, _Righe(righe), futuro))
+        return futuro
+
+    def esegui_script(self, script: str):
+        """Esegue uno script (es. lo schema) nel thread scrittore e ne attende la fine"""
+        self.scrivi(script, None).result()
+
+    def attendi(self):
+        """Attende che tutte le scritture accodate finora siano eseguite"""
+        self.scrivi(None).result()
+
+    def _ciclo_scrittura(self):
+        connessione = _apri(self.percorso)
+        while True:
+            lotto = [self._coda.get()]
+            while len(lotto) < DIMENSIONE_LOTTO:
+                try:
+                    lotto.append(self._coda.get_nowait())
+                except queue.Empty:
+                    break
+            if any(sql is _CHIUSURA for sql, _, _ in lotto):
+                self._esegui_lotto_protetto(connessione, [v for v in lotto if v[0] is not _CHIUSURA])
+                connessione.close()
+                for sql, _, futuro in lotto:
+                    if sql is _CHIUSURA:
+                        futuro.set_result(None)
+                return
+            self._esegui_lotto_protetto(connessione, lotto)
+
+    @classmethod
+    def _esegui_lotto_protetto(cls, connessione: sqlite3.Connection, lotto: list):
+        """Come `_esegui_lotto`, ma un errore imprevisto fallisce i Future del lotto invece del thread"""
+        try:
+            cls._esegui_lotto(connessione, lotto)
+        except Exception as errore:
+            try:
+                if connessione.in_transaction:
+                    connessione.execute("ROLLBACK")
+            except sqlite3.Error:
+                pass
+            for _, _, futuro in lotto:
+                if not futuro.done():
+                    futuro.set_exception(errore)
+
+    @classmethod
+    def _esegui_lotto(cls, connessione: sqlite3.Connection, lotto: list):
+        """Esegue il lotto in ordine: le scritture consecutive in una sola transazione"""
+        gruppo = []
+        for voce in lotto:
+            sql, parametri, futuro = voce
+            if sql is not None and parametri is not None:
+                gruppo.append(voce)
+                continue
+            cls._esegui_gruppo(connessione, gruppo)
+            gruppo = []
+            try:
+                if sql is not None:
+                    connessione.executescript(sql)
+                futuro.set_result(None)
+            except Exception as errore:
+                futuro.set_exception(errore)
+        cls._esegui_gruppo(connessione, gruppo)
+
+    @staticmethod
+    def _esegui_gruppo(connessione: sqlite3.Connection, gruppo: list):
+        """Una transazione per tutto il gruppo; se fallisce, riprova voce per voce"""
+        if not gruppo:
+            return
+        try:
+            connessione.execute("BEGIN IMMEDIATE")
+            risultati = [_esegui(connessione, sql, parametri) for sql, parametri, _ in gruppo]
+            connessione.execute("COMMIT")
+        except Exception:
+            if connessione.in_transaction:
+                connessione.execute("ROLLBACK")
+        else:
+            for (_, _, futuro), risultato in zip(gruppo, risultati):
+                futuro.set_result(risultato)
+            return
+
+        for sql, parametri, futuro in gruppo:
+            try:
+                futuro.set_result(_esegui(connessione, sql, parametri))
+            except Exception as errore:
+                futuro.set_exception(errore)
+
+    def chiudi(self):
+        """Completa le scritture in coda e chiude tutte le connessioni"""
+        if not self._scrittore.is_alive():
+            return
+        futuro = Future()
+        self._coda.put((_CHIUSURA, (), futuro))
+        futuro.result()
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+# Segnaposto che chiede al thread scrittore di terminare
+_CHIUSURA = object()
+
+_DATABASE = {}
+_LOCK_DATABASE = threading.Lock()
+
+
+def database(percorso=None) -> Database:
+    """Database condiviso dal processo per il percorso dato (creato al primo uso)"""
+    percorso = Path(percorso or PERCORSO_PREDEFINITO).resolve()
+    db = _DATABASE.get(percorso)
+    if db is None:
+        with _LOCK_DATABASE:
+            db = _DATABASE.get(percorso)
+            if db is None:
+                db = _DATABASE[percorso] = Database(percorso)
+    return db
+
+
+@atexit.register
+def _chiudi_tutti():
+    for db in list(_DATABASE.values()):
+        db.chiudi()
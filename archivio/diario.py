@@ -0,0 +1,130 @@
+"""
+Diario delle decisioni di investimento (capitolo 15)
+InvestAccademy - Corso di Finanza Personale
+"""
+
+import threading
+from datetime import date
+
+from .database import Database, database
+
+TIPI_DECISIONE = ("Acquisto", "Vendita", "Ribilanciamento", "Modifica piano", "Altro")
+STATI_EMOTIVI = ("Panico", "Paura", "Preoccupazione", "Neutrale", "Fiducioso", "Euforico")
+COERENZA = ("Sì", "No", "Non sono sicuro")
+
+# Gli indici iniziano tutti dall'utente: ogni query riguarda un solo utente
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS diario (
+    id INTEGER PRIMARY KEY,
+    utente TEXT NOT NULL,
+    data TEXT NOT NULL,
+    tipo TEXT NOT NULL,
+    stato_emotivo TEXT NOT NULL,
+    coerenza TEXT NOT NULL,
+    descrizione TEXT NOT NULL DEFAULT '',
+    motivazione TEXT NOT NULL DEFAULT '',
+    registrata TEXT NOT NULL DEFAULT (datetime('now'))
+);
+CREATE INDEX IF NOT EXISTS diario_utente_data ON diario (utente, data);
+CREATE INDEX IF NOT EXISTS diario_utente_tipo ON diario (utente, tipo, data);
+CREATE INDEX IF NOT EXISTS diario_utente_stato ON diario (utente, stato_emotivo, data);
+"""
+
+# Trimestre di una data ISO, es. "2024-T3"
+TRIMESTRE_SQL = "substr(data, 1, 4) || '-T' || ((CAST(substr(data, 6, 2) AS INTEGER) + 2) / 3)"
+
+_SCHEMI_CREATI = set()
+_LOCK_SCHEMA = threading.Lock()
+
+
+def _db(db: Database = None) -> Database:
+    """Database da usare, con la tabella del diario creata al primo accesso"""
+    db = db or database()
+    if db.percorso not in _SCHEMI_CREATI:
+        with _LOCK_SCHEMA:
+            if db.percorso not in _SCHEMI_CREATI:
+                db.esegui_script(SCHEMA)
+                _SCHEMI_CREATI.add(db.percorso)
+    return db
+
+
+def _filtri(utente: str, dal: date = None, al: date = None, tipo: str = None,
+            stato_emotivo: str = None) -> tuple:
+    """Clausola WHERE e parametri comuni alle query del diario"""
+    condizioni = ["utente = ?"]
+    parametri = [utente]
+    for colonna, operatore, valore in (("data", ">=", dal), ("data", "<=", al),
+                                       ("tipo", "=", tipo), ("stato_emotivo", "=", stato_emotivo)):
+        if valore is not None:
+            condizioni.append(f"{colonna} {operatore} ?")
+            parametri.append(valore.isoformat() if isinstance(valore, date) else valore)
+    return " AND ".join(condizioni), parametri
+
+
+def registra_decisione(utente: str, data: date, tipo: str, stato_emotivo: str, coerenza: str,
+                       descrizione: str = "", motivazione: str = "", db: Database = None):
+    """Accoda il salvataggio di una decisione; restituisce un Future con l'id"""
+    return _db(db).scrivi(
+        "INSERT INTO diario (utente, data, tipo, stato_emotivo, coerenza, descrizione, motivazione) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+        (utente, data.isoformat(), tipo, stato_emotivo, coerenza, descrizione, motivazione)
+    )
+
+
+def importa_decisioni(utente: str, righe, db: Database = None):
+    """Accoda il salvataggio di molte decisioni in una sola scrittura
+
+    `righe` contiene tuple (data, tipo, stato_emotivo, coerenza, descrizione,
+    motivazione); restituisce un Future con il numero di righe inserite.
+    """
+    return _db(db).scrivi_molti(
+        "INSERT INTO diario (utente, data, tipo, stato_emotivo, coerenza, descrizione, motivazione) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+        [(utente, data.isoformat(), *altri) for data, *altri in righe]
+    )
+
+
+def decisioni(utente: str, dal: date = None, al: date = None, tipo: str = None,
+              stato_emotivo: str = None, limite: int = 100, db: Database = None) -> list:
+    """Decisioni dell'utente, dalla più recente, con filtri facoltativi"""
+    where, parametri = _filtri(utente, dal, al, tipo, stato_emotivo)
+    return _db(db).leggi(
+        f"SELECT id, data, tipo, stato_emotivo, coerenza, descrizione, motivazione "
+        f"FROM diario WHERE {where} ORDER BY data DESC, id DESC LIMIT ?",
+        (*parametri, limite)
+    )
+
+
+def conta_per_trimestre(utente: str, dal: date = None, al: date = None, tipo: str = None,
+                        stato_emotivo: str = None, raggruppa: str = None, db: Database = None) -> list:
+    """Numero di decisioni per trimestre, es. le decisioni prese in preda al panico
+
+    Con `raggruppa` ("tipo", "stato_emotivo" o "coerenza") il conteggio è
+    separato anche per quella colonna.
+    """
+    if raggruppa not in (None, "tipo", "stato_emotivo", "coerenza"):
+        raise ValueError(f"Colonna di raggruppamento non valida: {raggruppa!r}")
+    where, parametri = _filtri(utente, dal, al, tipo, stato_emotivo)
+    colonne = f"{TRIMESTRE_SQL} AS trimestre" + (f", {raggruppa}" if raggruppa else "")
+    gruppi = "trimestre" + (f", {raggruppa}" if raggruppa else "")
+    return _db(db).leggi(
+        f"SELECT {colonne}, COUNT(*) AS decisioni FROM diario WHERE {where} "
+        f"GROUP BY {gruppi} ORDER BY {gruppi}",
+        parametri
+    )
+
+
+def riepilogo(utente: str, db: Database = None) -> dict:
+    """Totale delle decisioni e conteggi per stato emotivo e coerenza con il piano"""
+    db = _db(db)
+    per_stato = db.leggi(
+        "SELECT stato_emotivo, COUNT(*) AS n FROM diario WHERE utente = ? GROUP BY stato_emotivo", (utente,)
+    )
+    per_coerenza = db.leggi(
+        "SELECT coerenza, COUNT(*) AS n FROM diario WHERE utente = ? GROUP BY coerenza", (utente,)
+    )
+    return {
+        "totale": sum(r["n"] for r in per_stato),
+        "per_stato": {r["stato_emotivo"]: r["n"] for r in per_stato},
+        "per_coerenza": {r["coerenza"]: r["n"] for r in per_coerenza}
+    }
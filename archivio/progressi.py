@@ -0,0 +1,160 @@
+"""
+Progressi degli utenti nei capitoli del corso
+InvestAccademy - Corso di Finanza Personale
+
+Gli eventi (tentativi di quiz, utilizzo dei calcolatori) sono registrati in una
+tabella in sola aggiunta. Un trigger aggiorna nella stessa transazione i totali
+per utente e capitolo, così la home legge al massimo 16 righe invece di
+ripercorrere tutto lo storico.
+"""
+
+import threading
+
+from .database import Database, database
+
+# Quota minima di risposte corrette in un tentativo per considerare completato un capitolo
+SOGLIA_COMPLETAMENTO = 0.7
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS eventi (
+    id INTEGER PRIMARY KEY,
+    utente TEXT NOT NULL,
+    capitolo INTEGER NOT NULL,
+    tipo TEXT NOT NULL CHECK (tipo IN ('quiz', 'calcolatore')),
+    dettaglio TEXT NOT NULL DEFAULT '',
+    corrette INTEGER NOT NULL DEFAULT 0,
+    domande INTEGER NOT NULL DEFAULT 0,
+    registrato TEXT NOT NULL DEFAULT (datetime('now'))
+);
+CREATE INDEX IF NOT EXISTS eventi_utente ON eventi (utente, capitolo, registrato);
+
+CREATE TABLE IF NOT EXISTS progressi (
+    utente TEXT NOT NULL,
+    capitolo INTEGER NOT NULL,
+    tentativi_quiz INTEGER NOT NULL DEFAULT 0,
+    risposte_corrette INTEGER NOT NULL DEFAULT 0,
+    risposte_totali INTEGER NOT NULL DEFAULT 0,
+    miglior_punteggio REAL NOT NULL DEFAULT 0,
+    completato INTEGER NOT NULL DEFAULT 0,
+    utilizzi_calcolatori INTEGER NOT NULL DEFAULT 0,
+    ultimo_evento TEXT,
+    PRIMARY KEY (utente, capitolo)
+) WITHOUT ROWID;
+
+CREATE TRIGGER IF NOT EXISTS eventi_no_modifiche BEFORE UPDATE ON eventi
+BEGIN
+    SELECT RAISE(ABORT, 'la tabella eventi è in sola aggiunta');
+END;
+
+CREATE TRIGGER IF NOT EXISTS eventi_no_cancellazioni BEFORE DELETE ON eventi
+BEGIN
+    SELECT RAISE(ABORT, 'la tabella eventi è in sola aggiunta');
+END;
+
+CREATE TRIGGER IF NOT EXISTS eventi_aggiorna_progressi AFTER INSERT ON eventi
+BEGIN
+    INSERT INTO progressi (utente, capitolo, tentativi_quiz, risposte_corrette, risposte_totali,
+                           miglior_punteggio, completato, utilizzi_calcolatori, ultimo_evento)
+    VALUES (
+        NEW.utente,
+        NEW.capitolo,
+        NEW.tipo = 'quiz',
+        NEW.corrette,
+        NEW.domande,
+        CASE WHEN NEW.domande > 0 THEN 1.0 * NEW.corrette / NEW.domande ELSE 0 END,
+        NEW.domande > 0 AND 1.0 * NEW.corrette / NEW.domande >= {SOGLIA_COMPLETAMENTO},
+        NEW.tipo = 'calcolatore',
+        NEW.registrato
+    )
+    ON CONFLICT (utente, capitolo) DO UPDATE SET
+        tentativi_quiz = tentativi_quiz + excluded.tentativi_quiz,
+        risposte_corrette = risposte_corrette + excluded.risposte_corrette,
+        risposte_totali = risposte_totali + excluded.risposte_totali,
+        miglior_punteggio = max(miglior_punteggio, excluded.miglior_punteggio),
+        completato = max(completato, excluded.completato),
+        utilizzi_calcolatori = utilizzi_calcolatori + excluded.utilizzi_calcolatori,
+        ultimo_evento = excluded.ultimo_evento;
+END;
+"""
+
+_SCHEMI_CREATI = set()
+_LOCK_SCHEMA = threading.Lock()
+
+
+def _db(db: Database = None) -> Database:
+    """Database da usare, con le tabelle dei progressi create al primo accesso"""
+    db = db or database()
+    if db.percorso not in _SCHEMI_CREATI:
+        with _LOCK_SCHEMA:
+            if db.percorso not in _SCHEMI_CREATI:
+                db.esegui_script(SCHEMA)
+                _SCHEMI_CREATI.add(db.percorso)
+    return db
+
+
+def _registra(utente: str, capitolo: int, tipo: str, dettaglio: str = "", corrette: int = 0,
+              domande: int = 0, db: Database = None):
+    return _db(db).scrivi(
+        "INSERT INTO eventi (utente, capitolo, tipo, dettaglio, corrette, domande) VALUES (?, ?, ?, ?, ?, ?)",
+        (utente, capitolo, tipo, dettaglio, corrette, domande)
+    )
+
+
+def registra_quiz(utente: str, capitolo: int, corrette: int, domande: int, db: Database = None):
+    """Accoda un tentativo di quiz; restituisce un Future con l'id dell'evento"""
+    return _registra(utente, capitolo, "quiz", corrette=corrette, domande=domande, db=db)
+
+
+def registra_calcolatore(utente: str, capitolo: int, calcolatore: str, db: Database = None):
+    """Accoda l'utilizzo di un calcolatore; restituisce un Future con l'id dell'evento"""
+    return _registra(utente, capitolo, "calcolatore", dettaglio=calcolatore, db=db)
+
+
+def progressi_utente(utente: str, db: Database = None) -> dict:
+    """Totali per capitolo dell'utente, letti dalla tabella aggregata"""
+    righe = _db(db).leggi(
+        "SELECT capitolo, tentativi_quiz, risposte_corrette, risposte_totali, miglior_punteggio, "
+        "completato, utilizzi_calcolatori, ultimo_evento FROM progressi WHERE utente = ?",
+        (utente,)
+    )
+    progressi = {}
+    for riga in righe:
+        riga["completato"] = bool(riga["completato"])
+        riga["accuratezza"] = riga["risposte_corrette"] / riga["risposte_totali"] if riga["risposte_totali"] else None
+        progressi[riga.pop("capitolo")] = riga
+    return progressi
+
+
+def riepilogo_corso(progressi: dict, n_capitoli: int) -> dict:
+    """Indicatori complessivi del corso a partire dai totali per capitolo"""
+    risposte_totali = sum(p["risposte_totali"] for p in progressi.values())
+    return {
+        "capitoli_completati": sum(p["completato"] for p in progressi.values()),
+        "percentuale_completamento": sum(p["completato"] for p in progressi.values()) / n_capitoli if n_capitoli else 0,
+        "tentativi_quiz": sum(p["tentativi_quiz"] for p in progressi.values()),
+        "accuratezza": sum(p["risposte_corrette"] for p in progressi.values()) / risposte_totali if risposte_totali else None,
+        "utilizzi_calcolatori": sum(p["utilizzi_calcolatori"] for p in progressi.values())
+    }
+
+
+def ricalcola_progressi(db: Database = None):
+    """Ricostruisce la tabella aggregata dallo storico degli eventi (es. dopo una migrazione)"""
+    _db(db).esegui_script(f"""
+        BEGIN;
+        DELETE FROM progressi;
+        INSERT INTO progressi (utente, capitolo, tentativi_quiz, risposte_corrette, risposte_totali,
+                               miglior_punteggio, completato, utilizzi_calcolatori, ultimo_evento)
+        SELECT
+            utente,
+            capitolo,
+            SUM(tipo = 'quiz'),
+            SUM(corrette),
+            SUM(domande),
+            COALESCE(MAX(CASE WHEN domande > 0 THEN 1.0 * corrette / domande END), 0),
+            COALESCE(MAX(domande > 0 AND 1.0 * corrette / domande >= {SOGLIA_COMPLETAMENTO}), 0),
+            SUM(tipo = 'calcolatore'),
+            MAX(registrato)
+        FROM eventi
+        GROUP BY utente, capitolo;
+        COMMIT;
+    """)
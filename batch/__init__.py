@@ -0,0 +1,5 @@
+"""
+Elaborazioni a riga di comando sui calcolatori di InvestAccademy
+
+I moduli si eseguono dalla cartella del progetto, es. `python -m batch.scenari`.
+"""
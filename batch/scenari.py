@@ -0,0 +1,216 @@
+"""
+Calcolatori su file di scenari (CSV o Parquet)
+InvestAccademy - Corso di Finanza Personale
+
+Legge gli scenari a blocchi di righe, valuta ogni blocco con una sola chiamata
+vettoriale alle funzioni di `finanza` e scrive subito il risultato: la memoria
+usata dipende dalla dimensione del blocco, non da quella del file.
+
+Ogni riga del file di uscita contiene le colonne di ingresso seguite da quelle
+calcolate. Il formato è dedotto dall'estensione (.csv, .parquet/.pq); "-" indica
+CSV su standard input/output.
+
+Uso:
+    python -m batch.scenari pac clienti.csv risultati.parquet
+    python -m batch.scenari --elenco
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from finanza.costi import calcola_impatto_costi
+from finanza.debito import ammortamento
+from finanza.fiscalita import calcola_impatto_tasse
+from finanza.pac import totali_pac
+from finanza.ribilanciamento import drift_finale
+
+# Righe elaborate per blocco
+DIMENSIONE_BLOCCO = 50_000
+
+# Calcolatori disponibili: funzione vettoriale e colonne richieste, nell'ordine degli argomenti
+CALCOLATORI = {
+    "pac": {
+        "funzione": totali_pac,
+        "colonne": ("importo_mensile", "mesi", "rendimento_annuo"),
+        "descrizione": "Piano di accumulo a rendimento costante (rendimento annuo in %)"
+    },
+    "ammortamento": {
+        "funzione": ammortamento,
+        "colonne": ("saldo", "tasso", "rata_mensile"),
+        "descrizione": "Durata e interessi di un debito a rata costante (tasso annuo in %)"
+    },
+    "tasse": {
+        "funzione": calcola_impatto_tasse,
+        "colonne": ("capitale", "rendimento", "anni", "tassazione_annua", "tassazione_differita"),
+        "descrizione": "Tassazione annua contro tassazione differita (valori in %)"
+    },
+    "costi": {
+        "funzione": calcola_impatto_costi,
+        "colonne": ("capitale", "anni", "rendimento", "costo_perc"),
+        "descrizione": "Impatto dei costi annui sul capitale finale (valori in %)"
+    },
+    "drift": {
+        "funzione": drift_finale,
+        "colonne": ("azioni_iniz", "obblig_iniz", "anni", "rend_azioni", "rend_obblig"),
+        "descrizione": "Composizione finale di un portafoglio senza ribilanciamento"
+    }
+}
+
+FORMATI = {".csv": "csv", ".parquet": "parquet", ".pq": "parquet"}
+
+
+def formato(percorso: str) -> str:
+    """"csv" o "parquet" a partire dall'estensione del file"""
+    if percorso == "-":
+        return "csv"
+    estensione = Path(percorso).suffix.lower()
+    if estensione not in FORMATI:
+        raise ValueError(f"Formato non riconosciuto per {percorso!r}: usa .csv, .parquet o .pq")
+    return FORMATI[estensione]
+
+
+def leggi_blocchi(percorso: str, dimensione: int = DIMENSIONE_BLOCCO):
+    """DataFrame successivi di al massimo `dimensione` righe"""
+    if formato(percorso) == "csv":
+        yield from pd.read_csv(sys.stdin if percorso == "-" else percorso, chunksize=dimensione)
+        return
+
+    import pyarrow.parquet as pq
+
+    with pq.ParquetFile(percorso) as file:
+        for lotto in file.iter_batches(batch_size=dimensione):
+            yield lotto.to_pandas()
+
+
+class Scrittore:
+    """Scrive i blocchi in coda allo stesso file, man mano che arrivano"""
+
+    def __init__(self, percorso: str):
+        self.percorso = percorso
+        self.formato = formato(percorso)
+        self._file = None
+        self._parquet = None
+        self._schema = None
+
+    def scrivi(self, blocco: pd.DataFrame):
+        if self.formato == "csv":
+            primo = self._file is None
+            if primo:
+                self._file = sys.stdout if self.percorso == "-" else open(self.percorso, "w", newline="", encoding="utf-8")
+            blocco.to_csv(self._file, header=primo, index=False)
+            return
+
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        tabella = pa.Table.from_pandas(blocco, preserve_index=False)
+        if self._parquet is None:
+            self._schema = tabella.schema
+            self._parquet = pq.ParquetWriter(self.percorso, self._schema)
+        else:
+            # Es. una colonna intera nel primo blocco e con valori mancanti in un altro
+            tabella = tabella.cast(self._schema)
+        self._parquet.write_table(tabella)
+
+    def chiudi(self):
+        if self._parquet is not None:
+            self._parquet.close()
+        if self._file is not None and self._file is not sys.stdout:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *errore):
+        self.chiudi()
+        return False
+
+
+def valuta_blocco(calcolatore: str, blocco: pd.DataFrame) -> pd.DataFrame:
+    """Colonne di ingresso più i risultati del calcolatore, riga per riga"""
+    specifica = CALCOLATORI[calcolatore]
+
+    mancanti = [c for c in specifica["colonne"] if c not in blocco.columns]
+    if mancanti:
+        raise ValueError(f"Colonne mancanti per '{calcolatore}': {', '.join(mancanti)}")
+
+    argomenti = [pd.to_numeric(blocco[c], errors="coerce").to_numpy(dtype=float) for c in specifica["colonne"]]
+    risultato = specifica["funzione"](*argomenti)
+
+    doppie = [c for c in risultato if c in blocco.columns]
+    if doppie:
+        raise ValueError(f"Le colonne {', '.join(doppie)} esistono già nel file di ingresso")
+
+    righe = len(blocco)
+    calcolate = pd.DataFrame(
+        {nome: np.broadcast_to(valori, (righe,)) for nome, valori in risultato.items()},
+        index=blocco.index
+    )
+    return pd.concat([blocco, calcolate], axis=1)
+
+
+def elabora(calcolatore: str, ingresso: str, uscita: str, dimensione: int = DIMENSIONE_BLOCCO,
+            avanzamento=None) -> int:
+    """Valuta tutti gli scenari di `ingresso` e scrive `uscita`; restituisce le righe elaborate"""
+    if calcolatore not in CALCOLATORI:
+        raise ValueError(f"Calcolatore sconosciuto: {calcolatore!r} (disponibili: {', '.join(CALCOLATORI)})")
+    if dimensione < 1:
+        raise ValueError("La dimensione del blocco deve essere almeno 1")
+
+    righe = 0
+    with Scrittore(uscita) as scrittore:
+        for blocco in leggi_blocchi(ingresso, dimensione):
+            scrittore.scrivi(valuta_blocco(calcolatore, blocco))
+            righe += len(blocco)
+            if avanzamento is not None:
+                avanzamento(righe)
+    return righe
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Calcolatori di InvestAccademy su file di scenari CSV o Parquet")
+    parser.add_argument("calcolatore", nargs="?", choices=list(CALCOLATORI))
+    parser.add_argument("ingresso", nargs="?", help="file di scenari (.csv, .parquet) o - per stdin")
+    parser.add_argument("uscita", nargs="?", help="file dei risultati (.csv, .parquet) o - per stdout")
+    parser.add_argument("--blocco", type=int, default=DIMENSIONE_BLOCCO, help="righe elaborate per blocco")
+    parser.add_argument("--silenzioso", action="store_true", help="non mostrare l'avanzamento")
+    parser.add_argument("--elenco", action="store_true", help="elenca i calcolatori e le colonne richieste")
+    args = parser.parse_args(argv)
+
+    if args.elenco:
+        for nome, specifica in CALCOLATORI.items():
+            print(f"{nome}: {specifica['descrizione']}\n    colonne: {', '.join(specifica['colonne'])}")
+        return 0
+    if not (args.calcolatore and args.ingresso and args.uscita):
+        parser.error("indica calcolatore, file di ingresso e file di uscita")
+
+    inizio = time.perf_counter()
+
+    def avanzamento(righe):
+        if not args.silenzioso:
+            print(f"\r{righe:,} righe elaborate", end="", file=sys.stderr, flush=True)
+
+    try:
+        righe = elabora(args.calcolatore, args.ingresso, args.uscita, args.blocco, avanzamento)
+    except BrokenPipeError:
+        # Uscita chiusa in anticipo (es. `| head`): nessun messaggio, come gli strumenti Unix
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
+    except (OSError, ValueError) as errore:
+        print(f"\nErrore: {errore}", file=sys.stderr)
+        return 1
+
+    if not args.silenzioso:
+        durata = time.perf_counter() - inizio
+        print(f"\r{righe:,} righe elaborate in {durata:.1f} s -> {args.uscita}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,5 @@
+"""
+Strumenti di misura delle prestazioni dell'app InvestAccademy
+
+I moduli si eseguono dalla cartella del progetto, es. `python -m benchmark.carico`.
+"""
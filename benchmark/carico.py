@@ -0,0 +1,288 @@
+"""
+Test di carico con sessioni simulate
+InvestAccademy - Corso di Finanza Personale
+
+Esegue `app.py` senza browser con `streamlit.testing.v1.AppTest`: ogni sessione
+simulata percorre un itinerario realistico (home, simulatore del capitolo 10,
+PAC del capitolo 12, piani di rimborso del capitolo 6) muovendo gli slider come
+farebbe un utente. N sessioni girano in parallelo, ognuna in un processo
+separato: `AppTest` sostituisce l'istanza globale del runtime di Streamlit
+durante ogni rerun, quindi due AppTest nello stesso processo non possono
+eseguire insieme.
+
+Il risultato è un JSON con percentili di latenza dei rerun (complessivi e per
+passo), throughput e memoria residente per sessione, da confrontare tra
+versioni e per dimensionare le istanze.
+
+Uso:
+    python -m benchmark.carico --sessioni 8 --ripetizioni 2 --output carico.json
+"""
+
+import argparse
+import importlib
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+RADICE = Path(__file__).resolve().parent.parent
+APP = RADICE / "app.py"
+
+PERCENTILI = (50, 90, 95, 99)
+
+# Attesa massima per un singolo rerun (secondi)
+TIMEOUT_RERUN = 120
+
+# Valori provati a ogni passaggio sugli slider di un itinerario
+VALORI_PER_SLIDER = 4
+
+SEZIONE_CALCOLATORI = "🧮 Calcolatori"
+
+# Moduli importati da ogni processo prima di misurare memoria e latenze
+MODULI_PRECARICATI = (
+    "streamlit.testing.v1",
+    "capitoli.capitolo_06",
+    "capitoli.capitolo_10",
+    "capitoli.capitolo_12"
+)
+
+
+def memoria_residente() -> float:
+    """Memoria residente attuale del processo (MB)"""
+    try:
+        with open("/proc/self/statm") as file:
+            pagine = int(file.read().split()[1])
+        return pagine * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, AttributeError):
+        import resource
+        picco = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return picco / 2**20 if sys.platform == "darwin" else picco / 2**10
+
+
+class Sessione:
+    """Un utente simulato: un AppTest più i tempi di ogni rerun"""
+
+    def __init__(self, indice: int, seme: int, timeout: float = TIMEOUT_RERUN):
+        self.indice = indice
+        self.rng = random.Random(seme * 1_000_003 + indice)
+        self.timeout = timeout
+        self.app = None
+        self.tempi = []
+        self.errori = []
+
+    def rerun(self, passo: str, azione=None):
+        """Applica `azione` (se c'è) ed esegue un rerun, registrandone la durata"""
+        if azione is not None:
+            azione(self.app)
+        inizio = time.perf_counter()
+        self.app.run(timeout=self.timeout)
+        self.tempi.append((passo, time.perf_counter() - inizio))
+        if self.app.exception:
+            raise RuntimeError(f"{passo}: {self.app.exception[0].message}")
+
+    def apri(self, pagina: str, passo: str):
+        self.rerun(passo, lambda app: app.switch_page(pagina))
+
+    def calcolatori(self, capitolo: int, calcolatore: str):
+        """Apre la sezione dei calcolatori e sceglie `calcolatore`"""
+        def azione(app):
+            app.session_state[f"cap{capitolo}_sezione"] = SEZIONE_CALCOLATORI
+        self.rerun(f"cap{capitolo}.sezione", azione)
+        self.rerun(
+            f"cap{capitolo}.calcolatore",
+            lambda app: app.radio(key=f"cap{capitolo}_calcolatore").set_value(calcolatore)
+        )
+
+    def muovi(self, passo: str, chiave: str, valori):
+        """Sposta lo slider `chiave` su alcuni dei `valori`, un rerun per valore"""
+        for valore in self.rng.sample(list(valori), min(VALORI_PER_SLIDER, len(valori))):
+            self.rerun(passo, lambda app: app.slider(key=chiave).set_value(valore))
+
+    def imposta(self, passo: str, chiave: str, valore):
+        self.rerun(passo, lambda app: app.number_input(key=chiave).set_value(valore))
+
+    def itinerario(self):
+        """Percorso tipico: home, simulatore cap. 10, PAC cap. 12, debiti cap. 6"""
+        from streamlit.testing.v1 import AppTest
+
+        self.app = AppTest.from_file(str(APP), default_timeout=self.timeout)
+        self.rerun("home")
+
+        self.apri("pagine/capitolo_10.py", "cap10.apertura")
+        self.calcolatori(10, "Simulatore Asset Allocation")
+        self.muovi("cap10.anni", "cap10_sim_anni", range(5, 31, 5))
+        self.muovi("cap10.azioni", "cap10_sim_azioni", range(20, 91, 10))
+
+        self.apri("pagine/capitolo_12.py", "cap12.apertura")
+        self.calcolatori(12, "Simulatore PAC")
+        self.muovi("cap12.anni", "cap12_anni", range(5, 41, 5))
+        self.muovi("cap12.rendimento", "cap12_rend", [r / 2 for r in range(0, 25)])
+        self.rerun(
+            "cap12.dca",
+            lambda app: app.radio(key="cap12_calcolatore").set_value("Effetto Dollar Cost Averaging")
+        )
+
+        self.apri("pagine/capitolo_06.py", "cap6.apertura")
+        self.calcolatori(6, "Piano di rimborso")
+        self.muovi("cap6.tasso", "cap6_tasso", [t / 2 for t in range(1, 51)])
+        self.imposta("cap6.rata", "cap6_rata", float(self.rng.randrange(100, 500, 10)))
+        self.rerun(
+            "cap6.strategie",
+            lambda app: app.radio(key="cap6_calcolatore").set_value("Confronto Snowball vs Avalanche")
+        )
+
+    def esegui(self, ripetizioni: int) -> dict:
+        for _ in range(ripetizioni):
+            try:
+                self.itinerario()
+            except Exception as errore:
+                self.errori.append(f"sessione {self.indice}: {errore}")
+                break
+        return {"tempi": self.tempi, "errori": self.errori}
+
+
+def _sessione_processo(indice: int, seme: int, ripetizioni: int, timeout: float) -> dict:
+    """Una sessione nel suo processo, con la memoria che ha aggiunto al processo"""
+    # Come in un worker già avviato: moduli importati prima della misura
+    for modulo in MODULI_PRECARICATI:
+        importlib.import_module(modulo)
+
+    base = memoria_residente()
+    inizio = time.time()
+    risultato = Sessione(indice, seme, timeout).esegui(ripetizioni)
+    risultato["inizio"] = inizio
+    risultato["fine"] = time.time()
+    risultato["memoria_base_mb"] = base
+    risultato["memoria_mb"] = memoria_residente() - base
+    return risultato
+
+
+def _esegui_sessioni(sessioni: int, seme: int, ripetizioni: int, timeout: float) -> list:
+    with ProcessPoolExecutor(max_workers=sessioni) as pool:
+        futuri = [pool.submit(_sessione_processo, i, seme, ripetizioni, timeout) for i in range(sessioni)]
+        return [futuro.result() for futuro in futuri]
+
+
+def riassumi(durate) -> dict:
+    """Numero di campioni, media, percentili e massimo (ms)"""
+    valori = np.asarray(durate, dtype=float) * 1000
+    if not valori.size:
+        return {"n": 0}
+    riassunto = {"n": int(valori.size), "media": float(valori.mean())}
+    for p, valore in zip(PERCENTILI, np.percentile(valori, PERCENTILI)):
+        riassunto[f"p{p}"] = float(valore)
+    riassunto["max"] = float(valori.max())
+    return riassunto
+
+
+def _versione_codice() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=RADICE, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _ambiente() -> dict:
+    import pandas
+    import streamlit
+
+    return {
+        "commit": _versione_codice(),
+        "python": platform.python_version(),
+        "streamlit": streamlit.__version__,
+        "numpy": np.__version__,
+        "pandas": pandas.__version__,
+        "piattaforma": platform.platform(),
+        "cpu": os.cpu_count()
+    }
+
+
+def esegui_carico(sessioni: int = 4, ripetizioni: int = 1, seme: int = 0, timeout: float = TIMEOUT_RERUN,
+                  etichetta: str = None) -> dict:
+    """Esegue il test di carico e restituisce il report"""
+    if sessioni < 1 or ripetizioni < 1:
+        raise ValueError("Sessioni e ripetizioni devono essere almeno 1")
+
+    risultati = _esegui_sessioni(sessioni, seme, ripetizioni, timeout)
+
+    # Dal primo avvio all'ultima fine: esclude la creazione dei processi
+    durata = max(r["fine"] for r in risultati) - min(r["inizio"] for r in risultati)
+    memoria = [r["memoria_mb"] for r in risultati]
+
+    tempi = [t for r in risultati for t in r["tempi"]]
+    per_passo = {}
+    for passo, durata_rerun in tempi:
+        per_passo.setdefault(passo, []).append(durata_rerun)
+    errori = [e for r in risultati for e in r["errori"]]
+
+    return {
+        "etichetta": etichetta,
+        "generato": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "ambiente": _ambiente(),
+        "configurazione": {
+            "sessioni": sessioni,
+            "ripetizioni": ripetizioni,
+            "seme": seme,
+            "valori_per_slider": VALORI_PER_SLIDER
+        },
+        "durata_s": durata,
+        "rerun": len(tempi),
+        "throughput_rerun_s": len(tempi) / durata if durata else 0.0,
+        "sessioni_con_errori": sum(bool(r["errori"]) for r in risultati),
+        "errori": errori,
+        "latenza_ms": {
+            "complessiva": riassumi([d for _, d in tempi]),
+            "per_passo": {passo: riassumi(durate) for passo, durate in per_passo.items()}
+        },
+        "memoria_mb": {
+            "base_processo": float(np.mean([r["memoria_base_mb"] for r in risultati])),
+            "per_sessione": float(np.mean(memoria)),
+            "per_sessione_max": float(np.max(memoria))
+        }
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Test di carico di InvestAccademy con sessioni simulate")
+    parser.add_argument("--sessioni", type=int, default=4, help="sessioni simulate in parallelo")
+    parser.add_argument("--ripetizioni", type=int, default=1, help="itinerari completi per sessione")
+    parser.add_argument("--seme", type=int, default=0, help="seme per la scelta dei valori degli slider")
+    parser.add_argument("--timeout", type=float, default=TIMEOUT_RERUN, help="attesa massima per rerun (s)")
+    parser.add_argument("--etichetta", help="nome del run, es. la versione in prova")
+    parser.add_argument("--output", help="file JSON di destinazione (predefinito: stdout)")
+    args = parser.parse_args(argv)
+
+    # Le sessioni simulate salvano i progressi: mai nel database reale
+    os.environ.setdefault("INVESTACCADEMY_DB", str(Path(tempfile.mkdtemp(prefix="investaccademy_carico_")) / "carico.db"))
+    os.chdir(RADICE)
+
+    report = esegui_carico(args.sessioni, args.ripetizioni, args.seme, args.timeout, args.etichetta)
+    testo = json.dumps(report, indent=2, ensure_ascii=False)
+
+    if args.output:
+        Path(args.output).write_text(testo + "\n", encoding="utf-8")
+        complessiva = report["latenza_ms"]["complessiva"]
+        print(
+            f"{report['rerun']} rerun in {report['durata_s']:.1f} s "
+            f"({report['throughput_rerun_s']:.2f}/s), p50 {complessiva.get('p50', 0):.0f} ms, "
+            f"p95 {complessiva.get('p95', 0):.0f} ms, {len(report['errori'])} errori -> {args.output}",
+            file=sys.stderr
+        )
+    else:
+        print(testo)
+
+    return 1 if report["errori"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+"""
+Scalabilità delle simulazioni Monte Carlo sui processi
+InvestAccademy - Corso di Finanza Personale
+
+Esegue le simulazioni di `finanza` (portafoglio del capitolo 10, percorsi DCA
+del capitolo 12, curva della diversificazione del capitolo 9) con un numero
+crescente di processi e riporta tempi, speedup rispetto a un processo ed
+efficienza. Il pool viene scaldato prima di ogni misura, come in un server già
+avviato. Controlla anche che i risultati non cambino con il numero di processi.
+
+Uso:
+    python -m benchmark.montecarlo --percorsi 1000000 --processi 1 2 4 8
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from inspect import unwrap
+
+from finanza import parallelo
+from finanza.pac import simula_dca_percorsi
+from finanza.portafoglio import montecarlo_portafoglio
+from finanza.rischio import curva_diversificazione
+
+# Simulazioni misurate: funzione di `finanza` con n percorsi e processi dati
+SIMULAZIONI = {
+    "portafoglio": lambda n, processi: montecarlo_portafoglio(
+        (0.6, 0.35, 0.05), 10_000.0, 20, n, processi=processi
+    ),
+    # Senza cache: ogni ripetizione deve ricalcolare
+    "dca": lambda n, processi: unwrap(simula_dca_percorsi)(200.0, 120, n, processi=processi),
+    "correlazione": lambda n, processi: unwrap(curva_diversificazione)(15.0, 15.0, 100, n, processi=processi)
+}
+
+
+def _confrontabile(risultato):
+    """Forma serializzabile del risultato, per confrontare i run"""
+    if hasattr(risultato, "tabella"):
+        return risultato.tabella().to_json()
+    return json.dumps({k: v for k, v in risultato.items() if k != "prezzi"}, sort_keys=True, default=str)
+
+
+def misura(simulazione: str, percorsi: int, processi: int, ripetizioni: int) -> dict:
+    """Tempo migliore su `ripetizioni` esecuzioni, con il pool già avviato"""
+    funzione = SIMULAZIONI[simulazione]
+    if processi > 1:
+        funzione(parallelo.PERCORSI_MINIMI_PER_BLOCCO * processi, processi)
+
+    durate = []
+    for _ in range(ripetizioni):
+        inizio = time.perf_counter()
+        risultato = funzione(percorsi, processi)
+        durate.append(time.perf_counter() - inizio)
+    return {"secondi": min(durate), "risultato": _confrontabile(risultato)}
+
+
+def esegui(simulazioni, percorsi: int, processi, ripetizioni: int = 3) -> dict:
+    """Report con tempi, speedup ed efficienza per simulazione e numero di processi"""
+    report = {
+        "percorsi": percorsi,
+        "percorsi_per_seme": parallelo.PERCORSI_PER_SEME,
+        "percorsi_minimi_per_blocco": parallelo.PERCORSI_MINIMI_PER_BLOCCO,
+        "cpu": os.cpu_count(),
+        "simulazioni": {}
+    }
+    for simulazione in simulazioni:
+        righe = {}
+        riferimento = None
+        for n in processi:
+            misurato = misura(simulazione, percorsi, n, ripetizioni)
+            if riferimento is None:
+                riferimento = misurato
+            speedup = riferimento["secondi"] / misurato["secondi"]
+            righe[n] = {
+                "secondi": misurato["secondi"],
+                "speedup": speedup,
+                "efficienza": speedup * processi[0] / n,
+                "risultato_identico": misurato["risultato"] == riferimento["risultato"]
+            }
+        report["simulazioni"][simulazione] = righe
+    parallelo.chiudi_pool()
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Scalabilità delle simulazioni Monte Carlo sui processi")
+    parser.add_argument("--percorsi", type=int, default=1_000_000, help="percorsi per simulazione")
+    parser.add_argument("--processi", type=int, nargs="+", default=[1, 2, 4], help="numeri di processi da provare")
+    parser.add_argument("--ripetizioni", type=int, default=3, help="esecuzioni per misura (si tiene la migliore)")
+    parser.add_argument("--simulazioni", nargs="+", choices=list(SIMULAZIONI), default=list(SIMULAZIONI))
+    parser.add_argument("--output", help="file JSON di destinazione (predefinito: stdout)")
+    args = parser.parse_args(argv)
+
+    report = esegui(args.simulazioni, args.percorsi, sorted(set(args.processi)), args.ripetizioni)
+
+    for simulazione, righe in report["simulazioni"].items():
+        for n, riga in righe.items():
+            print(
+                f"{simulazione:>12}  {n:>2} processi  {riga['secondi']:7.2f} s  "
+                f"speedup {riga['speedup']:5.2f}  efficienza {riga['efficienza']:4.0%}"
+                f"{'' if riga['risultato_identico'] else '  RISULTATO DIVERSO'}",
+                file=sys.stderr
+            )
+
+    testo = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(testo + "\n")
+    else:
+        print(testo)
+
+    identici = all(r["risultato_identico"] for righe in report["simulazioni"].values() for r in righe.values())
+    return 0 if identici else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
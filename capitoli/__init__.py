@@ -1,10 +1,54 @@
 """
 Package contenente i capitoli del corso InvestAccademy
+
+I moduli dei capitoli non vengono importati all'avvio: `carica()` li importa
+alla prima richiesta e li conserva in una cache condivisa dal processo.
 """
 
-from . import capitolo_01
-from . import capitolo_02
-from . import capitolo_03
-from . import capitolo_04
+import importlib
+import threading
+
+__all__ = [
+    "capitolo_01",
+    "capitolo_02",
+    "capitolo_03",
+    "capitolo_04",
+    "capitolo_05",
+    "capitolo_06",
+    "capitolo_07",
+    "capitolo_08",
+    "capitolo_09",
+    "capitolo_10",
+    "capitolo_11",
+    "capitolo_12",
+    "capitolo_13",
+    "capitolo_14",
+    "capitolo_15",
+    "capitolo_16",
+    "carica"
+]
+
+# Moduli già importati, condivisi da tutte le sessioni del processo
+_MODULI_CARICATI = {}
+_LOCK_CARICAMENTO = threading.Lock()
+
+
+def carica(percorso: str):
+    """Importa il modulo di un capitolo su richiesta (es. "capitoli.capitolo_12")"""
+    modulo = _MODULI_CARICATI.get(percorso)
+    if modulo is not None:
+        return modulo
+    
+    with _LOCK_CARICAMENTO:
+        modulo = _MODULI_CARICATI.get(percorso)
+        if modulo is None:
+            modulo = importlib.import_module(percorso)
+            _MODULI_CARICATI[percorso] = modulo
+    return modulo
+
 
-__all__ = ["capitolo_01", "capitolo_02", "capitolo_03", "capitolo_04"]
+def __getattr__(nome: str):
+    """Mantiene funzionante `from capitoli import capitolo_XX` senza import anticipati"""
+    if nome.startswith("capitolo_") and nome in __all__:
+        return carica(f"{__name__}.{nome}")
+    raise AttributeError(f"module {__name__!r} has no attribute {nome!r}")
@@ -5,6 +5,12 @@ InvestAccademy - Corso di Finanza Personale
 
 import streamlit as st
 
+from finanza.cashflow import calcola_cash_flow
+from finanza.tempi import cronometra
+
+from .componenti import render_sezioni, segna_calcolatore
+from .quiz import indicizza_quiz, chiavi_quiz, render_quiz_capitolo
+
 # Metadata
 CAPITOLO_NUM = 1
 TITOLO = "Introduzione alla finanza personale"
@@ -49,36 +55,16 @@ QUIZ = [
     }
 ]
 
+# Domande indicizzate una volta sola, all'import del modulo
+INDICE_QUIZ = indicizza_quiz(QUIZ, passo=1.0, tolleranza=1.0)
 
-def calcola_cash_flow(reddito: float, spese_fisse: float, spese_variabili: float) -> dict:
-    """Calcola e analizza il cash flow mensile"""
-    risparmio = reddito - spese_fisse - spese_variabili
-    
-    if reddito > 0:
-        perc_fisse = (spese_fisse / reddito) * 100
-        perc_variabili = (spese_variabili / reddito) * 100
-        perc_risparmio = (risparmio / reddito) * 100
-    else:
-        perc_fisse = perc_variabili = perc_risparmio = 0
-    
-    if perc_risparmio >= 20:
-        valutazione = ("🟢", "Ottimo! Stai risparmiando più del 20%")
-    elif perc_risparmio >= 10:
-        valutazione = ("🟡", "Buono. Margine di risparmio nella norma")
-    elif perc_risparmio > 0:
-        valutazione = ("🟠", "Attenzione. Margine di risparmio ridotto")
-    else:
-        valutazione = ("🔴", "Critico. Spese superiori alle entrate")
-    
-    return {
-        "risparmio": risparmio,
-        "perc_fisse": perc_fisse,
-        "perc_variabili": perc_variabili,
-        "perc_risparmio": perc_risparmio,
-        "valutazione": valutazione
-    }
+# Widget il cui valore va conservato cambiando sezione (esclusi i pulsanti)
+CHIAVI_WIDGET = (
+    "cap1_reddito", "cap1_fisse", "cap1_variabili"
+) + chiavi_quiz(CAPITOLO_NUM, INDICE_QUIZ)
 
 
+@cronometra
 def render_contenuto():
     """Renderizza il contenuto teorico del capitolo"""
     
@@ -132,12 +118,16 @@ def render_contenuto():
             """)
 
 
+@st.fragment
+@cronometra
 def render_calcolatore():
     """Renderizza il calcolatore di cash flow"""
     
     st.markdown("## 🧮 Calcolatore Cash Flow")
     st.markdown("Inserisci i tuoi dati per analizzare il tuo flusso di cassa mensile.")
     
+    segna_calcolatore(CAPITOLO_NUM, "Cash Flow")
+    
     col1, col2 = st.columns(2)
     
     with col1:
@@ -203,72 +193,13 @@ def render_calcolatore():
                     st.caption(f"{cat}: {perc:.1f}%")
 
 
+@cronometra
 def render_quiz():
     """Renderizza il quiz di verifica"""
-    
-    st.markdown("## 📝 Quiz di verifica")
-    
-    # Inizializza stato quiz
-    if "cap1_risposte" not in st.session_state:
-        st.session_state.cap1_risposte = {}
-    if "cap1_verificato" not in st.session_state:
-        st.session_state.cap1_verificato = False
-    
-    for i, q in enumerate(QUIZ):
-        with st.container(border=True):
-            st.markdown(f"**Domanda {i+1}:** {q['domanda']}")
-            
-            if q["tipo"] == "vero_falso":
-                risposta = st.radio(
-                    "Seleziona:",
-                    ["Vero", "Falso"],
-                    key=f"cap1_q{q['id']}",
-                    horizontal=True
-                )
-                st.session_state.cap1_risposte[q['id']] = risposta == "Vero"
-                
-            elif q["tipo"] == "scelta_multipla":
-                risposta = st.radio(
-                    "Seleziona:",
-                    q["opzioni"],
-                    key=f"cap1_q{q['id']}"
-                )
-                st.session_state.cap1_risposte[q['id']] = risposta
-                
-            elif q["tipo"] == "numero":
-                risposta = st.number_input(
-                    "Inserisci il valore:",
-                    key=f"cap1_q{q['id']}",
-                    step=1.0
-                )
-                st.session_state.cap1_risposte[q['id']] = risposta
-            
-            # Mostra feedback se verificato
-            if st.session_state.cap1_verificato:
-                user_ans = st.session_state.cap1_risposte.get(q['id'])
-                if q["tipo"] == "numero":
-                    corretto = abs(user_ans - q["risposta_corretta"]) < 1
-                else:
-                    corretto = user_ans == q["risposta_corretta"]
-                
-                if corretto:
-                    st.success(f"✅ Corretto! {q['spiegazione']}")
-                else:
-                    st.error(f"❌ Sbagliato. Risposta corretta: {q['risposta_corretta']}")
-                    st.info(q['spiegazione'])
-    
-    col1, col2 = st.columns(2)
-    with col1:
-        if st.button("✅ Verifica risposte", type="primary", use_container_width=True):
-            st.session_state.cap1_verificato = True
-            st.rerun()
-    with col2:
-        if st.button("🔄 Ricomincia", use_container_width=True):
-            st.session_state.cap1_verificato = False
-            st.session_state.cap1_risposte = {}
-            st.rerun()
+    render_quiz_capitolo(CAPITOLO_NUM, INDICE_QUIZ)
 
 
+@cronometra
 def render_takeaways():
     """Renderizza i punti chiave"""
     
@@ -286,6 +217,7 @@ def render_takeaways():
         st.markdown(f"- {t}")
 
 
+@cronometra
 def render():
     """Funzione principale per renderizzare il capitolo"""
     
@@ -299,22 +231,10 @@ def render():
     
     st.markdown("---")
     
-    # Tabs per navigazione interna
-    tab1, tab2, tab3, tab4 = st.tabs([
-        "📚 Contenuto", 
-        "🧮 Calcolatore", 
-        "📝 Quiz",
-        "💡 Takeaways"
-    ])
-    
-    with tab1:
-        render_contenuto()
-    
-    with tab2:
-        render_calcolatore()
-    
-    with tab3:
-        render_quiz()
-    
-    with tab4:
-        render_takeaways()
+    # Sezioni: viene eseguita solo quella selezionata
+    render_sezioni(f"cap{CAPITOLO_NUM}", {
+        "📚 Contenuto": render_contenuto,
+        "🧮 Calcolatore": render_calcolatore,
+        "📝 Quiz": render_quiz,
+        "💡 Takeaways": render_takeaways
+    }, CHIAVI_WIDGET)
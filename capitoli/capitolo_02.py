@@ -5,6 +5,12 @@ InvestAccademy - Corso di Finanza Personale
 
 import streamlit as st
 
+from finanza.interesse import montante_semplice, montante_composto, rendimento_reale, evoluzione_capitale
+from finanza.tempi import cronometra
+
+from .componenti import render_sezioni, segna_calcolatore, grafico_linee
+from .quiz import indicizza_quiz, chiavi_quiz, render_quiz_capitolo
+
 # Metadata
 CAPITOLO_NUM = 2
 TITOLO = "Interesse, inflazione e rischio"
@@ -51,42 +57,17 @@ QUIZ = [
     }
 ]
 
+# Domande indicizzate una volta sola, all'import del modulo
+INDICE_QUIZ = indicizza_quiz(QUIZ, passo=0.5, tolleranza=0.5)
 
-def interesse_semplice(capitale: float, tasso: float, anni: int) -> float:
-    """Calcola l'interesse semplice"""
-    return capitale * (tasso / 100) * anni
-
-
-def montante_semplice(capitale: float, tasso: float, anni: int) -> float:
-    """Calcola il montante con interesse semplice"""
-    return capitale + interesse_semplice(capitale, tasso, anni)
-
-
-def montante_composto(capitale: float, tasso: float, anni: int) -> float:
-    """Calcola il montante con interesse composto"""
-    return capitale * ((1 + tasso / 100) ** anni)
-
-
-def rendimento_reale(nominale: float, inflazione: float) -> float:
-    """Calcola il rendimento reale approssimato"""
-    return nominale - inflazione
-
-
-def evoluzione_capitale(capitale: float, tasso: float, anni: int) -> list:
-    """Restituisce l'evoluzione anno per anno"""
-    evoluzione = []
-    cap = capitale
-    for anno in range(1, anni + 1):
-        interesse = cap * (tasso / 100)
-        cap = cap + interesse
-        evoluzione.append({
-            "anno": anno,
-            "capitale": round(cap, 2),
-            "interesse": round(interesse, 2)
-        })
-    return evoluzione
+# Widget il cui valore va conservato cambiando sezione (esclusi i pulsanti)
+CHIAVI_WIDGET = (
+    "cap2_calcolatore", "cap2_capitale", "cap2_tasso", "cap2_anni", "cap2_rend_nom", "cap2_inflazione",
+    "cap2_cap_inv", "cap2_anni_inv", "cap2_evol_cap", "cap2_evol_tasso", "cap2_evol_anni"
+) + chiavi_quiz(CAPITOLO_NUM, INDICE_QUIZ)
 
 
+@cronometra
 def render_contenuto():
     """Renderizza il contenuto teorico"""
     
@@ -173,6 +154,7 @@ def render_contenuto():
     """)
 
 
+@cronometra
 def render_calcolatore():
     """Renderizza i calcolatori"""
     
@@ -181,9 +163,12 @@ def render_calcolatore():
     calc_type = st.radio(
         "Seleziona calcolatore:",
         ["Confronto Interessi", "Rendimento Reale", "Evoluzione Capitale"],
-        horizontal=True
+        horizontal=True,
+        key="cap2_calcolatore"
     )
     
+    segna_calcolatore(CAPITOLO_NUM, calc_type)
+    
     st.markdown("---")
     
     if calc_type == "Confronto Interessi":
@@ -194,6 +179,8 @@ def render_calcolatore():
         render_calc_evoluzione()
 
 
+@st.fragment
+@cronometra
 def render_calc_confronto():
     """Calcolatore confronto interesse semplice vs composto"""
     
@@ -249,20 +236,19 @@ def render_calc_confronto():
         st.success(f"💡 **Vantaggio composto:** €{differenza:,.2f} in più!")
         
         # Grafico comparativo
+        import numpy as np
         import pandas as pd
         
-        dati_grafico = []
-        for a in range(anni + 1):
-            dati_grafico.append({
-                "Anno": a,
-                "Semplice": montante_semplice(capitale, tasso, a),
-                "Composto": montante_composto(capitale, tasso, a)
-            })
-        
-        df = pd.DataFrame(dati_grafico)
-        st.line_chart(df.set_index("Anno"))
+        anni_grafico = np.arange(anni + 1)
+        df = pd.DataFrame({
+            "Semplice": montante_semplice(capitale, tasso, anni_grafico),
+            "Composto": montante_composto(capitale, tasso, anni_grafico)
+        }, index=pd.Index(anni_grafico, name="Anno"))
+        grafico_linee(df)
 
 
+@st.fragment
+@cronometra
 def render_calc_rendimento():
     """Calcolatore rendimento reale"""
     
@@ -329,6 +315,8 @@ def render_calc_rendimento():
         st.info(f"💸 Perdita per inflazione: €{perdita_inflazione:,.2f}")
 
 
+@st.fragment
+@cronometra
 def render_calc_evoluzione():
     """Calcolatore evoluzione capitale"""
     
@@ -363,17 +351,12 @@ def render_calc_evoluzione():
     with col2:
         evoluzione = evoluzione_capitale(capitale, tasso, anni)
         
-        import pandas as pd
-        df = pd.DataFrame(evoluzione)
-        df.columns = ["Anno", "Capitale (€)", "Interesse anno (€)"]
-        
         st.dataframe(
-            df,
-            use_container_width=True,
-            hide_index=True
+            evoluzione.tabella(nomi={"anno": "Anno", "capitale": "Capitale (€)", "interesse": "Interesse anno (€)"}),
+            use_container_width=True
         )
         
-        montante_finale = evoluzione[-1]["capitale"]
+        montante_finale = evoluzione["capitale"][-1]
         interesse_totale = montante_finale - capitale
         
         c1, c2 = st.columns(2)
@@ -383,70 +366,13 @@ def render_calc_evoluzione():
             st.metric("Interessi totali", f"€{interesse_totale:,.2f}")
 
 
+@cronometra
 def render_quiz():
     """Renderizza il quiz di verifica"""
-    
-    st.markdown("## 📝 Quiz di verifica")
-    
-    if "cap2_risposte" not in st.session_state:
-        st.session_state.cap2_risposte = {}
-    if "cap2_verificato" not in st.session_state:
-        st.session_state.cap2_verificato = False
-    
-    for i, q in enumerate(QUIZ):
-        with st.container(border=True):
-            st.markdown(f"**Domanda {i+1}:** {q['domanda']}")
-            
-            if q["tipo"] == "vero_falso":
-                risposta = st.radio(
-                    "Seleziona:",
-                    ["Vero", "Falso"],
-                    key=f"cap2_q{q['id']}",
-                    horizontal=True
-                )
-                st.session_state.cap2_risposte[q['id']] = risposta == "Vero"
-                
-            elif q["tipo"] == "scelta_multipla":
-                risposta = st.radio(
-                    "Seleziona:",
-                    q["opzioni"],
-                    key=f"cap2_q{q['id']}"
-                )
-                st.session_state.cap2_risposte[q['id']] = risposta
-                
-            elif q["tipo"] == "numero":
-                risposta = st.number_input(
-                    "Inserisci il valore:",
-                    key=f"cap2_q{q['id']}",
-                    step=0.5
-                )
-                st.session_state.cap2_risposte[q['id']] = risposta
-            
-            if st.session_state.cap2_verificato:
-                user_ans = st.session_state.cap2_risposte.get(q['id'])
-                if q["tipo"] == "numero":
-                    corretto = abs(user_ans - q["risposta_corretta"]) < 0.5
-                else:
-                    corretto = user_ans == q["risposta_corretta"]
-                
-                if corretto:
-                    st.success(f"✅ Corretto! {q['spiegazione']}")
-                else:
-                    st.error(f"❌ Sbagliato. Risposta corretta: {q['risposta_corretta']}")
-                    st.info(q['spiegazione'])
-    
-    col1, col2 = st.columns(2)
-    with col1:
-        if st.button("✅ Verifica risposte", type="primary", use_container_width=True, key="cap2_verifica"):
-            st.session_state.cap2_verificato = True
-            st.rerun()
-    with col2:
-        if st.button("🔄 Ricomincia", use_container_width=True, key="cap2_reset"):
-            st.session_state.cap2_verificato = False
-            st.session_state.cap2_risposte = {}
-            st.rerun()
+    render_quiz_capitolo(CAPITOLO_NUM, INDICE_QUIZ)
 
 
+@cronometra
 def render_takeaways():
     """Renderizza i punti chiave"""
     
@@ -480,6 +406,7 @@ def render_takeaways():
         st.info("💡 Osserva come il tempo incida più del tasso stesso!")
 
 
+@cronometra
 def render():
     """Funzione principale per renderizzare il capitolo"""
     
@@ -492,21 +419,10 @@ def render():
     
     st.markdown("---")
     
-    tab1, tab2, tab3, tab4 = st.tabs([
-        "📚 Contenuto", 
-        "🧮 Calcolatori", 
-        "📝 Quiz",
-        "💡 Takeaways"
-    ])
-    
-    with tab1:
-        render_contenuto()
-    
-    with tab2:
-        render_calcolatore()
-    
-    with tab3:
-        render_quiz()
-    
-    with tab4:
-        render_takeaways()
+    # Sezioni: viene eseguita solo quella selezionata
+    render_sezioni(f"cap{CAPITOLO_NUM}", {
+        "📚 Contenuto": render_contenuto,
+        "🧮 Calcolatori": render_calcolatore,
+        "📝 Quiz": render_quiz,
+        "💡 Takeaways": render_takeaways
+    }, CHIAVI_WIDGET)
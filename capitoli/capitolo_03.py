@@ -4,12 +4,20 @@ InvestAccademy - Corso di Finanza Personale
 """
 
 import streamlit as st
-import pandas as pd
+
+from finanza.risparmio import calcola_risparmio_periodico, calcola_tempo_obiettivo, calcola_fondo_emergenze, piano_risparmio, MESI_MASSIMI
+from finanza.tempi import cronometra
+
+from .componenti import render_sezioni, segna_calcolatore, grafico_linee
+from .quiz import indicizza_quiz, chiavi_quiz, render_quiz_capitolo
 
 # Metadata
 CAPITOLO_NUM = 3
 TITOLO = "Risparmio e obiettivi finanziari"
 
+# Importo massimo accettato per un obiettivo di risparmio (€)
+OBIETTIVO_MASSIMO = 10_000_000.0
+
 OBIETTIVI = [
     "Definire obiettivi finanziari in modo chiaro e misurabile",
     "Utilizzare il metodo SMART per trasformare desideri in piani concreti",
@@ -64,45 +72,19 @@ QUIZ = [
     }
 ]
 
+# Domande indicizzate una volta sola, all'import del modulo
+INDICE_QUIZ = indicizza_quiz(QUIZ, passo=100.0, tolleranza=10.0)
 
-def calcola_risparmio_periodico(obiettivo: float, mesi: int) -> float:
-    """Calcola il risparmio mensile necessario"""
-    if mesi <= 0:
-        return 0
-    return obiettivo / mesi
-
-
-def calcola_tempo_obiettivo(obiettivo: float, risparmio_mensile: float) -> int:
-    """Calcola i mesi necessari per raggiungere l'obiettivo"""
-    if risparmio_mensile <= 0:
-        return 0
-    return int(obiettivo / risparmio_mensile)
-
-
-def calcola_fondo_emergenze(spese_mensili: float, mesi: int) -> float:
-    """Calcola l'importo del fondo emergenze"""
-    return spese_mensili * mesi
-
-
-def piano_risparmio(obiettivo: float, risparmio_mensile: float) -> list:
-    """Genera il piano di accumulo mese per mese"""
-    piano = []
-    accumulato = 0
-    mese = 0
-    while accumulato < obiettivo:
-        mese += 1
-        accumulato += risparmio_mensile
-        piano.append({
-            "mese": mese,
-            "versamento": risparmio_mensile,
-            "accumulato": min(accumulato, obiettivo),
-            "percentuale": min((accumulato / obiettivo) * 100, 100)
-        })
-        if mese > 360:  # Limite di 30 anni
-            break
-    return piano
+# Widget il cui valore va conservato cambiando sezione (esclusi i pulsanti)
+CHIAVI_WIDGET = (
+    "cap3_calcolatore", "cap3_nome_ob", "cap3_obiettivo", "cap3_modalita", "cap3_rendimento",
+    "cap3_mesi", "cap3_risparmio", "cap3_spese_ess", "cap3_stabilita", "cap3_persone",
+    "cap3_mesi_fondo", "cap3_risparmio_fondo", "cap3_reddito_503020", "cap3_bisogni_reali",
+    "cap3_desideri_reali"
+) + chiavi_quiz(CAPITOLO_NUM, INDICE_QUIZ)
 
 
+@cronometra
 def render_contenuto():
     """Renderizza il contenuto teorico"""
     
@@ -198,6 +180,7 @@ def render_contenuto():
     """)
 
 
+@cronometra
 def render_calcolatore():
     """Renderizza i calcolatori"""
     
@@ -206,9 +189,12 @@ def render_calcolatore():
     calc_type = st.radio(
         "Seleziona calcolatore:",
         ["Piano di Risparmio", "Fondo Emergenze", "Regola 50/30/20"],
-        horizontal=True
+        horizontal=True,
+        key="cap3_calcolatore"
     )
     
+    segna_calcolatore(CAPITOLO_NUM, calc_type)
+    
     st.markdown("---")
     
     if calc_type == "Piano di Risparmio":
@@ -219,6 +205,8 @@ def render_calcolatore():
         render_calc_503020()
 
 
+@st.fragment
+@cronometra
 def render_calc_piano():
     """Calcolatore piano di risparmio SMART"""
     
@@ -235,6 +223,7 @@ def render_calc_piano():
         obiettivo = st.number_input(
             "💰 Importo obiettivo (€)",
             min_value=100.0,
+            max_value=OBIETTIVO_MASSIMO,
             value=3600.0,
             step=100.0,
             key="cap3_obiettivo"
@@ -246,6 +235,16 @@ def render_calc_piano():
             key="cap3_modalita"
         )
         
+        rendimento = st.slider(
+            "📈 Rendimento annuo dei risparmi (%)",
+            min_value=0.0,
+            max_value=5.0,
+            value=0.0,
+            step=0.25,
+            help="Ad esempio un conto deposito; 0% se i risparmi restano sul conto corrente",
+            key="cap3_rendimento"
+        )
+        
         if modalita == "Calcola risparmio mensile":
             mesi = st.slider(
                 "📅 Mesi disponibili",
@@ -254,7 +253,7 @@ def render_calc_piano():
                 value=12,
                 key="cap3_mesi"
             )
-            risparmio = calcola_risparmio_periodico(obiettivo, mesi)
+            risparmio = calcola_risparmio_periodico(obiettivo, mesi, rendimento)
         else:
             risparmio = st.number_input(
                 "💵 Risparmio mensile disponibile (€)",
@@ -263,7 +262,7 @@ def render_calc_piano():
                 step=10.0,
                 key="cap3_risparmio"
             )
-            mesi = calcola_tempo_obiettivo(obiettivo, risparmio)
+            mesi = calcola_tempo_obiettivo(obiettivo, risparmio, rendimento)
     
     with col2:
         st.markdown("### Risultato")
@@ -299,13 +298,22 @@ def render_calc_piano():
         st.markdown(f"- **Temporizzato:** {mesi} mesi")
         
         # Grafico evoluzione
-        if mesi > 0 and mesi <= 120:
-            piano = piano_risparmio(obiettivo, risparmio)
-            df = pd.DataFrame(piano)
+        if mesi > 0:
+            piano = piano_risparmio(obiettivo, risparmio, rendimento)
+            if piano["oltre_limite"]:
+                st.warning(
+                    f"⚠️ Con questo risparmio servirebbero più di {MESI_MASSIMI // 12} anni: "
+                    "l'obiettivo non è raggiungibile in tempi ragionevoli."
+                )
+                return
+            if piano["interessi_totali"] > 0:
+                st.caption(f"Di cui interessi maturati: €{piano['interessi_totali']:,.2f}")
             st.markdown("#### 📈 Evoluzione accumulo")
-            st.line_chart(df.set_index("mese")["accumulato"])
+            grafico_linee(piano["evoluzione"].tabella("accumulato"))
 
 
+@st.fragment
+@cronometra
 def render_calc_fondo():
     """Calcolatore fondo emergenze"""
     
@@ -384,6 +392,8 @@ def render_calc_fondo():
             st.success(f"⏱️ Raggiungerai l'obiettivo in **{mesi_necessari} mesi**")
 
 
+@st.fragment
+@cronometra
 def render_calc_503020():
     """Calcolatore regola 50/30/20"""
     
@@ -467,70 +477,13 @@ def render_calc_503020():
             st.error("🔴 Attenzione: spese superiori alle entrate!")
 
 
+@cronometra
 def render_quiz():
     """Renderizza il quiz di verifica"""
-    
-    st.markdown("## 📝 Quiz di verifica")
-    
-    if "cap3_risposte" not in st.session_state:
-        st.session_state.cap3_risposte = {}
-    if "cap3_verificato" not in st.session_state:
-        st.session_state.cap3_verificato = False
-    
-    for i, q in enumerate(QUIZ):
-        with st.container(border=True):
-            st.markdown(f"**Domanda {i+1}:** {q['domanda']}")
-            
-            if q["tipo"] == "vero_falso":
-                risposta = st.radio(
-                    "Seleziona:",
-                    ["Vero", "Falso"],
-                    key=f"cap3_q{q['id']}",
-                    horizontal=True
-                )
-                st.session_state.cap3_risposte[q['id']] = risposta == "Vero"
-                
-            elif q["tipo"] == "scelta_multipla":
-                risposta = st.radio(
-                    "Seleziona:",
-                    q["opzioni"],
-                    key=f"cap3_q{q['id']}"
-                )
-                st.session_state.cap3_risposte[q['id']] = risposta
-                
-            elif q["tipo"] == "numero":
-                risposta = st.number_input(
-                    "Inserisci il valore:",
-                    key=f"cap3_q{q['id']}",
-                    step=100.0
-                )
-                st.session_state.cap3_risposte[q['id']] = risposta
-            
-            if st.session_state.cap3_verificato:
-                user_ans = st.session_state.cap3_risposte.get(q['id'])
-                if q["tipo"] == "numero":
-                    corretto = abs(user_ans - q["risposta_corretta"]) < 10
-                else:
-                    corretto = user_ans == q["risposta_corretta"]
-                
-                if corretto:
-                    st.success(f"✅ Corretto! {q['spiegazione']}")
-                else:
-                    st.error(f"❌ Sbagliato. Risposta corretta: {q['risposta_corretta']}")
-                    st.info(q['spiegazione'])
-    
-    col1, col2 = st.columns(2)
-    with col1:
-        if st.button("✅ Verifica risposte", type="primary", use_container_width=True, key="cap3_verifica"):
-            st.session_state.cap3_verificato = True
-            st.rerun()
-    with col2:
-        if st.button("🔄 Ricomincia", use_container_width=True, key="cap3_reset"):
-            st.session_state.cap3_verificato = False
-            st.session_state.cap3_risposte = {}
-            st.rerun()
+    render_quiz_capitolo(CAPITOLO_NUM, INDICE_QUIZ)
 
 
+@cronometra
 def render_takeaways():
     """Renderizza i punti chiave"""
     
@@ -570,6 +523,7 @@ def render_takeaways():
         """)
 
 
+@cronometra
 def render():
     """Funzione principale per renderizzare il capitolo"""
     
@@ -582,21 +536,10 @@ def render():
     
     st.markdown("---")
     
-    tab1, tab2, tab3, tab4 = st.tabs([
-        "📚 Contenuto", 
-        "🧮 Calcolatori", 
-        "📝 Quiz",
-        "💡 Takeaways"
-    ])
-    
-    with tab1:
-        render_contenuto()
-    
-    with tab2:
-        render_calcolatore()
-    
-    with tab3:
-        render_quiz()
-    
-    with tab4:
-        render_takeaways()
+    # Sezioni: viene eseguita solo quella selezionata
+    render_sezioni(f"cap{CAPITOLO_NUM}", {
+        "📚 Contenuto": render_contenuto,
+        "🧮 Calcolatori": render_calcolatore,
+        "📝 Quiz": render_quiz,
+        "💡 Takeaways": render_takeaways
+    }, CHIAVI_WIDGET)
@@ -4,7 +4,12 @@ InvestAccademy - Corso di Finanza Personale
 """
 
 import streamlit as st
-import pandas as pd
+
+from finanza.risparmio import calcola_fondo_emergenze, tempo_costruzione, piano_costruzione, MESI_MASSIMI
+from finanza.tempi import cronometra
+
+from .componenti import render_sezioni, segna_calcolatore, grafico_linee
+from .quiz import indicizza_quiz, chiavi_quiz, render_quiz_capitolo
 
 # Metadata
 CAPITOLO_NUM = 4
@@ -58,36 +63,18 @@ QUIZ = [
     }
 ]
 
+# Domande indicizzate una volta sola, all'import del modulo
+INDICE_QUIZ = indicizza_quiz(QUIZ, passo=100.0, tolleranza=10.0)
 
-def calcola_fondo_emergenze(spese_mensili: float, mesi: int) -> float:
-    """Calcola l'importo del fondo emergenze"""
-    return spese_mensili * mesi
-
-
-def tempo_costruzione(obiettivo: float, risparmio_mensile: float) -> int:
-    """Calcola i mesi necessari per costruire il fondo"""
-    if risparmio_mensile <= 0:
-        return 0
-    return int(obiettivo / risparmio_mensile) + (1 if obiettivo % risparmio_mensile > 0 else 0)
-
-
-def piano_costruzione(obiettivo: float, risparmio_mensile: float) -> list:
-    """Genera il piano di costruzione del fondo"""
-    piano = []
-    accumulato = 0
-    mese = 0
-    while accumulato < obiettivo and mese < 120:
-        mese += 1
-        accumulato = min(accumulato + risparmio_mensile, obiettivo)
-        piano.append({
-            "mese": mese,
-            "versamento": risparmio_mensile if accumulato < obiettivo else obiettivo - (accumulato - risparmio_mensile),
-            "accumulato": accumulato,
-            "copertura_mesi": accumulato / (obiettivo / 6) if obiettivo > 0 else 0  # Assumendo 6 mesi target
-        })
-    return piano
+# Widget il cui valore va conservato cambiando sezione (esclusi i pulsanti)
+CHIAVI_WIDGET = (
+    "cap4_calcolatore", "cap4_affitto", "cap4_utenze", "cap4_cibo", "cap4_trasporti", "cap4_altro",
+    "cap4_tipo_reddito", "cap4_persone", "cap4_altre_entrate", "cap4_fondo_attuale", "cap4_risparmio",
+    "cap4_sim_spese", "cap4_sim_fondo", "cap4_scenario"
+) + chiavi_quiz(CAPITOLO_NUM, INDICE_QUIZ)
 
 
+@cronometra
 def render_contenuto():
     """Renderizza il contenuto teorico"""
     
@@ -300,6 +287,7 @@ def render_contenuto():
     """)
 
 
+@cronometra
 def render_calcolatore():
     """Renderizza il calcolatore del fondo emergenze"""
     
@@ -308,9 +296,12 @@ def render_calcolatore():
     calc_type = st.radio(
         "Seleziona:",
         ["Calcola il tuo fondo", "Simula scenario emergenza"],
-        horizontal=True
+        horizontal=True,
+        key="cap4_calcolatore"
     )
     
+    segna_calcolatore(CAPITOLO_NUM, calc_type)
+    
     st.markdown("---")
     
     if calc_type == "Calcola il tuo fondo":
@@ -319,6 +310,8 @@ def render_calcolatore():
         render_calc_scenario()
 
 
+@st.fragment
+@cronometra
 def render_calc_fondo():
     """Calcolatore dimensionamento fondo"""
     
@@ -426,6 +419,13 @@ def render_calc_fondo():
             progresso = (fondo_attuale / fondo_consigliato) * 100 if fondo_consigliato > 0 else 0
             st.progress(min(progresso / 100, 1.0))
             st.caption(f"Progresso: {progresso:.1f}%")
+            
+            piano = piano_costruzione(fondo_consigliato, risparmio_mensile, capitale_iniziale=fondo_attuale,
+                                      mesi_copertura=mesi)
+            if piano["oltre_limite"]:
+                st.warning(f"⚠️ Con questo ritmo servirebbero più di {MESI_MASSIMI // 12} anni: prova ad accantonare di più.")
+            else:
+                grafico_linee(piano["evoluzione"].tabella("accumulato", nomi={"mese": "Mese", "accumulato": "Fondo accumulato (€)"}))
         elif mancante <= 0:
             st.success("🎉 Hai già raggiunto l'obiettivo!")
             st.balloons()
@@ -433,6 +433,8 @@ def render_calc_fondo():
             st.warning("Inserisci un importo di risparmio mensile per vedere il piano")
 
 
+@st.fragment
+@cronometra
 def render_calc_scenario():
     """Simulatore scenario di emergenza"""
     
@@ -541,70 +543,13 @@ def render_calc_scenario():
             st.success("Ottimo livello di protezione! Mantienilo e ricostruiscilo dopo ogni uso")
 
 
+@cronometra
 def render_quiz():
     """Renderizza il quiz di verifica"""
-    
-    st.markdown("## 📝 Quiz di verifica")
-    
-    if "cap4_risposte" not in st.session_state:
-        st.session_state.cap4_risposte = {}
-    if "cap4_verificato" not in st.session_state:
-        st.session_state.cap4_verificato = False
-    
-    for i, q in enumerate(QUIZ):
-        with st.container(border=True):
-            st.markdown(f"**Domanda {i+1}:** {q['domanda']}")
-            
-            if q["tipo"] == "vero_falso":
-                risposta = st.radio(
-                    "Seleziona:",
-                    ["Vero", "Falso"],
-                    key=f"cap4_q{q['id']}",
-                    horizontal=True
-                )
-                st.session_state.cap4_risposte[q['id']] = risposta == "Vero"
-                
-            elif q["tipo"] == "scelta_multipla":
-                risposta = st.radio(
-                    "Seleziona:",
-                    q["opzioni"],
-                    key=f"cap4_q{q['id']}"
-                )
-                st.session_state.cap4_risposte[q['id']] = risposta
-                
-            elif q["tipo"] == "numero":
-                risposta = st.number_input(
-                    "Inserisci il valore:",
-                    key=f"cap4_q{q['id']}",
-                    step=100.0
-                )
-                st.session_state.cap4_risposte[q['id']] = risposta
-            
-            if st.session_state.cap4_verificato:
-                user_ans = st.session_state.cap4_risposte.get(q['id'])
-                if q["tipo"] == "numero":
-                    corretto = abs(user_ans - q["risposta_corretta"]) < 10
-                else:
-                    corretto = user_ans == q["risposta_corretta"]
-                
-                if corretto:
-                    st.success(f"✅ Corretto! {q['spiegazione']}")
-                else:
-                    st.error(f"❌ Sbagliato. Risposta corretta: {q['risposta_corretta']}")
-                    st.info(q['spiegazione'])
-    
-    col1, col2 = st.columns(2)
-    with col1:
-        if st.button("✅ Verifica risposte", type="primary", use_container_width=True, key="cap4_verifica"):
-            st.session_state.cap4_verificato = True
-            st.rerun()
-    with col2:
-        if st.button("🔄 Ricomincia", use_container_width=True, key="cap4_reset"):
-            st.session_state.cap4_verificato = False
-            st.session_state.cap4_risposte = {}
-            st.rerun()
+    render_quiz_capitolo(CAPITOLO_NUM, INDICE_QUIZ)
 
 
+@cronometra
 def render_takeaways():
     """Renderizza i punti chiave"""
     
@@ -669,6 +614,7 @@ def render_takeaways():
         """)
 
 
+@cronometra
 def render():
     """Funzione principale per renderizzare il capitolo"""
     
@@ -681,21 +627,10 @@ def render():
     
     st.markdown("---")
     
-    tab1, tab2, tab3, tab4 = st.tabs([
-        "📚 Contenuto", 
-        "🧮 Calcolatore", 
-        "📝 Quiz",
-        "💡 Takeaways"
-    ])
-    
-    with tab1:
-        render_contenuto()
-    
-    with tab2:
-        render_calcolatore()
-    
-    with tab3:
-        render_quiz()
-    
-    with tab4:
-        render_takeaways()
+    # Sezioni: viene eseguita solo quella selezionata
+    render_sezioni(f"cap{CAPITOLO_NUM}", {
+        "📚 Contenuto": render_contenuto,
+        "🧮 Calcolatore": render_calcolatore,
+        "📝 Quiz": render_quiz,
+        "💡 Takeaways": render_takeaways
+    }, CHIAVI_WIDGET)
@@ -6,6 +6,12 @@ InvestAccademy - Corso di Finanza Personale
 import streamlit as st
 import pandas as pd
 
+from finanza.conti import calcola_costi_annui
+from finanza.tempi import cronometra
+
+from .componenti import render_sezioni, segna_calcolatore
+from .quiz import indicizza_quiz, chiavi_quiz, render_quiz_capitolo
+
 # Metadata
 CAPITOLO_NUM = 5
 TITOLO = "Scelta del conto e struttura dei conti personali"
@@ -75,25 +81,18 @@ QUIZ = [
     }
 ]
 
+# Domande indicizzate una volta sola, all'import del modulo
+INDICE_QUIZ = indicizza_quiz(QUIZ)
 
-def calcola_costi_annui(canone_mensile: float, commissioni_bonifici: float, num_bonifici: int, 
-                         costo_prelievi: float, num_prelievi: int) -> dict:
-    """Calcola i costi totali annui di un conto"""
-    
-    costo_canone = canone_mensile * 12
-    costo_bonifici_tot = commissioni_bonifici * num_bonifici
-    costo_prelievi_tot = costo_prelievi * num_prelievi
-    
-    totale = costo_canone + costo_bonifici_tot + costo_prelievi_tot
-    
-    return {
-        "canone": costo_canone,
-        "bonifici": costo_bonifici_tot,
-        "prelievi": costo_prelievi_tot,
-        "totale": totale
-    }
+# Widget il cui valore va conservato cambiando sezione (esclusi i pulsanti)
+CHIAVI_WIDGET = (
+    "cap5_calcolatore", "cap5_canone_a", "cap5_bonif_a", "cap5_num_bonif", "cap5_prel_a",
+    "cap5_num_prel", "cap5_canone_b", "cap5_bonif_b", "cap5_prel_b", "cap5_redd_strutt",
+    "cap5_perc_emerg", "cap5_perc_obiett", "cap5_perc_invest"
+) + chiavi_quiz(CAPITOLO_NUM, INDICE_QUIZ)
 
 
+@cronometra
 def render_contenuto():
     """Renderizza il contenuto teorico"""
     
@@ -280,6 +279,7 @@ def render_contenuto():
     """)
 
 
+@cronometra
 def render_calcolatore():
     """Renderizza i calcolatori"""
     
@@ -288,9 +288,12 @@ def render_calcolatore():
     calc_type = st.radio(
         "Seleziona calcolatore:",
         ["Confronto Costi Conti", "Progetta la tua struttura"],
-        horizontal=True
+        horizontal=True,
+        key="cap5_calcolatore"
     )
     
+    segna_calcolatore(CAPITOLO_NUM, calc_type)
+    
     st.markdown("---")
     
     if calc_type == "Confronto Costi Conti":
@@ -299,6 +302,8 @@ def render_calcolatore():
         render_calc_struttura()
 
 
+@st.fragment
+@cronometra
 def render_calc_costi():
     """Calcolatore confronto costi conti"""
     
@@ -426,6 +431,8 @@ def render_calc_costi():
     st.bar_chart(chart_data.set_index("Voce"))
 
 
+@st.fragment
+@cronometra
 def render_calc_struttura():
     """Designer struttura conti personale"""
     
@@ -528,59 +535,13 @@ def render_calc_struttura():
             st.warning(f"⚠️ Solo {perc_risparmiata:.1f}% allocato. Prova ad aumentare.")
 
 
+@cronometra
 def render_quiz():
     """Renderizza il quiz di verifica"""
-    
-    st.markdown("## 📝 Quiz di verifica")
-    
-    if "cap5_risposte" not in st.session_state:
-        st.session_state.cap5_risposte = {}
-    if "cap5_verificato" not in st.session_state:
-        st.session_state.cap5_verificato = False
-    
-    for i, q in enumerate(QUIZ):
-        with st.container(border=True):
-            st.markdown(f"**Domanda {i+1}:** {q['domanda']}")
-            
-            if q["tipo"] == "vero_falso":
-                risposta = st.radio(
-                    "Seleziona:",
-                    ["Vero", "Falso"],
-                    key=f"cap5_q{q['id']}",
-                    horizontal=True
-                )
-                st.session_state.cap5_risposte[q['id']] = risposta == "Vero"
-                
-            elif q["tipo"] == "scelta_multipla":
-                risposta = st.radio(
-                    "Seleziona:",
-                    q["opzioni"],
-                    key=f"cap5_q{q['id']}"
-                )
-                st.session_state.cap5_risposte[q['id']] = risposta
-            
-            if st.session_state.cap5_verificato:
-                user_ans = st.session_state.cap5_risposte.get(q['id'])
-                corretto = user_ans == q["risposta_corretta"]
-                
-                if corretto:
-                    st.success(f"✅ Corretto! {q['spiegazione']}")
-                else:
-                    st.error(f"❌ Sbagliato. Risposta corretta: {q['risposta_corretta']}")
-                    st.info(q['spiegazione'])
-    
-    col1, col2 = st.columns(2)
-    with col1:
-        if st.button("✅ Verifica risposte", type="primary", use_container_width=True, key="cap5_verifica"):
-            st.session_state.cap5_verificato = True
-            st.rerun()
-    with col2:
-        if st.button("🔄 Ricomincia", use_container_width=True, key="cap5_reset"):
-            st.session_state.cap5_verificato = False
-            st.session_state.cap5_risposte = {}
-            st.rerun()
+    render_quiz_capitolo(CAPITOLO_NUM, INDICE_QUIZ)
 
 
+@cronometra
 def render_takeaways():
     """Renderizza i punti chiave"""
     
@@ -625,6 +586,7 @@ def render_takeaways():
         """)
 
 
+@cronometra
 def render():
     """Funzione principale per renderizzare il capitolo"""
     
@@ -637,21 +599,10 @@ def render():
     
     st.markdown("---")
     
-    tab1, tab2, tab3, tab4 = st.tabs([
-        "📚 Contenuto", 
-        "🧮 Calcolatori", 
-        "📝 Quiz",
-        "💡 Takeaways"
-    ])
-    
-    with tab1:
-        render_contenuto()
-    
-    with tab2:
-        render_calcolatore()
-    
-    with tab3:
-        render_quiz()
-    
-    with tab4:
-        render_takeaways()
+    # Sezioni: viene eseguita solo quella selezionata
+    render_sezioni(f"cap{CAPITOLO_NUM}", {
+        "📚 Contenuto": render_contenuto,
+        "🧮 Calcolatori": render_calcolatore,
+        "📝 Quiz": render_quiz,
+        "💡 Takeaways": render_takeaways
+    }, CHIAVI_WIDGET)
@@ -5,6 +5,13 @@ InvestAccademy - Corso di Finanza Personale
 
 import streamlit as st
 import pandas as pd
+import numpy as np
+
+from finanza.debito import calcola_interessi_totali, confronta_strategie
+from finanza.tempi import cronometra
+
+from .componenti import render_sezioni, segna_calcolatore, grafico_linee
+from .quiz import indicizza_quiz, chiavi_quiz, render_quiz_capitolo
 
 # Metadata
 CAPITOLO_NUM = 6
@@ -70,71 +77,19 @@ QUIZ = [
     }
 ]
 
+# Domande indicizzate una volta sola, all'import del modulo
+INDICE_QUIZ = indicizza_quiz(QUIZ)
 
-def calcola_interessi_totali(saldo: float, tasso: float, rata_mensile: float) -> dict:
-    """Calcola il piano di ammortamento di un debito"""
-    
-    if rata_mensile <= 0 or saldo <= 0:
-        return {"mesi": 0, "interessi_totali": 0, "costo_totale": saldo}
-    
-    tasso_mensile = tasso / 100 / 12
-    
-    # Verifica che la rata sia sufficiente a coprire gli interessi
-    interesse_minimo = saldo * tasso_mensile
-    if rata_mensile <= interesse_minimo:
-        return {"mesi": 999, "interessi_totali": 999999, "costo_totale": 999999}
-    
-    saldo_residuo = saldo
-    mesi = 0
-    interessi_totali = 0
-    piano = []
-    
-    while saldo_residuo > 0 and mesi < 600:  # Max 50 anni
-        interesse_mese = saldo_residuo * tasso_mensile
-        quota_capitale = min(rata_mensile - interesse_mese, saldo_residuo)
-        
-        if quota_capitale <= 0:
-            break
-        
-        saldo_residuo -= quota_capitale
-        interessi_totali += interesse_mese
-        mesi += 1
-        
-        piano.append({
-            "mese": mesi,
-            "saldo_iniziale": saldo_residuo + quota_capitale,
-            "interesse": interesse_mese,
-            "quota_capitale": quota_capitale,
-            "rata": min(rata_mensile, interesse_mese + quota_capitale),
-            "saldo_finale": saldo_residuo
-        })
-        
-        if saldo_residuo < 0.01:  # Tolleranza
-            break
-    
-    return {
-        "mesi": mesi,
-        "interessi_totali": interessi_totali,
-        "costo_totale": saldo + interessi_totali,
-        "piano": piano
-    }
-
-
-def confronta_strategie(debiti: list, risorse_extra: float) -> dict:
-    """Confronta le strategie Snowball e Avalanche"""
-    
-    # Snowball: ordina per saldo crescente
-    debiti_snowball = sorted(debiti, key=lambda x: x['saldo'])
-    
-    # Avalanche: ordina per tasso decrescente
-    debiti_avalanche = sorted(debiti, key=lambda x: x['tasso'], reverse=True)
-    
-    return {
-        "snowball": debiti_snowball,
-        "avalanche": debiti_avalanche
-    }
+# Widget il cui valore va conservato cambiando sezione (esclusi i pulsanti)
+CHIAVI_WIDGET = (
+    "cap6_calcolatore", "cap6_saldo", "cap6_tasso", "cap6_rata", "cap6_aumento", "cap6_nome_*",
+    "cap6_sal_*", "cap6_tas_*", "cap6_rat_*", "cap6_extra", "cap6_cons_d1s", "cap6_cons_d1t",
+    "cap6_cons_d1r", "cap6_cons_d2s", "cap6_cons_d2t", "cap6_cons_d2r", "cap6_cons_nt", "cap6_cons_nr",
+    "cap6_cons_sp"
+) + chiavi_quiz(CAPITOLO_NUM, INDICE_QUIZ)
 
 
+@cronometra
 def render_contenuto():
     """Renderizza il contenuto teorico"""
     
@@ -300,6 +255,7 @@ def render_contenuto():
     st.warning("⚠️ La disciplina è parte integrante della strategia.")
 
 
+@cronometra
 def render_calcolatore():
     """Renderizza i calcolatori"""
     
@@ -308,9 +264,12 @@ def render_calcolatore():
     calc_type = st.radio(
         "Seleziona calcolatore:",
         ["Piano di rimborso", "Confronto Snowball vs Avalanche", "Simulatore consolidamento"],
-        horizontal=True
+        horizontal=True,
+        key="cap6_calcolatore"
     )
     
+    segna_calcolatore(CAPITOLO_NUM, calc_type)
+    
     st.markdown("---")
     
     if calc_type == "Piano di rimborso":
@@ -321,6 +280,8 @@ def render_calcolatore():
         render_calc_consolidamento()
 
 
+@st.fragment
+@cronometra
 def render_calc_piano():
     """Calcolatore piano di rimborso"""
     
@@ -419,6 +380,8 @@ def render_calc_piano():
                     st.metric("Interessi risparmiati", f"€{risparmio_interessi:,.2f}", delta=f"-€{risparmio_interessi:,.2f}")
 
 
+@st.fragment
+@cronometra
 def render_calc_strategie():
     """Confronto strategie Snowball vs Avalanche"""
     
@@ -488,6 +451,35 @@ def render_calc_strategie():
     
     st.markdown("---")
     
+    st.markdown("### 📊 Simulazione del rimborso")
+    
+    snowball = strategie['simulazione']['snowball']
+    avalanche = strategie['simulazione']['avalanche']
+    
+    if np.isinf(snowball['mesi']) or np.isinf(avalanche['mesi']):
+        st.error("❌ Con queste rate i debiti non si estinguono entro 50 anni: aumenta le risorse mensili.")
+    else:
+        col1, col2, col3 = st.columns(3)
+        
+        with col1:
+            st.metric("Snowball: libero dai debiti in", f"{int(snowball['mesi'])} mesi")
+            st.metric("Interessi Snowball", f"€{snowball['interessi_totali']:,.2f}")
+        with col2:
+            st.metric("Avalanche: libero dai debiti in", f"{int(avalanche['mesi'])} mesi")
+            st.metric("Interessi Avalanche", f"€{avalanche['interessi_totali']:,.2f}")
+        with col3:
+            risparmio = snowball['interessi_totali'] - avalanche['interessi_totali']
+            st.metric("Risparmio con Avalanche", f"€{risparmio:,.2f}")
+        
+        mesi_grafico = max(len(snowball['debito_residuo']), len(avalanche['debito_residuo']))
+        df_residuo = pd.DataFrame({
+            "Snowball": np.pad(snowball['debito_residuo'], (0, mesi_grafico - len(snowball['debito_residuo']))),
+            "Avalanche": np.pad(avalanche['debito_residuo'], (0, mesi_grafico - len(avalanche['debito_residuo'])))
+        }, index=pd.Index(np.arange(1, mesi_grafico + 1), name="Mese"))
+        
+        st.markdown("#### 📉 Debito residuo nel tempo")
+        grafico_linee(df_residuo)
+    
     st.info("""
     💡 **Quale scegliere?**
     
@@ -499,6 +491,8 @@ def render_calc_strategie():
     """)
 
 
+@st.fragment
+@cronometra
 def render_calc_consolidamento():
     """Simulatore consolidamento debiti"""
     
@@ -552,6 +546,10 @@ def render_calc_consolidamento():
     
     st.markdown("---")
     
+    if not (risultato1['sostenibile'] and risultato2['sostenibile'] and nuovo_risultato['sostenibile']):
+        st.error("❌ Almeno una rata non copre gli interessi mensili: quel debito non si estinguerebbe mai.")
+        return
+    
     st.markdown("### 📊 Confronto")
     
     risparmio_interessi = interessi_attuali - nuovo_risultato['interessi_totali']
@@ -593,59 +591,13 @@ def render_calc_consolidamento():
         st.error("❌ Il consolidamento non conviene. Costeresti di più in interessi.")
 
 
+@cronometra
 def render_quiz():
     """Renderizza il quiz di verifica"""
-    
-    st.markdown("## 📝 Quiz di verifica")
-    
-    if "cap6_risposte" not in st.session_state:
-        st.session_state.cap6_risposte = {}
-    if "cap6_verificato" not in st.session_state:
-        st.session_state.cap6_verificato = False
-    
-    for i, q in enumerate(QUIZ):
-        with st.container(border=True):
-            st.markdown(f"**Domanda {i+1}:** {q['domanda']}")
-            
-            if q["tipo"] == "vero_falso":
-                risposta = st.radio(
-                    "Seleziona:",
-                    ["Vero", "Falso"],
-                    key=f"cap6_q{q['id']}",
-                    horizontal=True
-                )
-                st.session_state.cap6_risposte[q['id']] = risposta == "Vero"
-                
-            elif q["tipo"] == "scelta_multipla":
-                risposta = st.radio(
-                    "Seleziona:",
-                    q["opzioni"],
-                    key=f"cap6_q{q['id']}"
-                )
-                st.session_state.cap6_risposte[q['id']] = risposta
-            
-            if st.session_state.cap6_verificato:
-                user_ans = st.session_state.cap6_risposte.get(q['id'])
-                corretto = user_ans == q["risposta_corretta"]
-                
-                if corretto:
-                    st.success(f"✅ Corretto! {q['spiegazione']}")
-                else:
-                    st.error(f"❌ Sbagliato. Risposta corretta: {q['risposta_corretta']}")
-                    st.info(q['spiegazione'])
-    
-    col1, col2 = st.columns(2)
-    with col1:
-        if st.button("✅ Verifica risposte", type="primary", use_container_width=True, key="cap6_verifica"):
-            st.session_state.cap6_verificato = True
-            st.rerun()
-    with col2:
-        if st.button("🔄 Ricomincia", use_container_width=True, key="cap6_reset"):
-            st.session_state.cap6_verificato = False
-            st.session_state.cap6_risposte = {}
-            st.rerun()
+    render_quiz_capitolo(CAPITOLO_NUM, INDICE_QUIZ)
 
 
+@cronometra
 def render_takeaways():
     """Renderizza i punti chiave"""
     
@@ -691,6 +643,7 @@ def render_takeaways():
         """)
 
 
+@cronometra
 def render():
     """Funzione principale per renderizzare il capitolo"""
     
@@ -703,21 +656,10 @@ def render():
     
     st.markdown("---")
     
-    tab1, tab2, tab3, tab4 = st.tabs([
-        "📚 Contenuto", 
-        "🧮 Calcolatori", 
-        "📝 Quiz",
-        "💡 Takeaways"
-    ])
-    
-    with tab1:
-        render_contenuto()
-    
-    with tab2:
-        render_calcolatore()
-    
-    with tab3:
-        render_quiz()
-    
-    with tab4:
-        render_takeaways()
+    # Sezioni: viene eseguita solo quella selezionata
+    render_sezioni(f"cap{CAPITOLO_NUM}", {
+        "📚 Contenuto": render_contenuto,
+        "🧮 Calcolatori": render_calcolatore,
+        "📝 Quiz": render_quiz,
+        "💡 Takeaways": render_takeaways
+    }, CHIAVI_WIDGET)
@@ -6,6 +6,12 @@ InvestAccademy - Corso di Finanza Personale
 import streamlit as st
 import pandas as pd
 
+from finanza.credito import calcola_utilizzo_credito, valuta_utilizzo, simula_riduzione_saldo
+from finanza.tempi import cronometra
+
+from .componenti import render_sezioni, segna_calcolatore
+from .quiz import indicizza_quiz, chiavi_quiz, render_quiz_capitolo
+
 # Metadata
 CAPITOLO_NUM = 7
 TITOLO = "Credito e punteggio creditizio"
@@ -64,61 +70,17 @@ QUIZ = [
     }
 ]
 
+# Domande indicizzate una volta sola, all'import del modulo
+INDICE_QUIZ = indicizza_quiz(QUIZ, passo=1.0, tolleranza=5.0)
 
-def calcola_utilizzo_credito(saldo: float, limite: float) -> float:
-    """Calcola la percentuale di utilizzo del credito"""
-    if limite <= 0:
-        return 0
-    return (saldo / limite) * 100
-
-
-def valuta_utilizzo(utilizzo: float) -> dict:
-    """Valuta il livello di utilizzo del credito"""
-    if utilizzo < 30:
-        return {
-            "livello": "Ottimale",
-            "colore": "🟢",
-            "descrizione": "Eccellente! Stai usando meno del 30% del credito disponibile.",
-            "impatto": "Positivo sul punteggio creditizio"
-        }
-    elif utilizzo < 50:
-        return {
-            "livello": "Attenzione",
-            "colore": "🟡",
-            "descrizione": "Utilizzo moderato. Considera di ridurre il saldo.",
-            "impatto": "Impatto neutro o lievemente negativo"
-        }
-    elif utilizzo < 70:
-        return {
-            "livello": "Alto",
-            "colore": "🟠",
-            "descrizione": "Utilizzo elevato. Riduci il saldo quando possibile.",
-            "impatto": "Impatto negativo sul punteggio"
-        }
-    else:
-        return {
-            "livello": "Critico",
-            "colore": "🔴",
-            "descrizione": "Utilizzo molto elevato. Priorità: ridurre i saldi.",
-            "impatto": "Forte impatto negativo sul punteggio"
-        }
-
-
-def simula_riduzione_saldo(saldo_attuale: float, limite: float, riduzione: float) -> dict:
-    """Simula l'effetto della riduzione del saldo"""
-    nuovo_saldo = max(0, saldo_attuale - riduzione)
-    utilizzo_attuale = calcola_utilizzo_credito(saldo_attuale, limite)
-    utilizzo_nuovo = calcola_utilizzo_credito(nuovo_saldo, limite)
-    
-    return {
-        "saldo_attuale": saldo_attuale,
-        "saldo_nuovo": nuovo_saldo,
-        "utilizzo_attuale": utilizzo_attuale,
-        "utilizzo_nuovo": utilizzo_nuovo,
-        "miglioramento": utilizzo_attuale - utilizzo_nuovo
-    }
+# Widget il cui valore va conservato cambiando sezione (esclusi i pulsanti)
+CHIAVI_WIDGET = (
+    "cap7_calcolatore", "cap7_saldo", "cap7_limite", "cap7_sim_saldo", "cap7_sim_limite",
+    "cap7_sim_riduzione", "cap7_mc_nome_*", "cap7_mc_saldo_*", "cap7_mc_limite_*"
+) + chiavi_quiz(CAPITOLO_NUM, INDICE_QUIZ)
 
 
+@cronometra
 def render_contenuto():
     """Renderizza il contenuto teorico"""
     
@@ -276,6 +238,7 @@ def render_contenuto():
     st.warning("Prima di chiudere una linea di credito, valuta l'impatto complessivo sul tuo profilo.")
 
 
+@cronometra
 def render_calcolatore():
     """Renderizza i calcolatori"""
     
@@ -284,9 +247,12 @@ def render_calcolatore():
     calc_type = st.radio(
         "Seleziona calcolatore:",
         ["Utilizzo del credito", "Simulatore riduzione saldo", "Analisi multi-carta"],
-        horizontal=True
+        horizontal=True,
+        key="cap7_calcolatore"
     )
     
+    segna_calcolatore(CAPITOLO_NUM, calc_type)
+    
     st.markdown("---")
     
     if calc_type == "Utilizzo del credito":
@@ -297,6 +263,8 @@ def render_calcolatore():
         render_calc_multicarta()
 
 
+@st.fragment
+@cronometra
 def render_calc_utilizzo():
     """Calcolatore utilizzo del credito"""
     
@@ -362,6 +330,8 @@ def render_calc_utilizzo():
         st.error(f"🔴 Priorità: ridurre il saldo di almeno €{riduzione_target:.2f} per scendere sotto il 30%")
 
 
+@st.fragment
+@cronometra
 def render_calc_simulatore():
     """Simulatore riduzione saldo"""
     
@@ -432,6 +402,8 @@ def render_calc_simulatore():
             st.info(f"📊 Miglioramento moderato: -{simulazione['miglioramento']:.1f}%")
 
 
+@st.fragment
+@cronometra
 def render_calc_multicarta():
     """Analizzatore utilizzo multi-carta"""
     
@@ -522,70 +494,13 @@ def render_calc_multicarta():
         st.warning(f"💡 Suggerimento: concentrati prima sulla riduzione di '{carta_prioritaria['nome']}'")
 
 
+@cronometra
 def render_quiz():
     """Renderizza il quiz di verifica"""
-    
-    st.markdown("## 📝 Quiz di verifica")
-    
-    if "cap7_risposte" not in st.session_state:
-        st.session_state.cap7_risposte = {}
-    if "cap7_verificato" not in st.session_state:
-        st.session_state.cap7_verificato = False
-    
-    for i, q in enumerate(QUIZ):
-        with st.container(border=True):
-            st.markdown(f"**Domanda {i+1}:** {q['domanda']}")
-            
-            if q["tipo"] == "vero_falso":
-                risposta = st.radio(
-                    "Seleziona:",
-                    ["Vero", "Falso"],
-                    key=f"cap7_q{q['id']}",
-                    horizontal=True
-                )
-                st.session_state.cap7_risposte[q['id']] = risposta == "Vero"
-                
-            elif q["tipo"] == "scelta_multipla":
-                risposta = st.radio(
-                    "Seleziona:",
-                    q["opzioni"],
-                    key=f"cap7_q{q['id']}"
-                )
-                st.session_state.cap7_risposte[q['id']] = risposta
-                
-            elif q["tipo"] == "numero":
-                risposta = st.number_input(
-                    "Inserisci il valore:",
-                    key=f"cap7_q{q['id']}",
-                    step=1.0
-                )
-                st.session_state.cap7_risposte[q['id']] = risposta
-            
-            if st.session_state.cap7_verificato:
-                user_ans = st.session_state.cap7_risposte.get(q['id'])
-                if q["tipo"] == "numero":
-                    corretto = abs(user_ans - q["risposta_corretta"]) < 5
-                else:
-                    corretto = user_ans == q["risposta_corretta"]
-                
-                if corretto:
-                    st.success(f"✅ Corretto! {q['spiegazione']}")
-                else:
-                    st.error(f"❌ Sbagliato. Risposta corretta: {q['risposta_corretta']}")
-                    st.info(q['spiegazione'])
-    
-    col1, col2 = st.columns(2)
-    with col1:
-        if st.button("✅ Verifica risposte", type="primary", use_container_width=True, key="cap7_verifica"):
-            st.session_state.cap7_verificato = True
-            st.rerun()
-    with col2:
-        if st.button("🔄 Ricomincia", use_container_width=True, key="cap7_reset"):
-            st.session_state.cap7_verificato = False
-            st.session_state.cap7_risposte = {}
-            st.rerun()
+    render_quiz_capitolo(CAPITOLO_NUM, INDICE_QUIZ)
 
 
+@cronometra
 def render_takeaways():
     """Renderizza i punti chiave"""
     
@@ -633,6 +548,7 @@ def render_takeaways():
         """)
 
 
+@cronometra
 def render():
     """Funzione principale per renderizzare il capitolo"""
     
@@ -645,21 +561,10 @@ def render():
     
     st.markdown("---")
     
-    tab1, tab2, tab3, tab4 = st.tabs([
-        "📚 Contenuto", 
-        "🧮 Calcolatori", 
-        "📝 Quiz",
-        "💡 Takeaways"
-    ])
-    
-    with tab1:
-        render_contenuto()
-    
-    with tab2:
-        render_calcolatore()
-    
-    with tab3:
-        render_quiz()
-    
-    with tab4:
-        render_takeaways()
+    # Sezioni: viene eseguita solo quella selezionata
+    render_sezioni(f"cap{CAPITOLO_NUM}", {
+        "📚 Contenuto": render_contenuto,
+        "🧮 Calcolatori": render_calcolatore,
+        "📝 Quiz": render_quiz,
+        "💡 Takeaways": render_takeaways
+    }, CHIAVI_WIDGET)
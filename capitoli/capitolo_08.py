@@ -6,6 +6,12 @@ InvestAccademy - Corso di Finanza Personale
 import streamlit as st
 import pandas as pd
 
+from finanza.investimenti import simula_crescita_investimento, confronta_asset_class, calcola_impatto_inflazione
+from finanza.tempi import cronometra
+
+from .componenti import render_sezioni, segna_calcolatore, grafico_linee
+from .quiz import indicizza_quiz, chiavi_quiz, render_quiz_capitolo
+
 # Metadata
 CAPITOLO_NUM = 8
 TITOLO = "Introduzione agli investimenti"
@@ -70,65 +76,17 @@ QUIZ = [
     }
 ]
 
+# Domande indicizzate una volta sola, all'import del modulo
+INDICE_QUIZ = indicizza_quiz(QUIZ)
 
-def simula_crescita_investimento(capitale: float, tasso: float, anni: int) -> list:
-    """Simula la crescita di un investimento nel tempo"""
-    evoluzione = []
-    cap = capitale
-    
-    for anno in range(1, anni + 1):
-        guadagno = cap * (tasso / 100)
-        cap = cap + guadagno
-        evoluzione.append({
-            "anno": anno,
-            "capitale": round(cap, 2),
-            "guadagno_anno": round(guadagno, 2),
-            "guadagno_totale": round(cap - capitale, 2)
-        })
-    
-    return evoluzione
-
-
-def confronta_asset_class(capitale: float, anni: int) -> dict:
-    """Confronta performance di diverse asset class con tassi storici medi"""
-    
-    # Tassi storici approssimativi (solo esempio educativo)
-    tassi = {
-        "Liquidità": 1.0,
-        "Obbligazioni": 3.5,
-        "Azioni": 8.0
-    }
-    
-    risultati = {}
-    
-    for asset, tasso in tassi.items():
-        montante = capitale * ((1 + tasso / 100) ** anni)
-        risultati[asset] = {
-            "tasso": tasso,
-            "montante": montante,
-            "guadagno": montante - capitale
-        }
-    
-    return risultati
-
-
-def calcola_impatto_inflazione(capitale: float, rendimento: float, inflazione: float, anni: int) -> dict:
-    """Calcola l'impatto dell'inflazione sul rendimento"""
-    
-    rendimento_reale = rendimento - inflazione
-    
-    montante_nominale = capitale * ((1 + rendimento / 100) ** anni)
-    montante_reale = capitale * ((1 + rendimento_reale / 100) ** anni)
-    
-    return {
-        "rendimento_nominale": rendimento,
-        "rendimento_reale": rendimento_reale,
-        "montante_nominale": montante_nominale,
-        "montante_reale": montante_reale,
-        "perdita_inflazione": montante_nominale - montante_reale
-    }
+# Widget il cui valore va conservato cambiando sezione (esclusi i pulsanti)
+CHIAVI_WIDGET = (
+    "cap8_calcolatore", "cap8_capitale", "cap8_tasso", "cap8_anni", "cap8_conf_capitale",
+    "cap8_conf_anni", "cap8_infl_capitale", "cap8_infl_rend", "cap8_infl_inf", "cap8_infl_anni"
+) + chiavi_quiz(CAPITOLO_NUM, INDICE_QUIZ)
 
 
+@cronometra
 def render_contenuto():
     """Renderizza il contenuto teorico"""
     
@@ -372,6 +330,7 @@ def render_contenuto():
     st.warning("⚠️ La maggior parte degli errori è **comportamentale**, non tecnica.")
 
 
+@cronometra
 def render_calcolatore():
     """Renderizza i calcolatori"""
     
@@ -380,9 +339,12 @@ def render_calcolatore():
     calc_type = st.radio(
         "Seleziona calcolatore:",
         ["Crescita investimento", "Confronto asset class", "Impatto inflazione"],
-        horizontal=True
+        horizontal=True,
+        key="cap8_calcolatore"
     )
     
+    segna_calcolatore(CAPITOLO_NUM, calc_type)
+    
     st.markdown("---")
     
     if calc_type == "Crescita investimento":
@@ -393,6 +355,8 @@ def render_calcolatore():
         render_calc_inflazione()
 
 
+@st.fragment
+@cronometra
 def render_calc_crescita():
     """Calcolatore crescita investimento nel tempo"""
     
@@ -428,8 +392,8 @@ def render_calc_crescita():
     
     with col2:
         evoluzione = simula_crescita_investimento(capitale, tasso, anni)
-        montante_finale = evoluzione[-1]["capitale"]
-        guadagno_totale = evoluzione[-1]["guadagno_totale"]
+        montante_finale = evoluzione["capitale"][-1]
+        guadagno_totale = evoluzione["guadagno_totale"][-1]
         
         st.markdown("### Risultato")
         
@@ -453,26 +417,25 @@ def render_calc_crescita():
     st.markdown("---")
     st.markdown("### 📈 Evoluzione nel tempo")
     
-    df_evoluzione = pd.DataFrame(evoluzione)
-    st.line_chart(df_evoluzione.set_index("anno")["capitale"])
+    df_evoluzione = evoluzione.tabella()
+    grafico_linee(df_evoluzione["capitale"])
     
     # Tabella dettagliata (solo primi e ultimi anni se troppo lunga)
     if anni <= 10:
-        st.dataframe(
-            df_evoluzione[["anno", "capitale", "guadagno_anno", "guadagno_totale"]],
-            use_container_width=True,
-            hide_index=True
-        )
+        st.dataframe(df_evoluzione, use_container_width=True)
     else:
         st.markdown("#### Prime e ultime annualità")
         df_display = pd.concat([
             df_evoluzione.head(5),
-            pd.DataFrame([{"anno": "...", "capitale": "...", "guadagno_anno": "...", "guadagno_totale": "..."}]),
+            pd.DataFrame([{"capitale": "...", "guadagno_anno": "...", "guadagno_totale": "..."}],
+                         index=pd.Index(["..."], name="anno")),
             df_evoluzione.tail(5)
         ])
-        st.dataframe(df_display, use_container_width=True, hide_index=True)
+        st.dataframe(df_display, use_container_width=True)
 
 
+@st.fragment
+@cronometra
 def render_calc_confronto():
     """Confronto performance asset class"""
     
@@ -550,6 +513,8 @@ def render_calc_confronto():
     """)
 
 
+@st.fragment
+@cronometra
 def render_calc_inflazione():
     """Calcolatore impatto inflazione"""
     
@@ -650,59 +615,13 @@ def render_calc_inflazione():
     """)
 
 
+@cronometra
 def render_quiz():
     """Renderizza il quiz di verifica"""
-    
-    st.markdown("## 📝 Quiz di verifica")
-    
-    if "cap8_risposte" not in st.session_state:
-        st.session_state.cap8_risposte = {}
-    if "cap8_verificato" not in st.session_state:
-        st.session_state.cap8_verificato = False
-    
-    for i, q in enumerate(QUIZ):
-        with st.container(border=True):
-            st.markdown(f"**Domanda {i+1}:** {q['domanda']}")
-            
-            if q["tipo"] == "vero_falso":
-                risposta = st.radio(
-                    "Seleziona:",
-                    ["Vero", "Falso"],
-                    key=f"cap8_q{q['id']}",
-                    horizontal=True
-                )
-                st.session_state.cap8_risposte[q['id']] = risposta == "Vero"
-                
-            elif q["tipo"] == "scelta_multipla":
-                risposta = st.radio(
-                    "Seleziona:",
-                    q["opzioni"],
-                    key=f"cap8_q{q['id']}"
-                )
-                st.session_state.cap8_risposte[q['id']] = risposta
-            
-            if st.session_state.cap8_verificato:
-                user_ans = st.session_state.cap8_risposte.get(q['id'])
-                corretto = user_ans == q["risposta_corretta"]
-                
-                if corretto:
-                    st.success(f"✅ Corretto! {q['spiegazione']}")
-                else:
-                    st.error(f"❌ Sbagliato. Risposta corretta: {q['risposta_corretta']}")
-                    st.info(q['spiegazione'])
-    
-    col1, col2 = st.columns(2)
-    with col1:
-        if st.button("✅ Verifica risposte", type="primary", use_container_width=True, key="cap8_verifica"):
-            st.session_state.cap8_verificato = True
-            st.rerun()
-    with col2:
-        if st.button("🔄 Ricomincia", use_container_width=True, key="cap8_reset"):
-            st.session_state.cap8_verificato = False
-            st.session_state.cap8_risposte = {}
-            st.rerun()
+    render_quiz_capitolo(CAPITOLO_NUM, INDICE_QUIZ)
 
 
+@cronometra
 def render_takeaways():
     """Renderizza i punti chiave"""
     
@@ -784,6 +703,7 @@ def render_takeaways():
         """)
 
 
+@cronometra
 def render():
     """Funzione principale per renderizzare il capitolo"""
     
@@ -796,21 +716,10 @@ def render():
     
     st.markdown("---")
     
-    tab1, tab2, tab3, tab4 = st.tabs([
-        "📚 Contenuto", 
-        "🧮 Calcolatori", 
-        "📝 Quiz",
-        "💡 Takeaways"
-    ])
-    
-    with tab1:
-        render_contenuto()
-    
-    with tab2:
-        render_calcolatore()
-    
-    with tab3:
-        render_quiz()
-    
-    with tab4:
-        render_takeaways()
+    # Sezioni: viene eseguita solo quella selezionata
+    render_sezioni(f"cap{CAPITOLO_NUM}", {
+        "📚 Contenuto": render_contenuto,
+        "🧮 Calcolatori": render_calcolatore,
+        "📝 Quiz": render_quiz,
+        "💡 Takeaways": render_takeaways
+    }, CHIAVI_WIDGET)
@@ -5,7 +5,13 @@ InvestAccademy - Corso di Finanza Personale
 
 import streamlit as st
 import pandas as pd
-import numpy as np
+
+from finanza.interesse import calcola_rendimento_reale, calcola_rendimento_reale_esatto
+from finanza.rischio import simula_correlazione, curva_diversificazione, N_PERCORSI_CURVA
+from finanza.tempi import cronometra
+
+from .componenti import render_sezioni, seme_scenario, pulsante_nuova_estrazione, segna_calcolatore, grafico_linee
+from .quiz import indicizza_quiz, chiavi_quiz, render_quiz_capitolo
 
 # Metadata
 CAPITOLO_NUM = 9
@@ -70,42 +76,17 @@ QUIZ = [
     }
 ]
 
+# Domande indicizzate una volta sola, all'import del modulo
+INDICE_QUIZ = indicizza_quiz(QUIZ, passo=0.5, tolleranza=1.0)
 
-def calcola_rendimento_reale(nominale: float, inflazione: float) -> float:
-    """Calcola il rendimento reale approssimato"""
-    return nominale - inflazione
-
-
-def calcola_rendimento_reale_esatto(nominale: float, inflazione: float) -> float:
-    """Calcola il rendimento reale con formula esatta"""
-    return ((1 + nominale / 100) / (1 + inflazione / 100) - 1) * 100
-
-
-def simula_correlazione(corr: float, volatilita_a: float, volatilita_b: float, periodi: int = 100) -> dict:
-    """Simula due asset con correlazione specifica"""
-    np.random.seed(42)
-    
-    # Genera rendimenti correlati
-    mean = [0, 0]
-    cov = [[volatilita_a**2, corr * volatilita_a * volatilita_b],
-           [corr * volatilita_a * volatilita_b, volatilita_b**2]]
-    
-    rendimenti = np.random.multivariate_normal(mean, cov, periodi)
-    
-    asset_a = 100 * np.exp(np.cumsum(rendimenti[:, 0] / 100))
-    asset_b = 100 * np.exp(np.cumsum(rendimenti[:, 1] / 100))
-    portafoglio = (asset_a + asset_b) / 2
-    
-    return {
-        "asset_a": asset_a,
-        "asset_b": asset_b,
-        "portafoglio": portafoglio,
-        "vol_a": np.std(rendimenti[:, 0]),
-        "vol_b": np.std(rendimenti[:, 1]),
-        "vol_portafoglio": np.std((rendimenti[:, 0] + rendimenti[:, 1]) / 2)
-    }
+# Widget il cui valore va conservato cambiando sezione (esclusi i pulsanti)
+CHIAVI_WIDGET = (
+    "cap9_calcolatore", "cap9_nominale", "cap9_inflazione", "cap9_capitale", "cap9_anni", "cap9_corr",
+    "cap9_vol_a", "cap9_vol_b", "cap9_periodi", "cap9_div_cap", "cap9_num_titoli", "cap9_prob_fall"
+) + chiavi_quiz(CAPITOLO_NUM, INDICE_QUIZ)
 
 
+@cronometra
 def render_contenuto():
     """Renderizza il contenuto teorico"""
     
@@ -297,6 +278,7 @@ def render_contenuto():
         """)
 
 
+@cronometra
 def render_calcolatore():
     """Renderizza i calcolatori"""
     
@@ -305,9 +287,12 @@ def render_calcolatore():
     calc_type = st.radio(
         "Seleziona calcolatore:",
         ["Rendimento Reale", "Effetto Correlazione", "Simulatore Diversificazione"],
-        horizontal=True
+        horizontal=True,
+        key="cap9_calcolatore"
     )
     
+    segna_calcolatore(CAPITOLO_NUM, calc_type)
+    
     st.markdown("---")
     
     if calc_type == "Rendimento Reale":
@@ -318,6 +303,8 @@ def render_calcolatore():
         render_calc_diversificazione()
 
 
+@st.fragment
+@cronometra
 def render_calc_rendimento():
     """Calcolatore rendimento reale"""
     
@@ -415,9 +402,11 @@ def render_calc_rendimento():
         "Potere d'Acquisto Reale": reali
     })
     
-    st.line_chart(df_evoluzione.set_index("Anno"))
+    grafico_linee(df_evoluzione.set_index("Anno"))
 
 
+@st.fragment
+@cronometra
 def render_calc_correlazione():
     """Calcolatore effetto correlazione"""
     
@@ -466,9 +455,14 @@ def render_calc_correlazione():
             step=10,
             key="cap9_periodi"
         )
+        
+        pulsante_nuova_estrazione("cap9_correlazione")
     
     with col2:
-        simulazione = simula_correlazione(correlazione, vol_a, vol_b, periodi)
+        simulazione = simula_correlazione(
+            correlazione, vol_a, vol_b, periodi,
+            seme=seme_scenario("cap9_correlazione")
+        )
         
         st.markdown("### Risultati Simulazione")
         
@@ -506,9 +500,31 @@ def render_calc_correlazione():
             "Portafoglio 50/50": simulazione['portafoglio']
         })
         
-        st.line_chart(df_sim.set_index("Periodo"))
+        grafico_linee(df_sim.set_index("Periodo"))
+        
+        st.markdown("#### 🎲 Volatilità al variare della correlazione")
+        
+        curva = curva_diversificazione(vol_a, vol_b, periodi, seme=seme_scenario("cap9_correlazione"))
+        
+        st.caption(
+            f"Per ogni correlazione da -1 a +1, {N_PERCORSI_CURVA:,} simulazioni come quella sopra: "
+            "volatilità teorica del portafoglio 50/50 e intervallo tra 5° e 95° percentile di quella osservata."
+        )
+        
+        grafico_linee(curva.tabella(
+            "teorica", "p5", "p50", "p95",
+            nomi={
+                "correlazione": "Correlazione",
+                "teorica": "Teorica",
+                "p5": "5° percentile",
+                "p50": "Mediana",
+                "p95": "95° percentile"
+            }
+        ))
 
 
+@st.fragment
+@cronometra
 def render_calc_diversificazione():
     """Simulatore diversificazione"""
     
@@ -586,70 +602,13 @@ def render_calc_diversificazione():
         """)
 
 
+@cronometra
 def render_quiz():
     """Renderizza il quiz di verifica"""
-    
-    st.markdown("## 📝 Quiz di verifica")
-    
-    if "cap9_risposte" not in st.session_state:
-        st.session_state.cap9_risposte = {}
-    if "cap9_verificato" not in st.session_state:
-        st.session_state.cap9_verificato = False
-    
-    for i, q in enumerate(QUIZ):
-        with st.container(border=True):
-            st.markdown(f"**Domanda {i+1}:** {q['domanda']}")
-            
-            if q["tipo"] == "vero_falso":
-                risposta = st.radio(
-                    "Seleziona:",
-                    ["Vero", "Falso"],
-                    key=f"cap9_q{q['id']}",
-                    horizontal=True
-                )
-                st.session_state.cap9_risposte[q['id']] = risposta == "Vero"
-                
-            elif q["tipo"] == "scelta_multipla":
-                risposta = st.radio(
-                    "Seleziona:",
-                    q["opzioni"],
-                    key=f"cap9_q{q['id']}"
-                )
-                st.session_state.cap9_risposte[q['id']] = risposta
-                
-            elif q["tipo"] == "numero":
-                risposta = st.number_input(
-                    "Inserisci il valore:",
-                    key=f"cap9_q{q['id']}",
-                    step=0.5
-                )
-                st.session_state.cap9_risposte[q['id']] = risposta
-            
-            if st.session_state.cap9_verificato:
-                user_ans = st.session_state.cap9_risposte.get(q['id'])
-                if q["tipo"] == "numero":
-                    corretto = abs(user_ans - q["risposta_corretta"]) < 1
-                else:
-                    corretto = user_ans == q["risposta_corretta"]
-                
-                if corretto:
-                    st.success(f"✅ Corretto! {q['spiegazione']}")
-                else:
-                    st.error(f"❌ Sbagliato. Risposta corretta: {q['risposta_corretta']}")
-                    st.info(q['spiegazione'])
-    
-    col1, col2 = st.columns(2)
-    with col1:
-        if st.button("✅ Verifica risposte", type="primary", use_container_width=True, key="cap9_verifica"):
-            st.session_state.cap9_verificato = True
-            st.rerun()
-    with col2:
-        if st.button("🔄 Ricomincia", use_container_width=True, key="cap9_reset"):
-            st.session_state.cap9_verificato = False
-            st.session_state.cap9_risposte = {}
-            st.rerun()
+    render_quiz_capitolo(CAPITOLO_NUM, INDICE_QUIZ)
 
 
+@cronometra
 def render_takeaways():
     """Renderizza i punti chiave"""
     
@@ -710,6 +669,7 @@ def render_takeaways():
         """)
 
 
+@cronometra
 def render():
     """Funzione principale per renderizzare il capitolo"""
     
@@ -722,21 +682,10 @@ def render():
     
     st.markdown("---")
     
-    tab1, tab2, tab3, tab4 = st.tabs([
-        "📚 Contenuto", 
-        "🧮 Calcolatori", 
-        "📝 Quiz",
-        "💡 Takeaways"
-    ])
-    
-    with tab1:
-        render_contenuto()
-    
-    with tab2:
-        render_calcolatore()
-    
-    with tab3:
-        render_quiz()
-    
-    with tab4:
-        render_takeaways()
+    # Sezioni: viene eseguita solo quella selezionata
+    render_sezioni(f"cap{CAPITOLO_NUM}", {
+        "📚 Contenuto": render_contenuto,
+        "🧮 Calcolatori": render_calcolatore,
+        "📝 Quiz": render_quiz,
+        "💡 Takeaways": render_takeaways
+    }, CHIAVI_WIDGET)
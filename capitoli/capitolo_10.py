@@ -6,6 +6,12 @@ InvestAccademy - Corso di Finanza Personale
 import streamlit as st
 import pandas as pd
 
+from finanza.portafoglio import calcola_profilo_rischio, simula_portafoglio
+from finanza.tempi import cronometra
+
+from .componenti import render_sezioni, segna_calcolatore
+from .quiz import indicizza_quiz, chiavi_quiz, render_quiz_capitolo
+
 # Metadata
 CAPITOLO_NUM = 10
 TITOLO = "Asset allocation e costruzione del portafoglio"
@@ -75,84 +81,18 @@ QUIZ = [
     }
 ]
 
+# Domande indicizzate una volta sola, all'import del modulo
+INDICE_QUIZ = indicizza_quiz(QUIZ)
 
-def calcola_profilo_rischio(domande_risposte: dict) -> dict:
-    """Calcola il profilo di rischio basato sulle risposte"""
-    punteggio = sum(domande_risposte.values())
-    
-    if punteggio <= 10:
-        profilo = "Prudente"
-        descrizione = "Preferisci stabilità e hai bassa tolleranza alle oscillazioni"
-        allocazione = {"Azioni": 30, "Obbligazioni": 60, "Oro": 10}
-        colore = "🟢"
-    elif punteggio <= 17:
-        profilo = "Bilanciato"
-        descrizione = "Cerchi equilibrio tra crescita e stabilità"
-        allocazione = {"Azioni": 60, "Obbligazioni": 35, "Oro": 5}
-        colore = "🔵"
-    else:
-        profilo = "Dinamico"
-        descrizione = "Punti alla crescita di lungo periodo e accetti volatilità"
-        allocazione = {"Azioni": 80, "Obbligazioni": 15, "Oro": 5}
-        colore = "🔴"
-    
-    return {
-        "punteggio": punteggio,
-        "profilo": profilo,
-        "descrizione": descrizione,
-        "allocazione": allocazione,
-        "colore": colore
-    }
-
-
-def simula_portafoglio(azioni_perc: float, obblig_perc: float, oro_perc: float, 
-                       capitale: float, anni: int) -> dict:
-    """Simula l'andamento di un portafoglio con diversa asset allocation"""
-    
-    # Rendimenti storici medi approssimativi
-    rend_azioni = 8.0
-    rend_obblig = 3.5
-    rend_oro = 2.5  # Rendimento storico reale dell'oro
-    
-    # Volatilità storica approssimativa
-    vol_azioni = 18.0
-    vol_obblig = 6.0
-    vol_oro = 15.0
-    
-    # Calcolo rendimento e volatilità del portafoglio
-    rendimento_portafoglio = (
-        azioni_perc / 100 * rend_azioni +
-        obblig_perc / 100 * rend_obblig +
-        oro_perc / 100 * rend_oro
-    )
-    
-    # Approssimazione semplificata della volatilità del portafoglio
-    vol_portafoglio = (
-        azioni_perc / 100 * vol_azioni +
-        obblig_perc / 100 * vol_obblig +
-        oro_perc / 100 * vol_oro
-    )
-    
-    # Calcolo montante atteso
-    montante = capitale * ((1 + rendimento_portafoglio / 100) ** anni)
-    
-    # Scenario pessimistico (rendimento - volatilità)
-    rend_pessimistico = rendimento_portafoglio - vol_portafoglio
-    montante_pessimistico = capitale * ((1 + rend_pessimistico / 100) ** anni)
-    
-    # Scenario ottimistico (rendimento + volatilità)
-    rend_ottimistico = rendimento_portafoglio + vol_portafoglio
-    montante_ottimistico = capitale * ((1 + rend_ottimistico / 100) ** anni)
-    
-    return {
-        "rendimento_atteso": rendimento_portafoglio,
-        "volatilita": vol_portafoglio,
-        "montante_atteso": montante,
-        "montante_pessimistico": montante_pessimistico,
-        "montante_ottimistico": montante_ottimistico
-    }
+# Widget il cui valore va conservato cambiando sezione (esclusi i pulsanti)
+CHIAVI_WIDGET = (
+    "cap10_calcolatore", "cap10_orizzonte", "cap10_reazione", "cap10_priorita", "cap10_stabilita",
+    "cap10_sim_cap", "cap10_sim_anni", "cap10_sim_azioni", "cap10_sim_obblig", "cap10_anal_cap",
+    "cap10_anal_azioni", "cap10_anal_obblig", "cap10_anal_oro"
+) + chiavi_quiz(CAPITOLO_NUM, INDICE_QUIZ)
 
 
+@cronometra
 def render_contenuto():
     """Renderizza il contenuto teorico"""
     
@@ -566,6 +506,7 @@ def render_contenuto():
     """)
 
 
+@cronometra
 def render_calcolatore():
     """Renderizza i calcolatori"""
     
@@ -574,9 +515,12 @@ def render_calcolatore():
     calc_type = st.radio(
         "Seleziona calcolatore:",
         ["Profilo di Rischio", "Simulatore Asset Allocation", "Analizzatore Portafoglio"],
-        horizontal=True
+        horizontal=True,
+        key="cap10_calcolatore"
     )
     
+    segna_calcolatore(CAPITOLO_NUM, calc_type)
+    
     st.markdown("---")
     
     if calc_type == "Profilo di Rischio":
@@ -587,6 +531,8 @@ def render_calcolatore():
         render_calc_analizzatore()
 
 
+@st.fragment
+@cronometra
 def render_calc_profilo():
     """Calcolatore profilo di rischio"""
     
@@ -677,6 +623,8 @@ def render_calc_profilo():
         """)
 
 
+@st.fragment
+@cronometra
 def render_calc_simulatore():
     """Simulatore asset allocation"""
     
@@ -715,13 +663,23 @@ def render_calc_simulatore():
             key="cap10_sim_azioni"
         )
         
-        obbligazioni = st.slider(
-            "📈 Obbligazioni (%)",
-            min_value=0,
-            max_value=100 - azioni,
-            value=min(35, 100 - azioni),
-            key="cap10_sim_obblig"
-        )
+        # Lo slider delle obbligazioni conserva il valore: va ridotto se le azioni aumentano
+        if st.session_state.get("cap10_sim_obblig", 0) > 100 - azioni:
+            st.session_state["cap10_sim_obblig"] = 100 - azioni
+        
+        # Con un valore già in sessione `value` non si passa, o Streamlit avvisa del doppio valore
+        predefinito = {} if "cap10_sim_obblig" in st.session_state else {"value": min(35, 100 - azioni)}
+        
+        if azioni < 100:
+            obbligazioni = st.slider(
+                "📈 Obbligazioni (%)",
+                min_value=0,
+                max_value=100 - azioni,
+                key="cap10_sim_obblig",
+                **predefinito
+            )
+        else:
+            obbligazioni = 0
         
         oro = 100 - azioni - obbligazioni
         
@@ -746,6 +704,11 @@ def render_calc_simulatore():
         st.markdown("---")
         st.markdown("#### 📊 Range di Risultati Possibili")
         
+        st.caption(
+            "Scenari da una simulazione Monte Carlo: pessimistico e ottimistico sono "
+            "il 10° e il 90° percentile dei risultati possibili."
+        )
+        
         col_pess, col_att, col_ott = st.columns(3)
         
         with col_pess:
@@ -769,6 +732,11 @@ def render_calc_simulatore():
                 delta_color="off"
             )
         
+        st.metric(
+            "Probabilità di chiudere in perdita",
+            f"{simulazione['prob_perdita'] * 100:.1f}%"
+        )
+        
         # Interpretazione
         st.markdown("---")
         
@@ -807,6 +775,8 @@ def render_calc_simulatore():
             """)
 
 
+@st.fragment
+@cronometra
 def render_calc_analizzatore():
     """Analizzatore portafoglio esistente"""
     
@@ -931,59 +901,13 @@ def render_calc_analizzatore():
             st.dataframe(df_confronto, use_container_width=True, hide_index=True)
 
 
+@cronometra
 def render_quiz():
     """Renderizza il quiz di verifica"""
-    
-    st.markdown("## 📝 Quiz di verifica")
-    
-    if "cap10_risposte" not in st.session_state:
-        st.session_state.cap10_risposte = {}
-    if "cap10_verificato" not in st.session_state:
-        st.session_state.cap10_verificato = False
-    
-    for i, q in enumerate(QUIZ):
-        with st.container(border=True):
-            st.markdown(f"**Domanda {i+1}:** {q['domanda']}")
-            
-            if q["tipo"] == "vero_falso":
-                risposta = st.radio(
-                    "Seleziona:",
-                    ["Vero", "Falso"],
-                    key=f"cap10_q{q['id']}",
-                    horizontal=True
-                )
-                st.session_state.cap10_risposte[q['id']] = risposta == "Vero"
-                
-            elif q["tipo"] == "scelta_multipla":
-                risposta = st.radio(
-                    "Seleziona:",
-                    q["opzioni"],
-                    key=f"cap10_q{q['id']}"
-                )
-                st.session_state.cap10_risposte[q['id']] = risposta
-            
-            if st.session_state.cap10_verificato:
-                user_ans = st.session_state.cap10_risposte.get(q['id'])
-                corretto = user_ans == q["risposta_corretta"]
-                
-                if corretto:
-                    st.success(f"✅ Corretto! {q['spiegazione']}")
-                else:
-                    st.error(f"❌ Sbagliato. Risposta corretta: {q['risposta_corretta']}")
-                    st.info(q['spiegazione'])
-    
-    col1, col2 = st.columns(2)
-    with col1:
-        if st.button("✅ Verifica risposte", type="primary", use_container_width=True, key="cap10_verifica"):
-            st.session_state.cap10_verificato = True
-            st.rerun()
-    with col2:
-        if st.button("🔄 Ricomincia", use_container_width=True, key="cap10_reset"):
-            st.session_state.cap10_verificato = False
-            st.session_state.cap10_risposte = {}
-            st.rerun()
+    render_quiz_capitolo(CAPITOLO_NUM, INDICE_QUIZ)
 
 
+@cronometra
 def render_takeaways():
     """Renderizza i punti chiave"""
     
@@ -1055,6 +979,7 @@ def render_takeaways():
         """)
 
 
+@cronometra
 def render():
     """Funzione principale per renderizzare il capitolo"""
     
@@ -1067,21 +992,10 @@ def render():
     
     st.markdown("---")
     
-    tab1, tab2, tab3, tab4 = st.tabs([
-        "📚 Contenuto", 
-        "🧮 Calcolatori", 
-        "📝 Quiz",
-        "💡 Takeaways"
-    ])
-    
-    with tab1:
-        render_contenuto()
-    
-    with tab2:
-        render_calcolatore()
-    
-    with tab3:
-        render_quiz()
-    
-    with tab4:
-        render_takeaways()
+    # Sezioni: viene eseguita solo quella selezionata
+    render_sezioni(f"cap{CAPITOLO_NUM}", {
+        "📚 Contenuto": render_contenuto,
+        "🧮 Calcolatori": render_calcolatore,
+        "📝 Quiz": render_quiz,
+        "💡 Takeaways": render_takeaways
+    }, CHIAVI_WIDGET)
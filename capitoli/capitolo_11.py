@@ -6,6 +6,12 @@ InvestAccademy - Corso di Finanza Personale
 import streamlit as st
 import pandas as pd
 
+from finanza.costi import calcola_impatto_costi, confronta_strumenti
+from finanza.tempi import cronometra
+
+from .componenti import render_sezioni, segna_calcolatore
+from .quiz import indicizza_quiz, chiavi_quiz, render_quiz_capitolo
+
 # Metadata
 CAPITOLO_NUM = 11
 TITOLO = "Strumenti di investimento: ETF, fondi e azioni"
@@ -75,52 +81,17 @@ QUIZ = [
     }
 ]
 
+# Domande indicizzate una volta sola, all'import del modulo
+INDICE_QUIZ = indicizza_quiz(QUIZ)
 
-def calcola_impatto_costi(capitale: float, anni: int, rendimento: float, costo_perc: float) -> dict:
-    """Calcola l'impatto dei costi sul capitale finale"""
-    
-    rendimento_lordo = rendimento / 100
-    costo = costo_perc / 100
-    rendimento_netto = rendimento_lordo - costo
-    
-    capitale_lordo = capitale * ((1 + rendimento_lordo) ** anni)
-    capitale_netto = capitale * ((1 + rendimento_netto) ** anni)
-    
-    differenza = capitale_lordo - capitale_netto
-    
-    return {
-        "capitale_lordo": capitale_lordo,
-        "capitale_netto": capitale_netto,
-        "differenza_costi": differenza,
-        "perc_riduzione": (differenza / capitale_lordo * 100) if capitale_lordo > 0 else 0
-    }
-
-
-def confronta_strumenti(capitale: float, anni: int) -> dict:
-    """Confronta diversi strumenti con costi tipici"""
-    
-    rendimento_base = 6.0  # Rendimento lordo ipotetico
-    
-    strumenti = {
-        "ETF": {"costo": 0.2, "tipo": "Passivo"},
-        "Fondo Attivo": {"costo": 2.0, "tipo": "Attivo"},
-        "Azione Singola": {"costo": 0.1, "tipo": "Diretto"}
-    }
-    
-    risultati = {}
-    
-    for nome, dati in strumenti.items():
-        calc = calcola_impatto_costi(capitale, anni, rendimento_base, dati["costo"])
-        risultati[nome] = {
-            "costo_annuo": dati["costo"],
-            "tipo": dati["tipo"],
-            "capitale_finale": calc["capitale_netto"],
-            "costi_totali": calc["differenza_costi"]
-        }
-    
-    return risultati
+# Widget il cui valore va conservato cambiando sezione (esclusi i pulsanti)
+CHIAVI_WIDGET = (
+    "cap11_calcolatore", "cap11_capitale", "cap11_anni", "cap11_rend", "cap11_costo", "cap11_conf_cap",
+    "cap11_conf_anni", "cap11_str_nome_*", "cap11_str_val_*", "cap11_str_cost_*"
+) + chiavi_quiz(CAPITOLO_NUM, INDICE_QUIZ)
 
 
+@cronometra
 def render_contenuto():
     """Renderizza il contenuto teorico"""
     
@@ -338,6 +309,7 @@ def render_contenuto():
     """)
 
 
+@cronometra
 def render_calcolatore():
     """Renderizza i calcolatori"""
     
@@ -346,9 +318,12 @@ def render_calcolatore():
     calc_type = st.radio(
         "Seleziona calcolatore:",
         ["Impatto Costi", "Confronto Strumenti", "Analisi Portafoglio"],
-        horizontal=True
+        horizontal=True,
+        key="cap11_calcolatore"
     )
     
+    segna_calcolatore(CAPITOLO_NUM, calc_type)
+    
     st.markdown("---")
     
     if calc_type == "Impatto Costi":
@@ -359,6 +334,8 @@ def render_calcolatore():
         render_calc_analisi()
 
 
+@st.fragment
+@cronometra
 def render_calc_costi():
     """Calcolatore impatto costi"""
     
@@ -447,6 +424,8 @@ def render_calc_costi():
     """)
 
 
+@st.fragment
+@cronometra
 def render_calc_confronto():
     """Confronto tra strumenti"""
     
@@ -512,6 +491,8 @@ def render_calc_confronto():
     """)
 
 
+@st.fragment
+@cronometra
 def render_calc_analisi():
     """Analisi portafoglio attuale"""
     
@@ -599,59 +580,13 @@ def render_calc_analisi():
             st.caption(f"Risparmiando l'1% annuo su €{valore_totale:,.0f}, dopo 20 anni avresti circa €{valore_totale * 0.22:,.0f} in più.")
 
 
+@cronometra
 def render_quiz():
     """Renderizza il quiz di verifica"""
-    
-    st.markdown("## 📝 Quiz di verifica")
-    
-    if "cap11_risposte" not in st.session_state:
-        st.session_state.cap11_risposte = {}
-    if "cap11_verificato" not in st.session_state:
-        st.session_state.cap11_verificato = False
-    
-    for i, q in enumerate(QUIZ):
-        with st.container(border=True):
-            st.markdown(f"**Domanda {i+1}:** {q['domanda']}")
-            
-            if q["tipo"] == "vero_falso":
-                risposta = st.radio(
-                    "Seleziona:",
-                    ["Vero", "Falso"],
-                    key=f"cap11_q{q['id']}",
-                    horizontal=True
-                )
-                st.session_state.cap11_risposte[q['id']] = risposta == "Vero"
-                
-            elif q["tipo"] == "scelta_multipla":
-                risposta = st.radio(
-                    "Seleziona:",
-                    q["opzioni"],
-                    key=f"cap11_q{q['id']}"
-                )
-                st.session_state.cap11_risposte[q['id']] = risposta
-            
-            if st.session_state.cap11_verificato:
-                user_ans = st.session_state.cap11_risposte.get(q['id'])
-                corretto = user_ans == q["risposta_corretta"]
-                
-                if corretto:
-                    st.success(f"✅ Corretto! {q['spiegazione']}")
-                else:
-                    st.error(f"❌ Sbagliato. Risposta corretta: {q['risposta_corretta']}")
-                    st.info(q['spiegazione'])
-    
-    col1, col2 = st.columns(2)
-    with col1:
-        if st.button("✅ Verifica risposte", type="primary", use_container_width=True, key="cap11_verifica"):
-            st.session_state.cap11_verificato = True
-            st.rerun()
-    with col2:
-        if st.button("🔄 Ricomincia", use_container_width=True, key="cap11_reset"):
-            st.session_state.cap11_verificato = False
-            st.session_state.cap11_risposte = {}
-            st.rerun()
+    render_quiz_capitolo(CAPITOLO_NUM, INDICE_QUIZ)
 
 
+@cronometra
 def render_takeaways():
     """Renderizza i punti chiave"""
     
@@ -706,6 +641,7 @@ def render_takeaways():
         """)
 
 
+@cronometra
 def render():
     """Funzione principale per renderizzare il capitolo"""
     
@@ -718,21 +654,10 @@ def render():
     
     st.markdown("---")
     
-    tab1, tab2, tab3, tab4 = st.tabs([
-        "📚 Contenuto", 
-        "🧮 Calcolatori", 
-        "📝 Quiz",
-        "💡 Takeaways"
-    ])
-    
-    with tab1:
-        render_contenuto()
-    
-    with tab2:
-        render_calcolatore()
-    
-    with tab3:
-        render_quiz()
-    
-    with tab4:
-        render_takeaways()
+    # Sezioni: viene eseguita solo quella selezionata
+    render_sezioni(f"cap{CAPITOLO_NUM}", {
+        "📚 Contenuto": render_contenuto,
+        "🧮 Calcolatori": render_calcolatore,
+        "📝 Quiz": render_quiz,
+        "💡 Takeaways": render_takeaways
+    }, CHIAVI_WIDGET)
@@ -5,12 +5,20 @@ InvestAccademy - Corso di Finanza Personale
 
 import streamlit as st
 import pandas as pd
-import numpy as np
+
+from finanza.pac import simula_pac, confronta_pac_vs_pic, simula_dca_con_volatilita, simula_dca_percorsi
+from finanza.tempi import cronometra
+
+from .componenti import render_sezioni, seme_scenario, pulsante_nuova_estrazione, segna_calcolatore, grafico_linee
+from .quiz import indicizza_quiz, chiavi_quiz, render_quiz_capitolo
 
 # Metadata
 CAPITOLO_NUM = 12
 TITOLO = "Piani di accumulo (PAC) e investimenti periodici"
 
+# Percorsi di prezzo per la distribuzione del simulatore DCA
+N_PERCORSI_DCA = 10_000
+
 OBIETTIVI = [
     "Comprendere cos'è un Piano di Accumulo (PAC)",
     "Valutare vantaggi e limiti degli investimenti periodici",
@@ -76,91 +84,17 @@ QUIZ = [
     }
 ]
 
+# Domande indicizzate una volta sola, all'import del modulo
+INDICE_QUIZ = indicizza_quiz(QUIZ)
 
-def simula_pac(importo_mensile: float, mesi: int, rendimento_annuo: float) -> dict:
-    """Simula un PAC con rendimento costante"""
-    
-    rendimento_mensile = (rendimento_annuo / 100) / 12
-    
-    capitale = 0
-    versato_totale = 0
-    evoluzione = []
-    
-    for mese in range(1, mesi + 1):
-        versato_totale += importo_mensile
-        capitale = (capitale + importo_mensile) * (1 + rendimento_mensile)
-        
-        evoluzione.append({
-            "mese": mese,
-            "versato": versato_totale,
-            "capitale": capitale,
-            "guadagno": capitale - versato_totale
-        })
-    
-    return {
-        "evoluzione": evoluzione,
-        "versato_totale": versato_totale,
-        "capitale_finale": capitale,
-        "guadagno_totale": capitale - versato_totale
-    }
-
-
-def confronta_pac_vs_pic(importo_totale: float, rendimento_annuo: float, mesi: int) -> dict:
-    """Confronta PAC vs investimento in unica soluzione (PIC)"""
-    
-    # PIC: tutto investito subito
-    capitale_pic = importo_totale * ((1 + rendimento_annuo / 100) ** (mesi / 12))
-    
-    # PAC: investimento mensile
-    importo_mensile = importo_totale / mesi
-    risultato_pac = simula_pac(importo_mensile, mesi, rendimento_annuo)
-    capitale_pac = risultato_pac['capitale_finale']
-    
-    return {
-        "capitale_pic": capitale_pic,
-        "capitale_pac": capitale_pac,
-        "differenza": capitale_pic - capitale_pac,
-        "pac_migliore": capitale_pac > capitale_pic
-    }
-
-
-def simula_dca_con_volatilita(importo_mensile: float, mesi: int) -> dict:
-    """Simula l'effetto Dollar Cost Averaging con prezzi variabili"""
-    
-    np.random.seed(42)
-    
-    # Genera prezzi con volatilità
-    prezzo_iniziale = 100
-    prezzi = [prezzo_iniziale]
-    
-    for _ in range(mesi - 1):
-        variazione = np.random.normal(0.005, 0.05)  # Media 0.5%, volatilità 5%
-        nuovo_prezzo = prezzi[-1] * (1 + variazione)
-        prezzi.append(max(nuovo_prezzo, 1))  # Evita prezzi negativi
-    
-    # Calcola accumulo
-    quote_totali = 0
-    investito = 0
-    
-    for prezzo in prezzi:
-        quote_acquistate = importo_mensile / prezzo
-        quote_totali += quote_acquistate
-        investito += importo_mensile
-    
-    prezzo_medio = investito / quote_totali if quote_totali > 0 else 0
-    valore_finale = quote_totali * prezzi[-1]
-    
-    return {
-        "prezzi": prezzi,
-        "quote_totali": quote_totali,
-        "prezzo_medio": prezzo_medio,
-        "prezzo_finale": prezzi[-1],
-        "investito": investito,
-        "valore_finale": valore_finale,
-        "guadagno": valore_finale - investito
-    }
+# Widget il cui valore va conservato cambiando sezione (esclusi i pulsanti)
+CHIAVI_WIDGET = (
+    "cap12_calcolatore", "cap12_importo", "cap12_anni", "cap12_rend", "cap12_conf_tot",
+    "cap12_conf_anni", "cap12_conf_rend", "cap12_dca_imp", "cap12_dca_mesi"
+) + chiavi_quiz(CAPITOLO_NUM, INDICE_QUIZ)
 
 
+@cronometra
 def render_contenuto():
     """Renderizza il contenuto teorico"""
     
@@ -352,6 +286,7 @@ def render_contenuto():
     """)
 
 
+@cronometra
 def render_calcolatore():
     """Renderizza i calcolatori"""
     
@@ -360,9 +295,12 @@ def render_calcolatore():
     calc_type = st.radio(
         "Seleziona calcolatore:",
         ["Simulatore PAC", "PAC vs PIC", "Effetto Dollar Cost Averaging"],
-        horizontal=True
+        horizontal=True,
+        key="cap12_calcolatore"
     )
     
+    segna_calcolatore(CAPITOLO_NUM, calc_type)
+    
     st.markdown("---")
     
     if calc_type == "Simulatore PAC":
@@ -373,6 +311,8 @@ def render_calcolatore():
         render_calc_dca()
 
 
+@st.fragment
+@cronometra
 def render_calc_pac():
     """Simulatore PAC"""
     
@@ -429,22 +369,12 @@ def render_calc_pac():
     st.markdown("---")
     st.markdown("### 📈 Evoluzione del Capitale")
     
-    df_evoluzione = pd.DataFrame(risultato['evoluzione'])
-    
-    # Mostra solo alcuni punti se troppi mesi
-    if len(df_evoluzione) > 120:
-        # Mostra solo ogni anno
-        df_plot = df_evoluzione[df_evoluzione['mese'] % 12 == 0].copy()
-    else:
-        df_plot = df_evoluzione
-    
-    chart_data = pd.DataFrame({
-        "Mese": df_plot['mese'],
-        "Versato": df_plot['versato'],
-        "Capitale": df_plot['capitale']
-    })
+    evoluzione = risultato['evoluzione']
     
-    st.line_chart(chart_data.set_index("Mese"))
+    grafico_linee(evoluzione.tabella(
+        "versato", "capitale",
+        nomi={"mese": "Mese", "versato": "Versato", "capitale": "Capitale"}
+    ))
     
     # Tabella riassuntiva
     anni_milestone = [1, 5, 10, 15, 20, 25, 30]
@@ -453,22 +383,20 @@ def render_calc_pac():
     if anni_milestone:
         st.markdown("#### 📊 Milestones")
         
-        milestones = []
-        for anno in anni_milestone:
-            mese_target = anno * 12
-            if mese_target <= len(df_evoluzione):
-                row = df_evoluzione.iloc[mese_target - 1]
-                milestones.append({
-                    "Anno": anno,
-                    "Versato": f"€{row['versato']:,.0f}",
-                    "Capitale": f"€{row['capitale']:,.0f}",
-                    "Guadagno": f"€{row['guadagno']:,.0f}"
-                })
+        indici = [anno * 12 - 1 for anno in anni_milestone]
+        milestones = {
+            "Anno": anni_milestone,
+            "Versato": [f"€{v:,.0f}" for v in evoluzione['versato'][indici]],
+            "Capitale": [f"€{v:,.0f}" for v in evoluzione['capitale'][indici]],
+            "Guadagno": [f"€{v:,.0f}" for v in evoluzione['guadagno'][indici]]
+        }
         
         df_milestones = pd.DataFrame(milestones)
         st.dataframe(df_milestones, use_container_width=True, hide_index=True)
 
 
+@st.fragment
+@cronometra
 def render_calc_confronto():
     """Confronto PAC vs PIC"""
     
@@ -541,6 +469,8 @@ def render_calc_confronto():
             """)
 
 
+@st.fragment
+@cronometra
 def render_calc_dca():
     """Simulatore Dollar Cost Averaging"""
     
@@ -568,9 +498,11 @@ def render_calc_dca():
             value=36,
             key="cap12_dca_mesi"
         )
+        
+        pulsante_nuova_estrazione("cap12_dca")
     
     with col2:
-        simulazione = simula_dca_con_volatilita(importo, mesi)
+        simulazione = simula_dca_con_volatilita(importo, mesi, seme=seme_scenario("cap12_dca"))
         
         st.markdown("### Risultati Simulazione")
         
@@ -604,7 +536,7 @@ def render_calc_dca():
         "Prezzo medio carico": [simulazione['prezzo_medio']] * len(simulazione['prezzi'])
     })
     
-    st.line_chart(df_prezzi.set_index("Mese"))
+    grafico_linee(df_prezzi.set_index("Mese"))
     
     st.info("""
     💡 **Interpretazione:**
@@ -617,61 +549,48 @@ def render_calc_dca():
     Con il PAC, compri automaticamente di più quando i prezzi scendono, 
     abbassando il tuo prezzo medio!
     """)
-
-
-def render_quiz():
-    """Renderizza il quiz di verifica"""
     
-    st.markdown("## 📝 Quiz di verifica")
+    st.markdown("---")
+    st.markdown("### 🎲 Distribuzione su Molti Scenari")
     
-    if "cap12_risposte" not in st.session_state:
-        st.session_state.cap12_risposte = {}
-    if "cap12_verificato" not in st.session_state:
-        st.session_state.cap12_verificato = False
+    distribuzione = simula_dca_percorsi(importo, mesi, N_PERCORSI_DCA, seme=seme_scenario("cap12_dca"))
     
-    for i, q in enumerate(QUIZ):
-        with st.container(border=True):
-            st.markdown(f"**Domanda {i+1}:** {q['domanda']}")
-            
-            if q["tipo"] == "vero_falso":
-                risposta = st.radio(
-                    "Seleziona:",
-                    ["Vero", "Falso"],
-                    key=f"cap12_q{q['id']}",
-                    horizontal=True
-                )
-                st.session_state.cap12_risposte[q['id']] = risposta == "Vero"
-                
-            elif q["tipo"] == "scelta_multipla":
-                risposta = st.radio(
-                    "Seleziona:",
-                    q["opzioni"],
-                    key=f"cap12_q{q['id']}"
-                )
-                st.session_state.cap12_risposte[q['id']] = risposta
-            
-            if st.session_state.cap12_verificato:
-                user_ans = st.session_state.cap12_risposte.get(q['id'])
-                corretto = user_ans == q["risposta_corretta"]
-                
-                if corretto:
-                    st.success(f"✅ Corretto! {q['spiegazione']}")
-                else:
-                    st.error(f"❌ Sbagliato. Risposta corretta: {q['risposta_corretta']}")
-                    st.info(q['spiegazione'])
+    st.caption(
+        f"Stesso importo mensile su {N_PERCORSI_DCA:,} andamenti di prezzo simulati, "
+        "confrontato con l'investimento dello stesso totale in un'unica soluzione (PIC) al primo mese."
+    )
     
-    col1, col2 = st.columns(2)
-    with col1:
-        if st.button("✅ Verifica risposte", type="primary", use_container_width=True, key="cap12_verifica"):
-            st.session_state.cap12_verificato = True
-            st.rerun()
-    with col2:
-        if st.button("🔄 Ricomincia", use_container_width=True, key="cap12_reset"):
-            st.session_state.cap12_verificato = False
-            st.session_state.cap12_risposte = {}
-            st.rerun()
+    c1, c2, c3 = st.columns(3)
+    
+    with c1:
+        st.metric("PAC migliore del PIC", f"{distribuzione['prob_pac_migliore']:.0%}")
+    with c2:
+        st.metric("Probabilità di perdita PAC", f"{distribuzione['prob_perdita']:.0%}")
+    with c3:
+        st.metric("Probabilità di perdita PIC", f"{distribuzione['prob_perdita_pic']:.0%}")
+    
+    df_distribuzione = pd.DataFrame({
+        "Percentile": [f"P{p}" for p in distribuzione['percentili']],
+        "Valore finale PAC": [f"€{v:,.0f}" for v in distribuzione['percentili'].values()],
+        "Valore finale PIC": [f"€{v:,.0f}" for v in distribuzione['percentili_pic'].values()]
+    })
+    
+    st.dataframe(df_distribuzione, hide_index=True, use_container_width=True)
+    
+    st.info("""
+    💡 Con prezzi che in media salgono il PIC vince più spesso, perché tutto il capitale
+    resta investito più a lungo; il PAC restringe però la distribuzione dei risultati
+    e riduce l'esito negli scenari peggiori.
+    """)
+
+
+@cronometra
+def render_quiz():
+    """Renderizza il quiz di verifica"""
+    render_quiz_capitolo(CAPITOLO_NUM, INDICE_QUIZ)
 
 
+@cronometra
 def render_takeaways():
     """Renderizza i punti chiave"""
     
@@ -732,6 +651,7 @@ def render_takeaways():
         """)
 
 
+@cronometra
 def render():
     """Funzione principale per renderizzare il capitolo"""
     
@@ -744,21 +664,10 @@ def render():
     
     st.markdown("---")
     
-    tab1, tab2, tab3, tab4 = st.tabs([
-        "📚 Contenuto", 
-        "🧮 Calcolatori", 
-        "📝 Quiz",
-        "💡 Takeaways"
-    ])
-    
-    with tab1:
-        render_contenuto()
-    
-    with tab2:
-        render_calcolatore()
-    
-    with tab3:
-        render_quiz()
-    
-    with tab4:
-        render_takeaways()
+    # Sezioni: viene eseguita solo quella selezionata
+    render_sezioni(f"cap{CAPITOLO_NUM}", {
+        "📚 Contenuto": render_contenuto,
+        "🧮 Calcolatori": render_calcolatore,
+        "📝 Quiz": render_quiz,
+        "💡 Takeaways": render_takeaways
+    }, CHIAVI_WIDGET)
@@ -6,6 +6,14 @@ InvestAccademy - Corso di Finanza Personale
 import streamlit as st
 import pandas as pd
 
+from finanza.ribilanciamento import (calcola_ribilanciamento, simula_drift, confronta_politiche,
+                                     ottimizza_ribilanciamento)
+from finanza.portafoglio import ASSET
+from finanza.tempi import cronometra
+
+from .componenti import render_sezioni, segna_calcolatore, grafico_linee
+from .quiz import indicizza_quiz, chiavi_quiz, render_quiz_capitolo
+
 # Metadata
 CAPITOLO_NUM = 13
 TITOLO = "Ribilanciamento del portafoglio"
@@ -74,71 +82,19 @@ QUIZ = [
     }
 ]
 
+# Domande indicizzate una volta sola, all'import del modulo
+INDICE_QUIZ = indicizza_quiz(QUIZ)
 
-def calcola_ribilanciamento(portafoglio_attuale: dict, target: dict) -> dict:
-    """Calcola le operazioni necessarie per il ribilanciamento"""
-    
-    valore_totale = sum(portafoglio_attuale.values())
-    
-    scostamenti = {}
-    operazioni = {}
-    
-    for asset, valore_attuale in portafoglio_attuale.items():
-        perc_attuale = (valore_attuale / valore_totale * 100) if valore_totale > 0 else 0
-        perc_target = target.get(asset, 0)
-        
-        scostamento = perc_attuale - perc_target
-        valore_target = valore_totale * (perc_target / 100)
-        operazione = valore_target - valore_attuale
-        
-        scostamenti[asset] = {
-            "valore_attuale": valore_attuale,
-            "perc_attuale": perc_attuale,
-            "perc_target": perc_target,
-            "scostamento": scostamento,
-            "valore_target": valore_target,
-            "operazione": operazione
-        }
-        
-        operazioni[asset] = operazione
-    
-    return {
-        "scostamenti": scostamenti,
-        "operazioni": operazioni,
-        "valore_totale": valore_totale,
-        "necessario": any(abs(s["scostamento"]) > 5 for s in scostamenti.values())
-    }
-
-
-def simula_drift(azioni_iniz: float, obblig_iniz: float, anni: int, 
-                 rend_azioni: float, rend_obblig: float) -> list:
-    """Simula il drift del portafoglio senza ribilanciamento"""
-    
-    evoluzione = []
-    azioni = azioni_iniz
-    obblig = obblig_iniz
-    
-    for anno in range(anni + 1):
-        totale = azioni + obblig
-        perc_azioni = (azioni / totale * 100) if totale > 0 else 0
-        perc_obblig = (obblig / totale * 100) if totale > 0 else 0
-        
-        evoluzione.append({
-            "anno": anno,
-            "azioni": azioni,
-            "obbligazioni": obblig,
-            "totale": totale,
-            "perc_azioni": perc_azioni,
-            "perc_obbligazioni": perc_obblig
-        })
-        
-        if anno < anni:
-            azioni = azioni * (1 + rend_azioni / 100)
-            obblig = obblig * (1 + rend_obblig / 100)
-    
-    return evoluzione
+# Widget il cui valore va conservato cambiando sezione (esclusi i pulsanti)
+CHIAVI_WIDGET = (
+    "cap13_calcolatore", "cap13_azioni_att", "cap13_obblig_att", "cap13_liquid_att", "cap13_target_az",
+    "cap13_target_ob", "cap13_versamento", "cap13_banda", "cap13_drift_az", "cap13_drift_ob",
+    "cap13_drift_anni", "cap13_drift_rend_az", "cap13_drift_rend_ob", "cap13_strat_az",
+    "cap13_strat_ob", "cap13_strat_anni", "cap13_strat_banda", "cap13_strat_costo"
+) + chiavi_quiz(CAPITOLO_NUM, INDICE_QUIZ)
 
 
+@cronometra
 def render_contenuto():
     """Renderizza il contenuto teorico"""
     
@@ -333,6 +289,7 @@ def render_contenuto():
     """)
 
 
+@cronometra
 def render_calcolatore():
     """Renderizza i calcolatori"""
     
@@ -340,18 +297,25 @@ def render_calcolatore():
     
     calc_type = st.radio(
         "Seleziona calcolatore:",
-        ["Calcola Ribilanciamento", "Simula Drift Portafoglio"],
-        horizontal=True
+        ["Calcola Ribilanciamento", "Simula Drift Portafoglio", "Confronta Strategie"],
+        horizontal=True,
+        key="cap13_calcolatore"
     )
     
+    segna_calcolatore(CAPITOLO_NUM, calc_type)
+    
     st.markdown("---")
     
     if calc_type == "Calcola Ribilanciamento":
         render_calc_ribilanciamento()
-    else:
+    elif calc_type == "Simula Drift Portafoglio":
         render_calc_drift()
+    else:
+        render_calc_strategie()
 
 
+@st.fragment
+@cronometra
 def render_calc_ribilanciamento():
     """Calcolatore ribilanciamento necessario"""
     
@@ -409,6 +373,25 @@ def render_calc_ribilanciamento():
         target_liquid = 100 - target_azioni - target_obblig
         
         st.metric("Target Liquidità", f"{target_liquid}%")
+        
+        st.markdown("---")
+        
+        versamento = st.number_input(
+            "💶 Nuovo versamento (€)",
+            min_value=0.0,
+            value=0.0,
+            step=1000.0,
+            key="cap13_versamento"
+        )
+        
+        banda = st.slider(
+            "Banda di tolleranza (± punti %)",
+            min_value=1.0,
+            max_value=20.0,
+            value=5.0,
+            step=1.0,
+            key="cap13_banda"
+        )
     
     with col2:
         portafoglio_attuale = {
@@ -423,7 +406,14 @@ def render_calc_ribilanciamento():
             "Liquidità": target_liquid
         }
         
-        risultato = calcola_ribilanciamento(portafoglio_attuale, target)
+        risultato = calcola_ribilanciamento(portafoglio_attuale, target, soglia=banda)
+        ottimizzato = ottimizza_ribilanciamento(
+            list(portafoglio_attuale.values()),
+            range(len(portafoglio_attuale)),
+            list(target.values()),
+            banda,
+            versamento
+        )
         
         st.markdown("### Analisi")
         
@@ -441,19 +431,28 @@ def render_calc_ribilanciamento():
         st.markdown("---")
         
         # Verifica se necessario
-        if risultato["necessario"]:
-            st.warning("⚠️ Ribilanciamento consigliato (scostamento > 5%)")
+        if risultato["necessario"] or versamento > 0:
+            if risultato["necessario"]:
+                st.warning(f"⚠️ Ribilanciamento consigliato (scostamento > {banda:g}%)")
             
-            st.markdown("#### 🔄 Operazioni Necessarie")
+            st.markdown("#### 🔄 Operazioni Minime")
             
-            for asset, operazione in risultato["operazioni"].items():
+            for asset, operazione in zip(portafoglio_attuale, ottimizzato["operazioni"]):
                 if abs(operazione) > 100:  # Solo se significativo
                     if operazione > 0:
                         st.success(f"✅ **{asset}:** Acquistare €{operazione:,.0f}")
                     else:
                         st.error(f"📤 **{asset}:** Vendere €{abs(operazione):,.0f}")
+            
+            if ottimizzato["solo_contributo"]:
+                st.info("💡 Basta indirizzare il nuovo versamento: nessuna vendita necessaria.")
+            
+            st.caption(
+                "Le asset class fuori banda vengono riportate al bordo della banda, non al target: "
+                "si scambia il minimo indispensabile."
+            )
         else:
-            st.success("✅ Portafoglio in linea con il target (scostamento < 5%)")
+            st.success(f"✅ Portafoglio in linea con il target (scostamento < {banda:g}%)")
         
         # Grafico
         st.markdown("#### 📊 Visualizzazione")
@@ -466,6 +465,8 @@ def render_calc_ribilanciamento():
         st.bar_chart(chart_data)
 
 
+@st.fragment
+@cronometra
 def render_calc_drift():
     """Simulatore drift del portafoglio"""
     
@@ -525,7 +526,7 @@ def render_calc_drift():
         evoluzione = simula_drift(azioni_iniz, obblig_iniz, anni, rend_azioni, rend_obblig)
         
         perc_azioni_iniz = azioni_iniz / (azioni_iniz + obblig_iniz) * 100
-        perc_azioni_fine = evoluzione[-1]["perc_azioni"]
+        perc_azioni_fine = evoluzione["perc_azioni"][-1]
         drift = perc_azioni_fine - perc_azioni_iniz
         
         st.markdown("### Risultato Simulazione")
@@ -542,7 +543,7 @@ def render_calc_drift():
                 f"{perc_azioni_fine:.1f}%",
                 f"{drift:+.1f}%"
             )
-            st.metric("Valore finale", f"€{evoluzione[-1]['totale']:,.0f}")
+            st.metric("Valore finale", f"€{evoluzione['totale'][-1]:,.0f}")
         
         if abs(drift) > 10:
             st.warning(f"⚠️ Drift significativo: {drift:+.1f}%")
@@ -554,15 +555,10 @@ def render_calc_drift():
     st.markdown("---")
     st.markdown("### 📈 Evoluzione nel Tempo")
     
-    df_evoluzione = pd.DataFrame(evoluzione)
-    
-    chart_data = pd.DataFrame({
-        "Anno": df_evoluzione['anno'],
-        "% Azioni": df_evoluzione['perc_azioni'],
-        "% Obbligazioni": df_evoluzione['perc_obbligazioni']
-    })
-    
-    st.line_chart(chart_data.set_index("Anno"))
+    grafico_linee(evoluzione.tabella(
+        "perc_azioni", "perc_obbligazioni",
+        nomi={"anno": "Anno", "perc_azioni": "% Azioni", "perc_obbligazioni": "% Obbligazioni"}
+    ))
     
     st.info("""
     💡 **Interpretazione:**
@@ -574,59 +570,128 @@ def render_calc_drift():
     """)
 
 
-def render_quiz():
-    """Renderizza il quiz di verifica"""
+# Etichette delle politiche di ribilanciamento confrontate
+NOMI_POLITICHE = {
+    "mai": "Mai",
+    "annuale": "Annuale",
+    "trimestrale": "Trimestrale",
+    "bande": "Bande di tolleranza"
+}
+
+
+@st.fragment
+@cronometra
+def render_calc_strategie():
+    """Confronto tra strategie di ribilanciamento su scenari simulati"""
     
-    st.markdown("## 📝 Quiz di verifica")
+    st.markdown("### Confronta le Strategie di Ribilanciamento")
     
-    if "cap13_risposte" not in st.session_state:
-        st.session_state.cap13_risposte = {}
-    if "cap13_verificato" not in st.session_state:
-        st.session_state.cap13_verificato = False
+    st.markdown("""
+    Le quattro strategie vengono applicate agli stessi scenari di mercato simulati
+    (rendimenti mensili casuali di azioni, obbligazioni e oro).
+    """)
     
-    for i, q in enumerate(QUIZ):
-        with st.container(border=True):
-            st.markdown(f"**Domanda {i+1}:** {q['domanda']}")
-            
-            if q["tipo"] == "vero_falso":
-                risposta = st.radio(
-                    "Seleziona:",
-                    ["Vero", "Falso"],
-                    key=f"cap13_q{q['id']}",
-                    horizontal=True
-                )
-                st.session_state.cap13_risposte[q['id']] = risposta == "Vero"
-                
-            elif q["tipo"] == "scelta_multipla":
-                risposta = st.radio(
-                    "Seleziona:",
-                    q["opzioni"],
-                    key=f"cap13_q{q['id']}"
-                )
-                st.session_state.cap13_risposte[q['id']] = risposta
-            
-            if st.session_state.cap13_verificato:
-                user_ans = st.session_state.cap13_risposte.get(q['id'])
-                corretto = user_ans == q["risposta_corretta"]
-                
-                if corretto:
-                    st.success(f"✅ Corretto! {q['spiegazione']}")
-                else:
-                    st.error(f"❌ Sbagliato. Risposta corretta: {q['risposta_corretta']}")
-                    st.info(q['spiegazione'])
+    col1, col2 = st.columns([1, 2])
     
-    col1, col2 = st.columns(2)
     with col1:
-        if st.button("✅ Verifica risposte", type="primary", use_container_width=True, key="cap13_verifica"):
-            st.session_state.cap13_verificato = True
-            st.rerun()
+        target_azioni = st.slider(
+            "Target Azioni (%)",
+            min_value=0,
+            max_value=95,
+            value=60,
+            key="cap13_strat_az"
+        )
+        
+        # Il target obbligazioni non può superare lo spazio lasciato dalle azioni
+        if st.session_state.get("cap13_strat_ob", 0) > 100 - target_azioni:
+            st.session_state["cap13_strat_ob"] = 100 - target_azioni
+        
+        target_obblig = st.slider(
+            "Target Obbligazioni (%)",
+            min_value=0,
+            max_value=100 - target_azioni,
+            value=min(35, 100 - target_azioni),
+            key="cap13_strat_ob"
+        )
+        
+        target_oro = 100 - target_azioni - target_obblig
+        st.metric("Target Oro", f"{target_oro}%")
+        
+        anni = st.slider(
+            "Anni di simulazione",
+            min_value=1,
+            max_value=30,
+            value=20,
+            key="cap13_strat_anni"
+        )
+        
+        banda = st.slider(
+            "Banda di tolleranza (± punti %)",
+            min_value=1.0,
+            max_value=20.0,
+            value=5.0,
+            step=1.0,
+            key="cap13_strat_banda"
+        )
+        
+        costo = st.slider(
+            "Costo per operazione (% dell'importo)",
+            min_value=0.0,
+            max_value=2.0,
+            value=0.1,
+            step=0.05,
+            key="cap13_strat_costo"
+        )
+    
     with col2:
-        if st.button("🔄 Ricomincia", use_container_width=True, key="cap13_reset"):
-            st.session_state.cap13_verificato = False
-            st.session_state.cap13_risposte = {}
-            st.rerun()
+        confronto = confronta_politiche(
+            (target_azioni, target_obblig, target_oro), anni, banda, costo_transazione=costo
+        )
+        
+        df_confronto = pd.DataFrame({
+            "Strategia": [NOMI_POLITICHE[p] for p in confronto],
+            "Valore mediano": [f"€{c['valore_mediano']:,.0f}" for c in confronto.values()],
+            "Scenario pessimistico (P5)": [f"€{c['valore_p5']:,.0f}" for c in confronto.values()],
+            "Drift massimo medio": [f"{c['drift_massimo_medio']:.1f}%" for c in confronto.values()],
+            "Ribilanciamenti": [f"{c['ribilanciamenti_medi']:.1f}" for c in confronto.values()],
+            "Operazioni": [f"{c['operazioni_medie']:.1f}" for c in confronto.values()],
+            "Turnover": [f"{c['turnover_medio']:.0f}%" for c in confronto.values()],
+            "Costi": [f"€{c['costi_medi']:,.0f}" for c in confronto.values()]
+        })
+        
+        st.dataframe(df_confronto, use_container_width=True, hide_index=True)
+        
+        st.caption(
+            "Valori medi su 2.000 scenari con capitale iniziale di €100.000. Il drift massimo è il "
+            "massimo scostamento di un asset dal target prima di ogni ribilanciamento."
+        )
+    
+    st.markdown("---")
+    st.markdown(f"### 📈 Peso Medio delle {ASSET[0]} nel Tempo")
+    
+    df_pesi = pd.DataFrame(
+        {NOMI_POLITICHE[p]: c["pesi_medi"][::12, 0] * 100 for p, c in confronto.items()},
+        index=pd.Index(range(anni + 1), name="Anno")
+    )
+    
+    grafico_linee(df_pesi)
+    
+    st.info("""
+    💡 **Interpretazione:**
+    
+    Senza ribilanciamento il rischio cresce nel tempo. Il ribilanciamento trimestrale
+    tiene l'allocazione più vicina al target ma richiede molte più operazioni; le bande
+    di tolleranza intervengono solo quando serve, con meno operazioni e costi.
+    """)
+
+
+@cronometra
+def render_quiz():
+    """Renderizza il quiz di verifica"""
+    render_quiz_capitolo(CAPITOLO_NUM, INDICE_QUIZ)
 
 
+@cronometra
 def render_takeaways():
     """Renderizza i punti chiave"""
     
@@ -676,6 +741,7 @@ def render_takeaways():
         """)
 
 
+@cronometra
 def render():
     """Funzione principale per renderizzare il capitolo"""
     
@@ -688,21 +754,10 @@ def render():
     
     st.markdown("---")
     
-    tab1, tab2, tab3, tab4 = st.tabs([
-        "📚 Contenuto", 
-        "🧮 Calcolatori", 
-        "📝 Quiz",
-        "💡 Takeaways"
-    ])
-    
-    with tab1:
-        render_contenuto()
-    
-    with tab2:
-        render_calcolatore()
-    
-    with tab3:
-        render_quiz()
-    
-    with tab4:
-        render_takeaways()
+    # Sezioni: viene eseguita solo quella selezionata
+    render_sezioni(f"cap{CAPITOLO_NUM}", {
+        "📚 Contenuto": render_contenuto,
+        "🧮 Calcolatori": render_calcolatore,
+        "📝 Quiz": render_quiz,
+        "💡 Takeaways": render_takeaways
+    }, CHIAVI_WIDGET)
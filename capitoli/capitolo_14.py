@@ -5,6 +5,13 @@ InvestAccademy - Corso di Finanza Personale
 
 import streamlit as st
 import pandas as pd
+import numpy as np
+
+from finanza.fiscalita import calcola_impatto_tasse, calcola_rendimento_netto, simula_trading_vs_hold, mappa_trading_vs_hold
+from finanza.tempi import cronometra
+
+from .componenti import render_sezioni, segna_calcolatore, grafico_linee
+from .quiz import indicizza_quiz, chiavi_quiz, render_quiz_capitolo
 
 # Metadata
 CAPITOLO_NUM = 14
@@ -74,72 +81,19 @@ QUIZ = [
     }
 ]
 
+# Domande indicizzate una volta sola, all'import del modulo
+INDICE_QUIZ = indicizza_quiz(QUIZ)
 
-def calcola_impatto_tasse(capitale: float, rendimento: float, anni: int, 
-                          tassazione_annua: float, tassazione_differita: float) -> dict:
-    """Confronta tassazione annua vs differita"""
-    
-    # Tassazione annua
-    rend_netto_annuo = rendimento * (1 - tassazione_annua / 100)
-    capitale_tass_annua = capitale * ((1 + rend_netto_annuo / 100) ** anni)
-    
-    # Tassazione differita
-    capitale_lordo = capitale * ((1 + rendimento / 100) ** anni)
-    guadagno = capitale_lordo - capitale
-    tasse_finali = guadagno * (tassazione_differita / 100)
-    capitale_tass_diff = capitale_lordo - tasse_finali
-    
-    # Differenza
-    vantaggio_differimento = capitale_tass_diff - capitale_tass_annua
-    
-    return {
-        "capitale_tass_annua": capitale_tass_annua,
-        "capitale_tass_differita": capitale_tass_diff,
-        "vantaggio_differimento": vantaggio_differimento,
-        "tasse_annua_totali": capitale_tass_annua - capitale - (capitale * ((1 + rendimento / 100) ** anni) - capitale_tass_annua),
-        "tasse_differita_totali": tasse_finali
-    }
-
-
-def calcola_rendimento_netto(rendimento_lordo: float, tassazione: float, costi: float) -> float:
-    """Calcola il rendimento netto dopo tasse e costi"""
-    return rendimento_lordo - tassazione - costi
-
-
-def simula_trading_vs_hold(capitale: float, rendimento_annuo: float, anni: int,
-                           operazioni_anno: int, tassa_capital_gain: float) -> dict:
-    """Confronta trading frequente vs buy and hold"""
-    
-    # Buy and Hold
-    capitale_finale_hold = capitale * ((1 + rendimento_annuo / 100) ** anni)
-    guadagno_hold = capitale_finale_hold - capitale
-    tasse_hold = guadagno_hold * (tassa_capital_gain / 100)
-    netto_hold = capitale_finale_hold - tasse_hold
-    
-    # Trading frequente
-    capitale_trading = capitale
-    tasse_cumulate = 0
-    
-    rend_per_operazione = rendimento_annuo / operazioni_anno
-    
-    for anno in range(anni):
-        for _ in range(operazioni_anno):
-            guadagno_op = capitale_trading * (rend_per_operazione / 100)
-            tassa_op = guadagno_op * (tassa_capital_gain / 100)
-            capitale_trading = capitale_trading + guadagno_op - tassa_op
-            tasse_cumulate += tassa_op
-    
-    netto_trading = capitale_trading
-    
-    return {
-        "netto_hold": netto_hold,
-        "tasse_hold": tasse_hold,
-        "netto_trading": netto_trading,
-        "tasse_trading": tasse_cumulate,
-        "differenza": netto_hold - netto_trading
-    }
+# Widget il cui valore va conservato cambiando sezione (esclusi i pulsanti)
+CHIAVI_WIDGET = (
+    "cap14_calcolatore", "cap14_capitale", "cap14_rendimento", "cap14_anni", "cap14_tass_annua",
+    "cap14_tass_diff", "cap14_trade_cap", "cap14_trade_rend", "cap14_trade_anni", "cap14_trade_op",
+    "cap14_trade_tassa", "cap14_netto_lordo", "cap14_netto_tassa", "cap14_netto_costi",
+    "cap14_netto_cap", "cap14_netto_anni"
+) + chiavi_quiz(CAPITOLO_NUM, INDICE_QUIZ)
 
 
+@cronometra
 def render_contenuto():
     """Renderizza il contenuto teorico"""
     
@@ -350,6 +304,7 @@ def render_contenuto():
     """)
 
 
+@cronometra
 def render_calcolatore():
     """Renderizza i calcolatori"""
     
@@ -358,9 +313,12 @@ def render_calcolatore():
     calc_type = st.radio(
         "Seleziona calcolatore:",
         ["Impatto Tassazione", "Trading vs Buy & Hold", "Rendimento Netto"],
-        horizontal=True
+        horizontal=True,
+        key="cap14_calcolatore"
     )
     
+    segna_calcolatore(CAPITOLO_NUM, calc_type)
+    
     st.markdown("---")
     
     if calc_type == "Impatto Tassazione":
@@ -371,6 +329,8 @@ def render_calcolatore():
         render_calc_netto()
 
 
+@st.fragment
+@cronometra
 def render_calc_tassazione():
     """Calcolatore impatto tassazione annua vs differita"""
     
@@ -462,6 +422,8 @@ def render_calc_tassazione():
         """)
 
 
+@st.fragment
+@cronometra
 def render_calc_trading():
     """Calcolatore trading frequente vs buy and hold"""
     
@@ -495,7 +457,7 @@ def render_calc_trading():
         anni = st.slider(
             "📅 Anni",
             min_value=1,
-            max_value=20,
+            max_value=40,
             value=10,
             key="cap14_trade_anni"
         )
@@ -503,7 +465,7 @@ def render_calc_trading():
         operazioni = st.slider(
             "🔄 Operazioni di compravendita all'anno",
             min_value=1,
-            max_value=50,
+            max_value=250,
             value=12,
             key="cap14_trade_op"
         )
@@ -553,8 +515,26 @@ def render_calc_trading():
         Ogni operazione in utile cristallizza una plusvalenza tassabile, riducendo il capitale 
         disponibile per l'interesse composto.
         """)
+    
+    st.markdown("---")
+    st.markdown("### 📈 Costo del Trading per Frequenza e Aliquota")
+    
+    aliquote = sorted({12.5, 26.0, tassa})
+    mappa = mappa_trading_vs_hold(capitale, rendimento, anni, np.arange(1, 251), aliquote)
+    
+    df_mappa = pd.DataFrame(
+        mappa['differenza'].T,
+        index=pd.Index(mappa['operazioni_anno'].astype(int), name="Operazioni all'anno"),
+        columns=[f"Tassazione {a:g}%" for a in aliquote]
+    )
+    
+    grafico_linee(df_mappa)
+    
+    st.caption("Differenza tra capitale finale buy & hold e trading frequente, in euro.")
 
 
+@st.fragment
+@cronometra
 def render_calc_netto():
     """Calcolatore rendimento netto"""
     
@@ -655,59 +635,13 @@ def render_calc_netto():
         """)
 
 
+@cronometra
 def render_quiz():
     """Renderizza il quiz di verifica"""
-    
-    st.markdown("## 📝 Quiz di verifica")
-    
-    if "cap14_risposte" not in st.session_state:
-        st.session_state.cap14_risposte = {}
-    if "cap14_verificato" not in st.session_state:
-        st.session_state.cap14_verificato = False
-    
-    for i, q in enumerate(QUIZ):
-        with st.container(border=True):
-            st.markdown(f"**Domanda {i+1}:** {q['domanda']}")
-            
-            if q["tipo"] == "vero_falso":
-                risposta = st.radio(
-                    "Seleziona:",
-                    ["Vero", "Falso"],
-                    key=f"cap14_q{q['id']}",
-                    horizontal=True
-                )
-                st.session_state.cap14_risposte[q['id']] = risposta == "Vero"
-                
-            elif q["tipo"] == "scelta_multipla":
-                risposta = st.radio(
-                    "Seleziona:",
-                    q["opzioni"],
-                    key=f"cap14_q{q['id']}"
-                )
-                st.session_state.cap14_risposte[q['id']] = risposta
-            
-            if st.session_state.cap14_verificato:
-                user_ans = st.session_state.cap14_risposte.get(q['id'])
-                corretto = user_ans == q["risposta_corretta"]
-                
-                if corretto:
-                    st.success(f"✅ Corretto! {q['spiegazione']}")
-                else:
-                    st.error(f"❌ Sbagliato. Risposta corretta: {q['risposta_corretta']}")
-                    st.info(q['spiegazione'])
-    
-    col1, col2 = st.columns(2)
-    with col1:
-        if st.button("✅ Verifica risposte", type="primary", use_container_width=True, key="cap14_verifica"):
-            st.session_state.cap14_verificato = True
-            st.rerun()
-    with col2:
-        if st.button("🔄 Ricomincia", use_container_width=True, key="cap14_reset"):
-            st.session_state.cap14_verificato = False
-            st.session_state.cap14_risposte = {}
-            st.rerun()
+    render_quiz_capitolo(CAPITOLO_NUM, INDICE_QUIZ)
 
 
+@cronometra
 def render_takeaways():
     """Renderizza i punti chiave"""
     
@@ -763,6 +697,7 @@ def render_takeaways():
         """)
 
 
+@cronometra
 def render():
     """Funzione principale per renderizzare il capitolo"""
     
@@ -775,21 +710,10 @@ def render():
     
     st.markdown("---")
     
-    tab1, tab2, tab3, tab4 = st.tabs([
-        "📚 Contenuto", 
-        "🧮 Calcolatori", 
-        "📝 Quiz",
-        "💡 Takeaways"
-    ])
-    
-    with tab1:
-        render_contenuto()
-    
-    with tab2:
-        render_calcolatore()
-    
-    with tab3:
-        render_quiz()
-    
-    with tab4:
-        render_takeaways()
+    # Sezioni: viene eseguita solo quella selezionata
+    render_sezioni(f"cap{CAPITOLO_NUM}", {
+        "📚 Contenuto": render_contenuto,
+        "🧮 Calcolatori": render_calcolatore,
+        "📝 Quiz": render_quiz,
+        "💡 Takeaways": render_takeaways
+    }, CHIAVI_WIDGET)
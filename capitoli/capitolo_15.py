@@ -6,10 +6,25 @@ InvestAccademy - Corso di Finanza Personale
 import streamlit as st
 import pandas as pd
 
+from finanza.comportamento import valuta_comportamento
+from finanza.tempi import cronometra
+from archivio.diario import (TIPI_DECISIONE, STATI_EMOTIVI, COERENZA, registra_decisione, decisioni,
+                             conta_per_trimestre, riepilogo)
+
+from .componenti import render_sezioni, segna_calcolatore
+from .utenti import utente_corrente
+from .quiz import indicizza_quiz, chiavi_quiz, render_quiz_capitolo
+
 # Metadata
 CAPITOLO_NUM = 15
 TITOLO = "Psicologia dell'investitore e bias comportamentali"
 
+# Secondi di attesa massima per il salvataggio di una decisione nel diario
+ATTESA_SALVATAGGIO = 5
+
+# Stati emotivi che segnalano una decisione presa d'impulso
+STATI_EMOTIVI_CRITICI = ("Panico", "Paura")
+
 OBIETTIVI = [
     "Comprendere perché la psicologia conta più della tecnica",
     "Riconoscere i principali bias comportamentali",
@@ -74,52 +89,18 @@ QUIZ = [
     }
 ]
 
+# Domande indicizzate una volta sola, all'import del modulo
+INDICE_QUIZ = indicizza_quiz(QUIZ)
 
-def valuta_comportamento(risposte: dict) -> dict:
-    """Valuta il profilo comportamentale dell'investitore"""
-    
-    punteggio = sum(risposte.values())
-    
-    if punteggio <= 6:
-        profilo = "Alto rischio emotivo"
-        descrizione = "Tendi a prendere decisioni guidate dalle emozioni. L'automazione è essenziale per te."
-        raccomandazioni = [
-            "Automatizza completamente investimenti e ribilanciamenti",
-            "Riduci drasticamente il monitoraggio del portafoglio",
-            "Scrivi regole precise e seguile meccanicamente",
-            "Considera un consulente che faccia da filtro emotivo"
-        ]
-        colore = "🔴"
-    elif punteggio <= 12:
-        profilo = "Rischio emotivo moderato"
-        descrizione = "Hai una buona consapevolezza ma sei ancora influenzabile dalle emozioni."
-        raccomandazioni = [
-            "Usa l'automazione per le decisioni principali",
-            "Controlla il portafoglio non più di una volta al trimestre",
-            "Mantieni un diario delle decisioni di investimento",
-            "Stabilisci regole chiare per situazioni di stress"
-        ]
-        colore = "🟡"
-    else:
-        profilo = "Buona disciplina emotiva"
-        descrizione = "Hai sviluppato una buona capacità di gestire le emozioni negli investimenti."
-        raccomandazioni = [
-            "Mantieni comunque automazione per coerenza",
-            "Monitora periodicamente i tuoi bias residui",
-            "Continua a seguire regole prestabilite",
-            "Non sottovalutare mai il potere delle emozioni"
-        ]
-        colore = "🟢"
-    
-    return {
-        "punteggio": punteggio,
-        "profilo": profilo,
-        "descrizione": descrizione,
-        "raccomandazioni": raccomandazioni,
-        "colore": colore
-    }
+# Widget il cui valore va conservato cambiando sezione (esclusi i pulsanti)
+CHIAVI_WIDGET = (
+    "cap15_calcolatore", "cap15_comportamento_*", "cap15_diario_data", "cap15_diario_tipo",
+    "cap15_diario_descrizione", "cap15_diario_stato", "cap15_diario_motivazione",
+    "cap15_diario_coerenza", "cap15_storico_tipo", "cap15_storico_stato"
+) + chiavi_quiz(CAPITOLO_NUM, INDICE_QUIZ)
 
 
+@cronometra
 def render_contenuto():
     """Renderizza il contenuto teorico"""
     
@@ -355,6 +336,7 @@ def render_contenuto():
         """)
 
 
+@cronometra
 def render_calcolatore():
     """Renderizza i calcolatori"""
     
@@ -363,9 +345,12 @@ def render_calcolatore():
     calc_type = st.radio(
         "Seleziona:",
         ["Test Profilo Comportamentale", "Diario Decisioni"],
-        horizontal=True
+        horizontal=True,
+        key="cap15_calcolatore"
     )
     
+    segna_calcolatore(CAPITOLO_NUM, calc_type)
+    
     st.markdown("---")
     
     if calc_type == "Test Profilo Comportamentale":
@@ -374,6 +359,8 @@ def render_calcolatore():
         render_diario()
 
 
+@st.fragment
+@cronometra
 def render_test_comportamentale():
     """Test per valutare il profilo comportamentale"""
     
@@ -490,6 +477,8 @@ def render_test_comportamentale():
             """)
 
 
+@st.fragment
+@cronometra
 def render_diario():
     """Template per diario delle decisioni"""
     
@@ -505,37 +494,52 @@ def render_diario():
     
     st.markdown("---")
     
+    utente = utente_corrente()
+    
     with st.expander("📝 Template Decisione", expanded=True):
-        data = st.date_input("Data decisione")
+        data = st.date_input("Data decisione", key="cap15_diario_data")
         
         tipo_decisione = st.selectbox(
             "Tipo di decisione",
-            ["Acquisto", "Vendita", "Ribilanciamento", "Modifica piano", "Altro"]
+            TIPI_DECISIONE,
+            key="cap15_diario_tipo"
         )
         
         descrizione = st.text_area(
             "Descrizione della decisione",
-            placeholder="Es: Ho venduto il 50% delle azioni perché..."
+            placeholder="Es: Ho venduto il 50% delle azioni perché...",
+            key="cap15_diario_descrizione"
         )
         
         stato_emotivo = st.select_slider(
             "Il mio stato emotivo",
-            options=["Panico", "Paura", "Preoccupazione", "Neutrale", "Fiducioso", "Euforico"]
+            options=STATI_EMOTIVI,
+            key="cap15_diario_stato"
         )
         
         motivazione = st.text_area(
             "Motivazione razionale",
-            placeholder="Perché questa decisione è coerente con il mio piano?"
+            placeholder="Perché questa decisione è coerente con il mio piano?",
+            key="cap15_diario_motivazione"
         )
         
         coerenza_piano = st.radio(
             "Questa decisione è coerente con il mio piano?",
-            ["Sì", "No", "Non sono sicuro"],
-            horizontal=True
+            COERENZA,
+            horizontal=True,
+            key="cap15_diario_coerenza"
         )
         
-        if st.button("💾 Salva nel diario"):
-            st.success("✅ Decisione registrata!")
+        if st.button("💾 Salva nel diario", key="cap15_diario_salva"):
+            salvataggio = registra_decisione(
+                utente, data, tipo_decisione, stato_emotivo, coerenza_piano, descrizione, motivazione
+            )
+            try:
+                salvataggio.result(timeout=ATTESA_SALVATAGGIO)
+            except Exception:
+                st.error("❌ Non è stato possibile salvare la decisione. Riprova tra qualche istante.")
+            else:
+                st.success("✅ Decisione registrata!")
             
             st.info("""
             💡 **Suggerimento:**
@@ -546,6 +550,10 @@ def render_diario():
     
     st.markdown("---")
     
+    render_storico_diario(utente)
+    
+    st.markdown("---")
+    
     with st.expander("🔍 Domande di riflessione (da compilare periodicamente)"):
         st.markdown("""
         **Ogni 3 mesi, rispondi:**
@@ -567,59 +575,70 @@ def render_diario():
         """)
 
 
-def render_quiz():
-    """Renderizza il quiz di verifica"""
+@cronometra
+def render_storico_diario(utente: str):
+    """Decisioni salvate nel diario, con filtri e conteggi per trimestre"""
     
-    st.markdown("## 📝 Quiz di verifica")
+    st.markdown("### 📚 Il Tuo Diario")
     
-    if "cap15_risposte" not in st.session_state:
-        st.session_state.cap15_risposte = {}
-    if "cap15_verificato" not in st.session_state:
-        st.session_state.cap15_verificato = False
+    sintesi = riepilogo(utente)
     
-    for i, q in enumerate(QUIZ):
-        with st.container(border=True):
-            st.markdown(f"**Domanda {i+1}:** {q['domanda']}")
-            
-            if q["tipo"] == "vero_falso":
-                risposta = st.radio(
-                    "Seleziona:",
-                    ["Vero", "Falso"],
-                    key=f"cap15_q{q['id']}",
-                    horizontal=True
-                )
-                st.session_state.cap15_risposte[q['id']] = risposta == "Vero"
-                
-            elif q["tipo"] == "scelta_multipla":
-                risposta = st.radio(
-                    "Seleziona:",
-                    q["opzioni"],
-                    key=f"cap15_q{q['id']}"
-                )
-                st.session_state.cap15_risposte[q['id']] = risposta
-            
-            if st.session_state.cap15_verificato:
-                user_ans = st.session_state.cap15_risposte.get(q['id'])
-                corretto = user_ans == q["risposta_corretta"]
-                
-                if corretto:
-                    st.success(f"✅ Corretto! {q['spiegazione']}")
-                else:
-                    st.error(f"❌ Sbagliato. Risposta corretta: {q['risposta_corretta']}")
-                    st.info(q['spiegazione'])
+    if sintesi["totale"] == 0:
+        st.caption("Nessuna decisione salvata finora. Le decisioni registrate compariranno qui.")
+        return
+    
+    emotive = sum(sintesi["per_stato"].get(s, 0) for s in STATI_EMOTIVI_CRITICI)
+    
+    c1, c2, c3 = st.columns(3)
+    with c1:
+        st.metric("Decisioni registrate", sintesi["totale"])
+    with c2:
+        st.metric("Prese con panico o paura", f"{emotive / sintesi['totale']:.0%}")
+    with c3:
+        st.metric("Non coerenti con il piano", f"{sintesi['per_coerenza'].get('No', 0) / sintesi['totale']:.0%}")
     
     col1, col2 = st.columns(2)
     with col1:
-        if st.button("✅ Verifica risposte", type="primary", use_container_width=True, key="cap15_verifica"):
-            st.session_state.cap15_verificato = True
-            st.rerun()
+        filtro_tipo = st.selectbox("Tipo", ("Tutti",) + TIPI_DECISIONE, key="cap15_storico_tipo")
     with col2:
-        if st.button("🔄 Ricomincia", use_container_width=True, key="cap15_reset"):
-            st.session_state.cap15_verificato = False
-            st.session_state.cap15_risposte = {}
-            st.rerun()
+        filtro_stato = st.selectbox("Stato emotivo", ("Tutti",) + STATI_EMOTIVI, key="cap15_storico_stato")
+    
+    filtri = {
+        "tipo": None if filtro_tipo == "Tutti" else filtro_tipo,
+        "stato_emotivo": None if filtro_stato == "Tutti" else filtro_stato
+    }
+    
+    per_trimestre = conta_per_trimestre(utente, raggruppa="stato_emotivo", **filtri)
+    if per_trimestre:
+        df_trimestri = pd.DataFrame(per_trimestre).pivot(
+            index="trimestre", columns="stato_emotivo", values="decisioni"
+        ).fillna(0)
+        st.markdown("#### Decisioni per trimestre")
+        st.bar_chart(df_trimestri[[s for s in STATI_EMOTIVI if s in df_trimestri.columns]])
+    
+    recenti = decisioni(utente, limite=20, **filtri)
+    if recenti:
+        df_recenti = pd.DataFrame(recenti).drop(columns="id").rename(columns={
+            "data": "Data",
+            "tipo": "Tipo",
+            "stato_emotivo": "Stato emotivo",
+            "coerenza": "Coerente",
+            "descrizione": "Descrizione",
+            "motivazione": "Motivazione"
+        })
+        st.markdown("#### Ultime decisioni")
+        st.dataframe(df_recenti, use_container_width=True, hide_index=True)
+    else:
+        st.caption("Nessuna decisione corrisponde ai filtri selezionati.")
 
 
+@cronometra
+def render_quiz():
+    """Renderizza il quiz di verifica"""
+    render_quiz_capitolo(CAPITOLO_NUM, INDICE_QUIZ)
+
+
+@cronometra
 def render_takeaways():
     """Renderizza i punti chiave"""
     
@@ -695,6 +714,7 @@ def render_takeaways():
         """)
 
 
+@cronometra
 def render():
     """Funzione principale per renderizzare il capitolo"""
     
@@ -707,21 +727,10 @@ def render():
     
     st.markdown("---")
     
-    tab1, tab2, tab3, tab4 = st.tabs([
-        "📚 Contenuto", 
-        "🧮 Test", 
-        "📝 Quiz",
-        "💡 Takeaways"
-    ])
-    
-    with tab1:
-        render_contenuto()
-    
-    with tab2:
-        render_calcolatore()
-    
-    with tab3:
-        render_quiz()
-    
-    with tab4:
-        render_takeaways()
+    # Sezioni: viene eseguita solo quella selezionata
+    render_sezioni(f"cap{CAPITOLO_NUM}", {
+        "📚 Contenuto": render_contenuto,
+        "🧮 Test": render_calcolatore,
+        "📝 Quiz": render_quiz,
+        "💡 Takeaways": render_takeaways
+    }, CHIAVI_WIDGET)
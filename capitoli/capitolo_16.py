@@ -6,6 +6,12 @@ InvestAccademy - Corso di Finanza Personale
 import streamlit as st
 import pandas as pd
 
+from finanza.comportamento import valuta_readiness
+from finanza.tempi import cronometra
+
+from .componenti import render_sezioni, segna_calcolatore
+from .quiz import indicizza_quiz, chiavi_quiz, render_quiz_capitolo
+
 # Metadata
 CAPITOLO_NUM = 16
 TITOLO = "Errori comuni negli investimenti e checklist finale"
@@ -74,56 +80,21 @@ QUIZ = [
     }
 ]
 
+# Domande indicizzate una volta sola, all'import del modulo
+INDICE_QUIZ = indicizza_quiz(QUIZ)
 
-def valuta_readiness(risposte: dict) -> dict:
-    """Valuta la preparazione dell'investitore"""
-    
-    punteggio = sum(risposte.values())
-    max_punteggio = len(risposte) * 3
-    percentuale = (punteggio / max_punteggio) * 100
-    
-    if percentuale >= 80:
-        livello = "Pronto per investire"
-        descrizione = "Hai una solida base e sei pronto per iniziare o continuare a investire con consapevolezza."
-        colore = "🟢"
-        prossimi_passi = [
-            "Implementa il tuo piano di investimento",
-            "Mantieni la disciplina nel tempo",
-            "Rivedi il piano annualmente",
-            "Continua a formarti"
-        ]
-    elif percentuale >= 60:
-        livello = "Quasi pronto"
-        descrizione = "Hai una buona base ma ci sono ancora alcuni aspetti da consolidare prima di investire."
-        colore = "🟡"
-        prossimi_passi = [
-            "Completa il fondo emergenze",
-            "Definisci meglio gli obiettivi",
-            "Studia gli aspetti meno chiari",
-            "Fai un piano scritto dettagliato"
-        ]
-    else:
-        livello = "Serve più preparazione"
-        descrizione = "È importante consolidare le basi prima di investire per evitare errori costosi."
-        colore = "🔴"
-        prossimi_passi = [
-            "Concentrati su risparmio e fondo emergenze",
-            "Studia i capitoli che hai trovato più difficili",
-            "Non investire ancora - costruisci le fondamenta",
-            "Considera di consultare un professionista"
-        ]
-    
-    return {
-        "punteggio": punteggio,
-        "max_punteggio": max_punteggio,
-        "percentuale": percentuale,
-        "livello": livello,
-        "descrizione": descrizione,
-        "colore": colore,
-        "prossimi_passi": prossimi_passi
-    }
+# Widget il cui valore va conservato cambiando sezione (esclusi i pulsanti)
+CHIAVI_WIDGET = (
+    "cap16_calcolatore", "cap16_score_*", "cap16_situazione", "cap16_conoscenze", "cap16_forza",
+    "cap16_miglioramento", "cap16_obj_*", "cap16_obj_mis_*", "cap16_obj_data_*", "cap16_azione_*",
+    "cap16_azione_det_*", "cap16_regola_allocazione", "cap16_regola_frequenza",
+    "cap16_regola_ribilancio", "cap16_regola_ribasso", "cap16_regola_divieti",
+    "cap16_revisione_trimestrale", "cap16_revisione_semestrale", "cap16_revisione_annuale",
+    "cap16_revisione_straordinaria"
+) + chiavi_quiz(CAPITOLO_NUM, INDICE_QUIZ)
 
 
+@cronometra
 def render_contenuto():
     """Renderizza il contenuto teorico"""
     
@@ -368,6 +339,7 @@ def render_contenuto():
         """)
 
 
+@cronometra
 def render_calcolatore():
     """Renderizza gli strumenti di autovalutazione"""
     
@@ -376,9 +348,12 @@ def render_calcolatore():
     calc_type = st.radio(
         "Seleziona:",
         ["Scorecard Preparazione", "Piano d'Azione Personale"],
-        horizontal=True
+        horizontal=True,
+        key="cap16_calcolatore"
     )
     
+    segna_calcolatore(CAPITOLO_NUM, calc_type)
+    
     st.markdown("---")
     
     if calc_type == "Scorecard Preparazione":
@@ -387,6 +362,8 @@ def render_calcolatore():
         render_piano_azione()
 
 
+@st.fragment
+@cronometra
 def render_scorecard():
     """Scorecard di autovalutazione della preparazione"""
     
@@ -534,6 +511,8 @@ def render_scorecard():
             """)
 
 
+@st.fragment
+@cronometra
 def render_piano_azione():
     """Template piano d'azione personale"""
     
@@ -550,12 +529,12 @@ def render_piano_azione():
         col1, col2 = st.columns(2)
         
         with col1:
-            st.text_area("Situazione finanziaria", placeholder="Reddito, spese, debiti, risparmio attuale...")
-            st.text_area("Conoscenze acquisite", placeholder="Cosa ho imparato da questo corso...")
+            st.text_area("Situazione finanziaria", placeholder="Reddito, spese, debiti, risparmio attuale...", key="cap16_situazione")
+            st.text_area("Conoscenze acquisite", placeholder="Cosa ho imparato da questo corso...", key="cap16_conoscenze")
         
         with col2:
-            st.text_area("Punti di forza", placeholder="Cosa sto già facendo bene...")
-            st.text_area("Aree da migliorare", placeholder="Cosa devo ancora consolidare...")
+            st.text_area("Punti di forza", placeholder="Cosa sto già facendo bene...", key="cap16_forza")
+            st.text_area("Aree da migliorare", placeholder="Cosa devo ancora consolidare...", key="cap16_miglioramento")
     
     with st.expander("🎯 2. Obiettivi (prossimi 12 mesi)"):
         st.markdown("**Definisci 3-5 obiettivi SMART:**")
@@ -590,19 +569,19 @@ def render_piano_azione():
     with st.expander("🎯 4. Regole di Investimento"):
         st.markdown("**Le mie regole non negoziabili:**")
         
-        st.text_area("Asset allocation target", placeholder="Es: 60% azioni, 35% obbligazioni, 5% liquidità")
-        st.text_area("Frequenza controllo portafoglio", placeholder="Es: Trimestrale")
-        st.text_area("Quando ribilancio", placeholder="Es: Annualmente o quando scostamento > 5%")
-        st.text_area("In caso di ribasso del 20% farò", placeholder="Es: Mantengo e continuo PAC")
-        st.text_area("NON farò mai", placeholder="Es: Vendere in panico, inseguire mode, trading frequente")
+        st.text_area("Asset allocation target", placeholder="Es: 60% azioni, 35% obbligazioni, 5% liquidità", key="cap16_regola_allocazione")
+        st.text_area("Frequenza controllo portafoglio", placeholder="Es: Trimestrale", key="cap16_regola_frequenza")
+        st.text_area("Quando ribilancio", placeholder="Es: Annualmente o quando scostamento > 5%", key="cap16_regola_ribilancio")
+        st.text_area("In caso di ribasso del 20% farò", placeholder="Es: Mantengo e continuo PAC", key="cap16_regola_ribasso")
+        st.text_area("NON farò mai", placeholder="Es: Vendere in panico, inseguire mode, trading frequente", key="cap16_regola_divieti")
     
     with st.expander("🎯 5. Milestone e Revisioni"):
         st.markdown("**Quando rivederò e aggiornerò il piano:**")
         
-        st.checkbox("Revisione trimestrale (controllo aderenza al piano)")
-        st.checkbox("Revisione semestrale (verifica obiettivi)")
-        st.checkbox("Revisione annuale (aggiornamento strategico completo)")
-        st.checkbox("In caso di cambiamenti significativi (lavoro, famiglia, salute)")
+        st.checkbox("Revisione trimestrale (controllo aderenza al piano)", key="cap16_revisione_trimestrale")
+        st.checkbox("Revisione semestrale (verifica obiettivi)", key="cap16_revisione_semestrale")
+        st.checkbox("Revisione annuale (aggiornamento strategico completo)", key="cap16_revisione_annuale")
+        st.checkbox("In caso di cambiamenti significativi (lavoro, famiglia, salute)", key="cap16_revisione_straordinaria")
     
     if st.button("💾 Salva Piano", type="primary"):
         st.success("""
@@ -615,59 +594,13 @@ def render_piano_azione():
         """)
 
 
+@cronometra
 def render_quiz():
     """Renderizza il quiz di verifica"""
-    
-    st.markdown("## 📝 Quiz di verifica")
-    
-    if "cap16_risposte" not in st.session_state:
-        st.session_state.cap16_risposte = {}
-    if "cap16_verificato" not in st.session_state:
-        st.session_state.cap16_verificato = False
-    
-    for i, q in enumerate(QUIZ):
-        with st.container(border=True):
-            st.markdown(f"**Domanda {i+1}:** {q['domanda']}")
-            
-            if q["tipo"] == "vero_falso":
-                risposta = st.radio(
-                    "Seleziona:",
-                    ["Vero", "Falso"],
-                    key=f"cap16_q{q['id']}",
-                    horizontal=True
-                )
-                st.session_state.cap16_risposte[q['id']] = risposta == "Vero"
-                
-            elif q["tipo"] == "scelta_multipla":
-                risposta = st.radio(
-                    "Seleziona:",
-                    q["opzioni"],
-                    key=f"cap16_q{q['id']}"
-                )
-                st.session_state.cap16_risposte[q['id']] = risposta
-            
-            if st.session_state.cap16_verificato:
-                user_ans = st.session_state.cap16_risposte.get(q['id'])
-                corretto = user_ans == q["risposta_corretta"]
-                
-                if corretto:
-                    st.success(f"✅ Corretto! {q['spiegazione']}")
-                else:
-                    st.error(f"❌ Sbagliato. Risposta corretta: {q['risposta_corretta']}")
-                    st.info(q['spiegazione'])
-    
-    col1, col2 = st.columns(2)
-    with col1:
-        if st.button("✅ Verifica risposte", type="primary", use_container_width=True, key="cap16_verifica"):
-            st.session_state.cap16_verificato = True
-            st.rerun()
-    with col2:
-        if st.button("🔄 Ricomincia", use_container_width=True, key="cap16_reset"):
-            st.session_state.cap16_verificato = False
-            st.session_state.cap16_risposte = {}
-            st.rerun()
+    render_quiz_capitolo(CAPITOLO_NUM, INDICE_QUIZ)
 
 
+@cronometra
 def render_takeaways():
     """Renderizza i punti chiave e la conclusione"""
     
@@ -779,6 +712,7 @@ def render_takeaways():
     st.balloons()
 
 
+@cronometra
 def render():
     """Funzione principale per renderizzare il capitolo"""
     
@@ -791,21 +725,10 @@ def render():
     
     st.markdown("---")
     
-    tab1, tab2, tab3, tab4 = st.tabs([
-        "📚 Contenuto", 
-        "🎯 Autovalutazione", 
-        "📝 Quiz",
-        "🏆 Conclusione"
-    ])
-    
-    with tab1:
-        render_contenuto()
-    
-    with tab2:
-        render_calcolatore()
-    
-    with tab3:
-        render_quiz()
-    
-    with tab4:
-        render_takeaways()
+    # Sezioni: viene eseguita solo quella selezionata
+    render_sezioni(f"cap{CAPITOLO_NUM}", {
+        "📚 Contenuto": render_contenuto,
+        "🎯 Autovalutazione": render_calcolatore,
+        "📝 Quiz": render_quiz,
+        "🏆 Conclusione": render_takeaways
+    }, CHIAVI_WIDGET)
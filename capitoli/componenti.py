@@ -0,0 +1,135 @@
+"""
+Componenti di interfaccia condivisi dai capitoli
+InvestAccademy - Corso di Finanza Personale
+"""
+
+from fnmatch import fnmatchcase
+
+import streamlit as st
+from streamlit.errors import StreamlitAPIException
+
+from archivio.progressi import registra_calcolatore
+from finanza.casuale import deriva_seme
+
+from .utenti import utente_corrente
+
+# Valori dell'asse x al massimo inviati al browser per ogni grafico a linee
+PUNTI_GRAFICO = 300
+
+
+def conserva_stato(chiavi):
+    """Evita che Streamlit scarti lo stato dei widget delle sezioni non visualizzate
+
+    `chiavi` elenca le chiavi dei widget, con `*` per quelle generate (es.
+    "cap6_nome_*"); i pulsanti non vanno elencati, perché Streamlit non ne
+    permette l'assegnazione. Va chiamata dopo aver disegnato la sezione: i valori
+    dei widget non disegnati diventano normali valori di sessione e li
+    ritrovano al rerun in cui ricompaiono, senza gli avvisi di Streamlit sui
+    widget con valore predefinito impostati anche dalla sessione.
+    """
+
+    for chiave in list(st.session_state.keys()):
+        if any(fnmatchcase(chiave, modello) for modello in chiavi):
+            try:
+                st.session_state[chiave] = st.session_state[chiave]
+            except StreamlitAPIException:
+                pass  # widget disegnato in questo rerun: il suo stato resta comunque
+
+
+def _ripristina_sezione(chiave: str):
+    """Impedisce di deselezionare la sezione attiva cliccandola una seconda volta"""
+
+    if st.session_state[chiave] is None:
+        st.session_state[chiave] = st.session_state[f"{chiave}_attiva"]
+    st.session_state[f"{chiave}_attiva"] = st.session_state[chiave]
+
+
+def render_sezioni(prefisso: str, sezioni: dict, chiavi_widget=()):
+    """Mostra il selettore delle sezioni ed esegue solo quella attiva
+
+    A differenza di `st.tabs`, che esegue il contenuto di tutte le schede a ogni
+    rerun, qui viene renderizzata solo la sezione selezionata. Lo stato dei widget
+    delle altre sezioni (quelli in `chiavi_widget`) viene conservato.
+    """
+
+    etichette = list(sezioni.keys())
+    chiave = f"{prefisso}_sezione"
+
+    if st.session_state.get(chiave) not in etichette:
+        st.session_state[chiave] = etichette[0]
+        st.session_state[f"{chiave}_attiva"] = etichette[0]
+
+    sezione = st.segmented_control(
+        "Sezione",
+        etichette,
+        key=chiave,
+        on_change=_ripristina_sezione,
+        args=(chiave,),
+        label_visibility="collapsed"
+    )
+
+    try:
+        sezioni[sezione]()
+    finally:
+        conserva_stato(chiavi_widget)
+
+
+def seme_scenario(chiave: str) -> int:
+    """Seme della simulazione `chiave` per la sessione corrente
+
+    Finché l'utente non chiede una nuova estrazione il seme è lo stesso per tutte
+    le sessioni, così i risultati vengono condivisi dalla cache.
+    """
+
+    return deriva_seme(chiave, st.session_state.get(f"{chiave}_estrazione", 0))
+
+
+def pulsante_nuova_estrazione(chiave: str):
+    """Pulsante che rigenera la simulazione `chiave` con un nuovo seme"""
+
+    if st.button("🎲 Nuova simulazione", key=f"{chiave}_estrai"):
+        st.session_state[f"{chiave}_estrazione"] = st.session_state.get(f"{chiave}_estrazione", 0) + 1
+
+
+def segna_calcolatore(capitolo: int, calcolatore: str):
+    """Registra tra i progressi l'utilizzo di un calcolatore, una volta per sessione"""
+
+    usati = st.session_state.setdefault("calcolatori_usati", set())
+    if (capitolo, calcolatore) not in usati:
+        usati.add((capitolo, calcolatore))
+        registra_calcolatore(utente_corrente(), capitolo, calcolatore)
+
+
+def riduci_punti(dati, punti_max: int = PUNTI_GRAFICO):
+    """Riduce un DataFrame (o una Series) a non più di `punti_max` righe con LTTB
+
+    Ogni colonna sceglie i propri punti più significativi con una quota del
+    limite e le righe tenute sono l'unione delle scelte, così tutte le linee
+    conservano picchi e minimi. L'asse x è l'indice se numerico, altrimenti la
+    posizione.
+    """
+
+    if len(dati) <= punti_max:
+        return dati
+
+    # Importati qui: la home importa questo modulo e non deve caricare NumPy e pandas
+    import numpy as np
+    import pandas as pd
+
+    from finanza.serie import indici_lttb
+
+    indice = dati.index
+    x = indice.to_numpy(dtype=float) if pd.api.types.is_numeric_dtype(indice) else np.arange(len(dati))
+    colonne = [dati] if isinstance(dati, pd.Series) else [dati[c] for c in dati.columns]
+    quota = max(3, punti_max // len(colonne))
+
+    righe = np.unique(np.concatenate([
+        indici_lttb(x, colonna.to_numpy(dtype=float), quota) for colonna in colonne
+    ]))
+    return dati.iloc[righe]
+
+
+def grafico_linee(dati, punti_max: int = PUNTI_GRAFICO, **opzioni):
+    """`st.line_chart` con i dati ridotti a `punti_max` valori dell'asse x"""
+
+    st.line_chart(riduci_punti(dati, punti_max), **opzioni)
@@ -0,0 +1,96 @@
+"""
+Pannello delle prestazioni (riservato agli amministratori)
+InvestAccademy - Corso di Finanza Personale
+"""
+
+import streamlit as st
+import pandas as pd
+
+from finanza import cache, tempi
+
+from .utenti import utente_amministratore
+
+GRUPPI = {
+    "Tutto": "",
+    "App": "app.",
+    "Capitoli": "capitoli.",
+    "Calcoli": "finanza."
+}
+
+
+def render_tempi():
+    """Tabella dei tempi per funzione, dalla più costosa in totale"""
+
+    statistiche = tempi.statistiche()
+
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        gruppo = st.radio("Funzioni", list(GRUPPI.keys()), horizontal=True, key="prestazioni_gruppo")
+    with col2:
+        st.download_button(
+            "💾 Scarica JSON",
+            tempi.esporta_json(),
+            file_name="investaccademy_tempi.json",
+            mime="application/json",
+            use_container_width=True
+        )
+
+    righe = [
+        {"Funzione": nome, **valori}
+        for nome, valori in statistiche.items()
+        if nome.startswith(GRUPPI[gruppo]) and valori["chiamate"]
+    ]
+
+    if not righe:
+        st.info("Nessuna misura raccolta: apri qualche capitolo e torna qui.")
+        return
+
+    df = pd.DataFrame(righe).sort_values("totale_s", ascending=False)
+    st.dataframe(
+        df,
+        hide_index=True,
+        use_container_width=True,
+        column_config={
+            "chiamate": st.column_config.NumberColumn("Chiamate"),
+            "totale_s": st.column_config.NumberColumn("Totale (s)", format="%.3f"),
+            "media_ms": st.column_config.NumberColumn("Media (ms)", format="%.2f"),
+            "max_ms": st.column_config.NumberColumn("Max (ms)", format="%.2f"),
+            "p50_ms": st.column_config.NumberColumn("p50 (ms)", format="%.2f"),
+            "p95_ms": st.column_config.NumberColumn("p95 (ms)", format="%.2f"),
+            "p99_ms": st.column_config.NumberColumn("p99 (ms)", format="%.2f"),
+            "campioni": st.column_config.NumberColumn("Campioni")
+        }
+    )
+    st.caption(
+        f"Percentili sugli ultimi {tempi.CAMPIONI_MAX} campioni per funzione. "
+        "I tempi sono inclusivi delle funzioni chiamate."
+    )
+
+
+def render_cache():
+    """Contatori della cache condivisa dei calcoli"""
+
+    righe = [{"Funzione": nome, **valori} for nome, valori in cache.statistiche().items()]
+    if righe:
+        st.dataframe(pd.DataFrame(righe), hide_index=True, use_container_width=True)
+
+
+def render():
+    """Pagina delle prestazioni del processo"""
+
+    st.title("⏱️ Prestazioni")
+
+    if not utente_amministratore():
+        st.error("Pagina riservata agli amministratori.")
+        return
+
+    st.caption("Misure raccolte in memoria da questo processo, condivise da tutte le sessioni.")
+
+    if not tempi.ATTIVA:
+        st.info("La misura dei tempi è spenta: avvia l'app con `INVESTACCADEMY_TEMPI=1` per attivarla.")
+    else:
+        render_tempi()
+        st.button("🔄 Azzera misure", key="prestazioni_reset", on_click=tempi.azzera)
+
+    st.markdown("### Cache dei calcoli")
+    render_cache()
@@ -0,0 +1,149 @@
+"""
+Motore condiviso dei quiz di verifica
+InvestAccademy - Corso di Finanza Personale
+"""
+
+import streamlit as st
+
+from archivio.progressi import registra_quiz
+from finanza.tempi import cronometra
+
+from .utenti import utente_corrente
+
+OPZIONI_VERO_FALSO = ("Vero", "Falso")
+
+
+def indicizza_quiz(quiz: list, passo: float = 1.0, tolleranza: float = 1.0) -> tuple:
+    """Prepara le domande di un capitolo una sola volta, all'import del modulo
+
+    Per ogni domanda calcola le opzioni da mostrare, il valore del widget che
+    corrisponde alla risposta corretta e il testo della soluzione, così la
+    correzione è un semplice confronto con lo stato dei widget. `passo` e
+    `tolleranza` valgono per le domande di tipo "numero".
+    """
+    indice = []
+    for numero, q in enumerate(quiz, start=1):
+        voce = {
+            "id": q["id"],
+            "numero": numero,
+            "domanda": q["domanda"],
+            "tipo": q["tipo"],
+            "spiegazione": q["spiegazione"],
+            "soluzione": q["risposta_corretta"]
+        }
+        if q["tipo"] == "vero_falso":
+            voce["opzioni"] = OPZIONI_VERO_FALSO
+            voce["corretta"] = OPZIONI_VERO_FALSO[0] if q["risposta_corretta"] else OPZIONI_VERO_FALSO[1]
+        elif q["tipo"] == "scelta_multipla":
+            voce["opzioni"] = tuple(q["opzioni"])
+            voce["corretta"] = q["risposta_corretta"]
+        else:
+            voce["corretta"] = float(q["risposta_corretta"])
+            voce["passo"] = passo
+            voce["tolleranza"] = tolleranza
+        indice.append(voce)
+    return tuple(indice)
+
+
+def _chiave_domanda(prefisso: str, voce: dict) -> str:
+    return f"{prefisso}_q{voce['id']}"
+
+
+def chiavi_quiz(capitolo: int, indice: tuple) -> tuple:
+    """Chiavi dei widget delle risposte, da conservare tra una sezione e l'altra"""
+    return tuple(_chiave_domanda(f"cap{capitolo}", voce) for voce in indice)
+
+
+def correggi(prefisso: str, indice: tuple) -> tuple:
+    """Esito (True/False) di ogni domanda, letto dallo stato dei widget"""
+    esito = []
+    for voce in indice:
+        risposta = st.session_state.get(_chiave_domanda(prefisso, voce))
+        if voce["tipo"] == "numero":
+            esito.append(risposta is not None and abs(risposta - voce["corretta"]) < voce["tolleranza"])
+        else:
+            esito.append(risposta == voce["corretta"])
+    return tuple(esito)
+
+
+def _verifica(capitolo: int, prefisso: str, indice: tuple):
+    esito = correggi(prefisso, indice)
+    st.session_state[f"{prefisso}_esito"] = esito
+    registra_quiz(utente_corrente(), capitolo, sum(esito), len(esito))
+
+
+def _annulla_esito(prefisso: str):
+    st.session_state.pop(f"{prefisso}_esito", None)
+
+
+def _ricomincia(prefisso: str, indice: tuple):
+    _annulla_esito(prefisso)
+    for voce in indice:
+        st.session_state.pop(_chiave_domanda(prefisso, voce), None)
+
+
+@cronometra
+def render_quiz_capitolo(capitolo: int, indice: tuple):
+    """Renderizza il quiz di un capitolo a partire dal suo indice
+
+    Le risposte restano solo nello stato dei widget; l'esito viene calcolato
+    quando l'utente preme "Verifica", salvato tra i progressi dell'utente e
+    annullato se una risposta cambia.
+    """
+
+    prefisso = f"cap{capitolo}"
+
+    st.markdown("## 📝 Quiz di verifica")
+
+    esito = st.session_state.get(f"{prefisso}_esito")
+
+    for i, voce in enumerate(indice):
+        with st.container(border=True):
+            st.markdown(f"**Domanda {voce['numero']}:** {voce['domanda']}")
+
+            if voce["tipo"] == "numero":
+                st.number_input(
+                    "Inserisci il valore:",
+                    key=_chiave_domanda(prefisso, voce),
+                    step=voce["passo"],
+                    on_change=_annulla_esito,
+                    args=(prefisso,)
+                )
+            else:
+                st.radio(
+                    "Seleziona:",
+                    voce["opzioni"],
+                    key=_chiave_domanda(prefisso, voce),
+                    horizontal=voce["tipo"] == "vero_falso",
+                    on_change=_annulla_esito,
+                    args=(prefisso,)
+                )
+
+            if esito is not None:
+                if esito[i]:
+                    st.success(f"✅ Corretto! {voce['spiegazione']}")
+                else:
+                    st.error(f"❌ Sbagliato. Risposta corretta: {voce['soluzione']}")
+                    st.info(voce['spiegazione'])
+
+    if esito is not None:
+        st.markdown(f"**Punteggio: {sum(esito)}/{len(esito)}**")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.button(
+            "✅ Verifica risposte",
+            type="primary",
+            use_container_width=True,
+            key=f"{prefisso}_verifica",
+            on_click=_verifica,
+            args=(capitolo, prefisso, indice)
+        )
+    with col2:
+        st.button(
+            "🔄 Ricomincia",
+            use_container_width=True,
+            key=f"{prefisso}_reset",
+            on_click=_ricomincia,
+            args=(prefisso, indice)
+        )
@@ -0,0 +1,62 @@
+"""
+Identità dell'utente della sessione
+InvestAccademy - Corso di Finanza Personale
+
+Solo Streamlit e libreria standard: la home lo importa a ogni avvio, senza
+caricare NumPy e pandas.
+"""
+
+import os
+import uuid
+
+import streamlit as st
+
+# Email degli amministratori, separate da virgole ("*" per tutti, es. in locale)
+AMMINISTRATORI = {
+    email.strip().lower()
+    for email in os.environ.get("INVESTACCADEMY_ADMIN", "").split(",")
+    if email.strip()
+}
+
+# Prefisso degli utenti anonimi: i loro codici non possono coincidere con un'email
+PREFISSO_ANONIMO = "anon:"
+
+
+def utente_corrente() -> str:
+    """Identificativo dell'utente a cui associare i dati salvati
+
+    Con l'autenticazione di Streamlit attiva è l'email dell'utente; altrimenti è
+    PREFISSO_ANONIMO seguito da un codice uuid4 conservato nell'URL
+    (`?utente=...`), così i dati restano legati al link anche tra una visita e
+    l'altra. Dall'URL si accetta solo un uuid4 esadecimale: un valore qualsiasi
+    (es. l'email di un altro utente) viene sostituito da un codice nuovo.
+    """
+
+    if "utente" not in st.session_state:
+        if st.user.get("is_logged_in") and st.user.get("email"):
+            st.session_state.utente = st.user.email
+        else:
+            codice = _codice_anonimo(st.query_params.get("utente")) or uuid.uuid4().hex
+            st.session_state.utente = PREFISSO_ANONIMO + codice
+
+    utente = st.session_state.utente
+    if utente.startswith(PREFISSO_ANONIMO) and st.query_params.get("utente") != utente[len(PREFISSO_ANONIMO):]:
+        st.query_params["utente"] = utente[len(PREFISSO_ANONIMO):]
+
+    return st.session_state.utente
+
+
+def _codice_anonimo(valore):
+    """`valore` se è un uuid4 esadecimale in minuscolo, altrimenti None"""
+    try:
+        return valore if uuid.UUID(hex=valore, version=4).hex == valore else None
+    except (TypeError, ValueError, AttributeError):
+        return None
+
+
+def utente_amministratore() -> bool:
+    """True se l'utente può vedere le pagine riservate (es. prestazioni)"""
+
+    if "*" in AMMINISTRATORI:
+        return True
+    return bool(st.user.get("is_logged_in")) and str(st.user.get("email", "")).lower() in AMMINISTRATORI
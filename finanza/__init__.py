@@ -0,0 +1,41 @@
+"""
+Funzioni di calcolo del corso InvestAccademy, senza dipendenze da Streamlit
+
+Il package contiene solo Python e NumPy: può essere usato da script batch, test e
+altri servizi senza importare l'interfaccia. I moduli dei capitoli in `capitoli`
+sono strati di presentazione costruiti sopra queste funzioni.
+
+I sottomoduli vengono importati alla prima richiesta, così `import finanza`
+resta immediato anche quando serve un solo calcolo.
+"""
+
+import importlib
+
+__all__ = [
+    "cache",
+    "casuale",
+    "serie",
+    "tempi",
+    "parallelo",
+    "cashflow",
+    "interesse",
+    "risparmio",
+    "conti",
+    "debito",
+    "credito",
+    "investimenti",
+    "rischio",
+    "portafoglio",
+    "costi",
+    "pac",
+    "ribilanciamento",
+    "fiscalita",
+    "comportamento"
+]
+
+
+def __getattr__(nome: str):
+    """Importa un sottomodulo al primo accesso (es. `finanza.pac`)"""
+    if nome in __all__:
+        return importlib.import_module(f"{__name__}.{nome}")
+    raise AttributeError(f"module {__name__!r} has no attribute {nome!r}")
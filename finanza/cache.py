@@ -0,0 +1,165 @@
+"""
+Cache condivisa per le funzioni di calcolo pure
+InvestAccademy - Corso di Finanza Personale
+
+Le funzioni decorate con `@memoizza` condividono i risultati tra tutte le sessioni
+del processo. Ogni funzione ha una cache LRU limitata, con scadenza (TTL) e chiavi
+in cui i float sono arrotondati a un numero fisso di cifre significative, così
+0.1 + 0.2 e 0.3 producono la stessa voce.
+
+I risultati sono condivisi tra sessioni: vanno trattati in sola lettura.
+"""
+
+import functools
+import math
+import threading
+import time
+from collections import OrderedDict
+
+MAX_VOCI = 256
+TTL_SECONDI = 3600
+CIFRE_SIGNIFICATIVE = 12
+
+# Tutte le cache create, per nome qualificato della funzione
+_REGISTRO = {}
+
+
+def _normalizza_float(valore: float):
+    """Arrotonda un float alle cifre significative usate per le chiavi"""
+    if math.isnan(valore):
+        return "nan"
+    if valore == 0:
+        return 0.0  # -0.0 e 0.0 diventano la stessa chiave
+    if math.isinf(valore):
+        return valore
+    return float(f"{valore:.{CIFRE_SIGNIFICATIVE}g}")
+
+
+def _normalizza_array(valore):
+    """Trasforma un array NumPy in una chiave hashable"""
+    import numpy as np
+
+    arr = np.ascontiguousarray(valore)
+    if arr.dtype.kind == "f":
+        arr = arr.astype(np.float64)
+        magnitudine = np.floor(np.log10(np.abs(np.where(arr == 0, 1.0, arr))))
+        scala = 10.0 ** (CIFRE_SIGNIFICATIVE - 1 - magnitudine)
+        arr = np.round(arr * scala) / scala + 0.0  # + 0.0 elimina gli zeri negativi
+    return ("ndarray", arr.dtype.str, arr.shape, arr.tobytes())
+
+
+def normalizza(valore):
+    """Restituisce una versione canonica e hashable di un argomento"""
+    if isinstance(valore, bool) or valore is None or isinstance(valore, str):
+        return valore
+    if isinstance(valore, float):
+        return _normalizza_float(valore)
+    if isinstance(valore, int):
+        return valore
+    if isinstance(valore, (list, tuple)):
+        return tuple(normalizza(v) for v in valore)
+    if isinstance(valore, dict):
+        return tuple(sorted((k, normalizza(v)) for k, v in valore.items()))
+    if type(valore).__module__ == "numpy":
+        if getattr(valore, "ndim", 0) == 0:
+            return normalizza(valore.item())
+        return _normalizza_array(valore)
+    hash(valore)  # TypeError per argomenti non hashable
+    return valore
+
+
+class _CacheFunzione:
+    """Cache LRU con scadenza associata a una singola funzione"""
+
+    def __init__(self, max_voci: int, ttl: float):
+        self.max_voci = max_voci
+        self.ttl = ttl
+        self.voci = OrderedDict()
+        self.lock = threading.Lock()
+        self.hit = 0
+        self.miss = 0
+        self.scadute = 0
+        self.rimosse = 0
+        self.non_memorizzabili = 0
+
+    def statistiche(self) -> dict:
+        with self.lock:
+            richieste = self.hit + self.miss
+            return {
+                "hit": self.hit,
+                "miss": self.miss,
+                "hit_rate": self.hit / richieste if richieste else 0.0,
+                "scadute": self.scadute,
+                "rimosse": self.rimosse,
+                "non_memorizzabili": self.non_memorizzabili,
+                "voci": len(self.voci),
+                "max_voci": self.max_voci,
+                "ttl": self.ttl
+            }
+
+    def svuota(self):
+        with self.lock:
+            self.voci.clear()
+
+
+def memoizza(funzione=None, *, max_voci: int = MAX_VOCI, ttl: float = TTL_SECONDI):
+    """Decoratore che memorizza i risultati di una funzione pura
+
+    Utilizzabile come `@memoizza` oppure `@memoizza(max_voci=64, ttl=600)`.
+    """
+
+    def decoratore(f):
+        cache = _CacheFunzione(max_voci, ttl)
+        _REGISTRO[f"{f.__module__}.{f.__qualname__}"] = cache
+
+        @functools.wraps(f)
+        def wrapper(*args, **kwargs):
+            try:
+                chiave = (normalizza(args), normalizza(kwargs))
+            except TypeError:
+                with cache.lock:
+                    cache.non_memorizzabili += 1
+                return f(*args, **kwargs)
+
+            adesso = time.monotonic()
+            with cache.lock:
+                voce = cache.voci.get(chiave)
+                if voce is not None:
+                    scadenza, risultato = voce
+                    if scadenza > adesso:
+                        cache.voci.move_to_end(chiave)
+                        cache.hit += 1
+                        return risultato
+                    del cache.voci[chiave]
+                    cache.scadute += 1
+                cache.miss += 1
+
+            # Il calcolo avviene fuori dal lock per non serializzare le sessioni
+            risultato = f(*args, **kwargs)
+
+            with cache.lock:
+                cache.voci[chiave] = (adesso + cache.ttl, risultato)
+                cache.voci.move_to_end(chiave)
+                while len(cache.voci) > cache.max_voci:
+                    cache.voci.popitem(last=False)
+                    cache.rimosse += 1
+            return risultato
+
+        wrapper.statistiche = cache.statistiche
+        wrapper.svuota = cache.svuota
+        return wrapper
+
+    if funzione is not None:
+        return decoratore(funzione)
+    return decoratore
+
+
+def statistiche() -> dict:
+    """Contatori di tutte le funzioni memorizzate, per nome qualificato"""
+    return {nome: cache.statistiche() for nome, cache in _REGISTRO.items()}
+
+
+def svuota_tutto():
+    """Svuota le cache di tutte le funzioni memorizzate"""
+    for cache in _REGISTRO.values():
+        cache.svuota()
@@ -0,0 +1,36 @@
+"""
+Cash flow mensile
+InvestAccademy - Corso di Finanza Personale
+"""
+
+from .tempi import cronometra
+
+
+@cronometra
+def calcola_cash_flow(reddito: float, spese_fisse: float, spese_variabili: float) -> dict:
+    """Calcola e analizza il cash flow mensile"""
+    risparmio = reddito - spese_fisse - spese_variabili
+    
+    if reddito > 0:
+        perc_fisse = (spese_fisse / reddito) * 100
+        perc_variabili = (spese_variabili / reddito) * 100
+        perc_risparmio = (risparmio / reddito) * 100
+    else:
+        perc_fisse = perc_variabili = perc_risparmio = 0
+    
+    if perc_risparmio >= 20:
+        valutazione = ("🟢", "Ottimo! Stai risparmiando più del 20%")
+    elif perc_risparmio >= 10:
+        valutazione = ("🟡", "Buono. Margine di risparmio nella norma")
+    elif perc_risparmio > 0:
+        valutazione = ("🟠", "Attenzione. Margine di risparmio ridotto")
+    else:
+        valutazione = ("🔴", "Critico. Spese superiori alle entrate")
+    
+    return {
+        "risparmio": risparmio,
+        "perc_fisse": perc_fisse,
+        "perc_variabili": perc_variabili,
+        "perc_risparmio": perc_risparmio,
+        "valutazione": valutazione
+    }
@@ -0,0 +1,65 @@
+"""
+Generatori di numeri casuali per le simulazioni
+InvestAccademy - Corso di Finanza Personale
+
+Ogni simulazione riceve un seme esplicito e crea il proprio `np.random.Generator`:
+nessuna funzione usa lo stato globale di NumPy (`np.random.seed`), che è condiviso
+tra i thread delle sessioni Streamlit. A parità di seme i risultati sono identici
+anche sotto concorrenza, quindi possono essere memorizzati in cache.
+"""
+
+import hashlib
+
+import numpy as np
+
+# Seme di partenza delle simulazioni quando non ne viene indicato uno
+SEME_BASE = 42
+
+
+def deriva_seme(*componenti) -> int:
+    """Seme a 64 bit ricavato in modo deterministico da una serie di componenti
+
+    Es. `deriva_seme("cap9_correlazione", 3)` per la terza estrazione di uno
+    scenario. Il risultato è stabile tra processi e riavvii (non usa `hash()`).
+    """
+    testo = repr((SEME_BASE,) + componenti).encode("utf-8")
+    return int.from_bytes(hashlib.blake2b(testo, digest_size=8).digest(), "little")
+
+
+def generatore(seme: int = SEME_BASE) -> np.random.Generator:
+    """Nuovo generatore indipendente (PCG64) per una singola chiamata"""
+    return np.random.default_rng(seme)
+
+
+def generatori(seme: int, n: int) -> list:
+    """`n` generatori con flussi statisticamente indipendenti derivati dallo stesso seme"""
+    return [np.random.default_rng(figlio) for figlio in np.random.SeedSequence(seme).spawn(n)]
+
+
+def normali(seme, forma, media=0.0, deviazione=1.0, rng: np.random.Generator = None) -> np.ndarray:
+    """Estrazione in blocco di normali con media e deviazione standard date"""
+    if rng is None:
+        rng = generatore(seme)
+    valori = rng.standard_normal(forma)
+    valori *= deviazione
+    valori += media
+    return valori
+
+
+def normali_multivariate(seme, media, covarianza, n: int, rng: np.random.Generator = None) -> np.ndarray:
+    """`n` estrazioni da una normale multivariata, forma (n, asset)
+
+    Usa la fattorizzazione di Cholesky (più rapida della SVD di
+    `Generator.multivariate_normal`); per matrici semidefinite, come con
+    correlazione ±1, ricade sulla decomposizione agli autovalori.
+    """
+    if rng is None:
+        rng = generatore(seme)
+    media = np.asarray(media, dtype=float)
+    covarianza = np.asarray(covarianza, dtype=float)
+    try:
+        fattore = np.linalg.cholesky(covarianza)
+    except np.linalg.LinAlgError:
+        autovalori, autovettori = np.linalg.eigh(covarianza)
+        fattore = autovettori * np.sqrt(np.clip(autovalori, 0, None))
+    return media + rng.standard_normal((n, media.size)) @ fattore.T
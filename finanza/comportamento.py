@@ -0,0 +1,102 @@
+"""
+Profilo comportamentale e preparazione dell'investitore
+InvestAccademy - Corso di Finanza Personale
+"""
+
+from .tempi import cronometra
+
+
+@cronometra
+def valuta_comportamento(risposte: dict) -> dict:
+    """Valuta il profilo comportamentale dell'investitore"""
+    
+    punteggio = sum(risposte.values())
+    
+    if punteggio <= 6:
+        profilo = "Alto rischio emotivo"
+        descrizione = "Tendi a prendere decisioni guidate dalle emozioni. L'automazione è essenziale per te."
+        raccomandazioni = [
+            "Automatizza completamente investimenti e ribilanciamenti",
+            "Riduci drasticamente il monitoraggio del portafoglio",
+            "Scrivi regole precise e seguile meccanicamente",
+            "Considera un consulente che faccia da filtro emotivo"
+        ]
+        colore = "🔴"
+    elif punteggio <= 12:
+        profilo = "Rischio emotivo moderato"
+        descrizione = "Hai una buona consapevolezza ma sei ancora influenzabile dalle emozioni."
+        raccomandazioni = [
+            "Usa l'automazione per le decisioni principali",
+            "Controlla il portafoglio non più di una volta al trimestre",
+            "Mantieni un diario delle decisioni di investimento",
+            "Stabilisci regole chiare per situazioni di stress"
+        ]
+        colore = "🟡"
+    else:
+        profilo = "Buona disciplina emotiva"
+        descrizione = "Hai sviluppato una buona capacità di gestire le emozioni negli investimenti."
+        raccomandazioni = [
+            "Mantieni comunque automazione per coerenza",
+            "Monitora periodicamente i tuoi bias residui",
+            "Continua a seguire regole prestabilite",
+            "Non sottovalutare mai il potere delle emozioni"
+        ]
+        colore = "🟢"
+    
+    return {
+        "punteggio": punteggio,
+        "profilo": profilo,
+        "descrizione": descrizione,
+        "raccomandazioni": raccomandazioni,
+        "colore": colore
+    }
+
+
+@cronometra
+def valuta_readiness(risposte: dict) -> dict:
+    """Valuta la preparazione dell'investitore"""
+    
+    punteggio = sum(risposte.values())
+    max_punteggio = len(risposte) * 3
+    percentuale = (punteggio / max_punteggio) * 100
+    
+    if percentuale >= 80:
+        livello = "Pronto per investire"
+        descrizione = "Hai una solida base e sei pronto per iniziare o continuare a investire con consapevolezza."
+        colore = "🟢"
+        prossimi_passi = [
+            "Implementa il tuo piano di investimento",
+            "Mantieni la disciplina nel tempo",
+            "Rivedi il piano annualmente",
+            "Continua a formarti"
+        ]
+    elif percentuale >= 60:
+        livello = "Quasi pronto"
+        descrizione = "Hai una buona base ma ci sono ancora alcuni aspetti da consolidare prima di investire."
+        colore = "🟡"
+        prossimi_passi = [
+            "Completa il fondo emergenze",
+            "Definisci meglio gli obiettivi",
+            "Studia gli aspetti meno chiari",
+            "Fai un piano scritto dettagliato"
+        ]
+    else:
+        livello = "Serve più preparazione"
+        descrizione = "È importante consolidare le basi prima di investire per evitare errori costosi."
+        colore = "🔴"
+        prossimi_passi = [
+            "Concentrati su risparmio e fondo emergenze",
+            "Studia i capitoli che hai trovato più difficili",
+            "Non investire ancora - costruisci le fondamenta",
+            "Considera di consultare un professionista"
+        ]
+    
+    return {
+        "punteggio": punteggio,
+        "max_punteggio": max_punteggio,
+        "percentuale": percentuale,
+        "livello": livello,
+        "descrizione": descrizione,
+        "colore": colore,
+        "prossimi_passi": prossimi_passi
+    }
@@ -0,0 +1,25 @@
+"""
+Costi dei conti correnti
+InvestAccademy - Corso di Finanza Personale
+"""
+
+from .tempi import cronometra
+
+
+@cronometra
+def calcola_costi_annui(canone_mensile: float, commissioni_bonifici: float, num_bonifici: int, 
+                         costo_prelievi: float, num_prelievi: int) -> dict:
+    """Calcola i costi totali annui di un conto"""
+    
+    costo_canone = canone_mensile * 12
+    costo_bonifici_tot = commissioni_bonifici * num_bonifici
+    costo_prelievi_tot = costo_prelievi * num_prelievi
+    
+    totale = costo_canone + costo_bonifici_tot + costo_prelievi_tot
+    
+    return {
+        "canone": costo_canone,
+        "bonifici": costo_bonifici_tot,
+        "prelievi": costo_prelievi_tot,
+        "totale": totale
+    }
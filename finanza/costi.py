@@ -0,0 +1,66 @@
+"""
+Impatto dei costi degli strumenti
+InvestAccademy - Corso di Finanza Personale
+"""
+
+import numpy as np
+
+from .tempi import cronometra
+
+
+def _percentuale(parte, totale):
+    """parte / totale in percentuale, 0 dove il totale non è positivo"""
+    parte, totale = np.asarray(parte, dtype=float), np.asarray(totale, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(totale > 0, parte / totale * 100, 0.0)[()]
+
+
+@cronometra
+def calcola_impatto_costi(capitale: float, anni: int, rendimento: float, costo_perc: float) -> dict:
+    """Calcola l'impatto dei costi sul capitale finale
+    
+    Accetta anche array (combinati con il broadcasting NumPy) per valutare molti
+    scenari in una chiamata.
+    """
+    
+    rendimento_lordo = rendimento / 100
+    costo = costo_perc / 100
+    rendimento_netto = rendimento_lordo - costo
+    
+    capitale_lordo = capitale * ((1 + rendimento_lordo) ** anni)
+    capitale_netto = capitale * ((1 + rendimento_netto) ** anni)
+    
+    differenza = capitale_lordo - capitale_netto
+    
+    return {
+        "capitale_lordo": capitale_lordo,
+        "capitale_netto": capitale_netto,
+        "differenza_costi": differenza,
+        "perc_riduzione": _percentuale(differenza, capitale_lordo)
+    }
+
+
+@cronometra
+def confronta_strumenti(capitale: float, anni: int) -> dict:
+    """Confronta diversi strumenti con costi tipici"""
+    
+    rendimento_base = 6.0  # Rendimento lordo ipotetico
+    
+    strumenti = {
+        "ETF": {"costo": 0.2, "tipo": "Passivo"},
+        "Fondo Attivo": {"costo": 2.0, "tipo": "Attivo"},
+        "Azione Singola": {"costo": 0.1, "tipo": "Diretto"}
+    }
+    
+    risultati = {}
+    
+    for nome, dati in strumenti.items():
+        calc = calcola_impatto_costi(capitale, anni, rendimento_base, dati["costo"])
+        risultati[nome] = {
+            "costo_annuo": dati["costo"],
+            "tipo": dati["tipo"],
+            "capitale_finale": calc["capitale_netto"],
+            "costi_totali": calc["differenza_costi"]
+        }
+    
+    return risultati
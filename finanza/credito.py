@@ -0,0 +1,63 @@
+"""
+Utilizzo del credito
+InvestAccademy - Corso di Finanza Personale
+"""
+
+from .tempi import cronometra
+
+
+@cronometra
+def calcola_utilizzo_credito(saldo: float, limite: float) -> float:
+    """Calcola la percentuale di utilizzo del credito"""
+    if limite <= 0:
+        return 0
+    return (saldo / limite) * 100
+
+
+@cronometra
+def valuta_utilizzo(utilizzo: float) -> dict:
+    """Valuta il livello di utilizzo del credito"""
+    if utilizzo < 30:
+        return {
+            "livello": "Ottimale",
+            "colore": "🟢",
+            "descrizione": "Eccellente! Stai usando meno del 30% del credito disponibile.",
+            "impatto": "Positivo sul punteggio creditizio"
+        }
+    elif utilizzo < 50:
+        return {
+            "livello": "Attenzione",
+            "colore": "🟡",
+            "descrizione": "Utilizzo moderato. Considera di ridurre il saldo.",
+            "impatto": "Impatto neutro o lievemente negativo"
+        }
+    elif utilizzo < 70:
+        return {
+            "livello": "Alto",
+            "colore": "🟠",
+            "descrizione": "Utilizzo elevato. Riduci il saldo quando possibile.",
+            "impatto": "Impatto negativo sul punteggio"
+        }
+    else:
+        return {
+            "livello": "Critico",
+            "colore": "🔴",
+            "descrizione": "Utilizzo molto elevato. Priorità: ridurre i saldi.",
+            "impatto": "Forte impatto negativo sul punteggio"
+        }
+
+
+@cronometra
+def simula_riduzione_saldo(saldo_attuale: float, limite: float, riduzione: float) -> dict:
+    """Simula l'effetto della riduzione del saldo"""
+    nuovo_saldo = max(0, saldo_attuale - riduzione)
+    utilizzo_attuale = calcola_utilizzo_credito(saldo_attuale, limite)
+    utilizzo_nuovo = calcola_utilizzo_credito(nuovo_saldo, limite)
+    
+    return {
+        "saldo_attuale": saldo_attuale,
+        "saldo_nuovo": nuovo_saldo,
+        "utilizzo_attuale": utilizzo_attuale,
+        "utilizzo_nuovo": utilizzo_nuovo,
+        "miglioramento": utilizzo_attuale - utilizzo_nuovo
+    }
@@ -0,0 +1,251 @@
+"""
+Ammortamento e strategie di rimborso dei debiti
+InvestAccademy - Corso di Finanza Personale
+"""
+
+import numpy as np
+
+from .cache import memoizza
+from .serie import Serie
+from .tempi import cronometra
+
+# Saldo residuo sotto il quale il debito si considera estinto
+TOLLERANZA_SALDO = 0.01
+
+
+def _saldo_dopo(saldo, tasso_mensile, rata_mensile, mesi):
+    """Saldo residuo dopo `mesi` rate piene (formula chiusa, vettoriale)"""
+    crescita = (1 + tasso_mensile) ** mesi
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rate_capitalizzate = np.where(
+            tasso_mensile == 0,
+            rata_mensile * mesi,
+            rata_mensile * (crescita - 1) / tasso_mensile
+        )
+    return saldo * crescita - rate_capitalizzate
+
+
+@cronometra
+def ammortamento(saldo, tasso, rata_mensile) -> dict:
+    """Durata e interessi totali di uno o più debiti a rata costante
+
+    Accetta scalari o array (combinati con il broadcasting NumPy), quindi migliaia
+    di debiti si valutano in una sola chiamata. Il numero di rate si ricava in forma
+    chiusa dalla formula dell'annualità; l'ultima rata copre solo il residuo.
+
+    Se la rata è nulla o non copre gli interessi del primo mese il debito non si
+    estingue: "sostenibile" è False e mesi, interessi e costo totale valgono
+    `inf`. Un debito senza saldo è sostenibile con zero mesi.
+    """
+    
+    saldo, tasso, rata_mensile = np.broadcast_arrays(
+        np.asarray(saldo, dtype=float),
+        np.asarray(tasso, dtype=float),
+        np.asarray(rata_mensile, dtype=float)
+    )
+    tasso_mensile = tasso / 100 / 12
+    
+    nullo = saldo <= 0
+    sostenibile = nullo | ((rata_mensile > 0) & (rata_mensile > saldo * tasso_mensile))
+    attivo = ~nullo & sostenibile
+    
+    # Più piccolo m per cui il saldo residuo scende sotto la tolleranza
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rapporto = (rata_mensile - TOLLERANZA_SALDO * tasso_mensile) / (rata_mensile - saldo * tasso_mensile)
+        mesi_esatti = np.where(
+            tasso_mensile == 0,
+            (saldo - TOLLERANZA_SALDO) / rata_mensile,
+            np.log(rapporto) / np.log1p(tasso_mensile)
+        )
+    mesi = np.where(attivo, np.maximum(np.ceil(mesi_esatti - 1e-9), 1), 0.0)
+    
+    # Interessi: rate piene meno capitale rimborsato, più gli interessi dell'ultimo mese
+    residuo = np.where(attivo, _saldo_dopo(saldo, tasso_mensile, rata_mensile, mesi - 1), 0.0)
+    interessi = (mesi - 1) * rata_mensile - (saldo - residuo) + residuo * tasso_mensile
+    interessi = np.where(attivo, interessi, 0.0)
+    
+    mesi = np.where(sostenibile, mesi, np.inf)
+    interessi = np.where(sostenibile, interessi, np.inf)
+    
+    return {
+        "mesi": mesi[()],
+        "interessi_totali": interessi[()],
+        "costo_totale": np.where(sostenibile, saldo + interessi, np.inf)[()],
+        "sostenibile": sostenibile[()]
+    }
+
+
+@cronometra
+def piano_ammortamento(saldo: float, tasso: float, rata_mensile: float, mesi: int) -> Serie:
+    """Piano di ammortamento mese per mese come colonne NumPy"""
+    
+    tasso_mensile = tasso / 100 / 12
+    mese = np.arange(1, mesi + 1)
+    
+    saldo_iniziale = np.maximum(_saldo_dopo(saldo, tasso_mensile, rata_mensile, mese - 1), 0.0)
+    interesse = saldo_iniziale * tasso_mensile
+    quota_capitale = np.minimum(rata_mensile - interesse, saldo_iniziale)
+    
+    return Serie(
+        "mese",
+        mese=mese,
+        saldo_iniziale=saldo_iniziale,
+        interesse=interesse,
+        quota_capitale=quota_capitale,
+        rata=interesse + quota_capitale,
+        saldo_finale=saldo_iniziale - quota_capitale
+    )
+
+
+@cronometra
+@memoizza
+def calcola_interessi_totali(saldo: float, tasso: float, rata_mensile: float) -> dict:
+    """Calcola il piano di ammortamento di un debito
+    
+    Se la rata non copre gli interessi, "sostenibile" è False e mesi, interessi
+    e costo totale valgono `inf`.
+    """
+    
+    risultato = ammortamento(saldo, tasso, rata_mensile)
+    
+    if not risultato["sostenibile"]:
+        return {
+            "mesi": float("inf"),
+            "interessi_totali": float("inf"),
+            "costo_totale": float("inf"),
+            "sostenibile": False
+        }
+    
+    mesi = int(risultato["mesi"])
+    
+    return {
+        "mesi": mesi,
+        "interessi_totali": float(risultato["interessi_totali"]),
+        "costo_totale": float(risultato["costo_totale"]),
+        "sostenibile": True,
+        "piano": piano_ammortamento(saldo, tasso, rata_mensile, mesi)
+    }
+
+
+# Mesi massimi simulati dal piano di rimborso multi-debito (50 anni)
+MESI_MASSIMI = 600
+
+STRATEGIE = ("snowball", "avalanche")
+
+
+@cronometra
+def ordine_strategia(saldi, tassi, strategia: str):
+    """Indici dei debiti nell'ordine di priorità della strategia
+
+    Snowball: saldo crescente. Avalanche: tasso decrescente (a parità di tasso,
+    saldo crescente).
+    """
+    saldi = np.asarray(saldi, dtype=float)
+    tassi = np.asarray(tassi, dtype=float)
+    if strategia == "snowball":
+        return np.lexsort((-tassi, saldi))
+    if strategia == "avalanche":
+        return np.lexsort((saldi, -tassi))
+    raise ValueError(f"Strategia sconosciuta: {strategia!r} (attese: {', '.join(STRATEGIE)})")
+
+
+@cronometra
+def simula_rimborso(saldi, tassi, rate_minime, budget_extra, strategia: str,
+                    mesi_massimi: int = MESI_MASSIMI) -> dict:
+    """Simula mese per mese il rimborso di più debiti con una strategia
+
+    Ogni mese maturano gli interessi, si pagano le rate minime e tutto il resto del
+    budget (extra più le rate minime dei debiti già estinti) va al debito prioritario;
+    se lo estingue, l'eccedenza passa al successivo. Il calcolo è vettoriale sui
+    debiti e sugli scenari: `budget_extra` può essere un array di K valori, nel qual
+    caso i risultati hanno una dimensione iniziale K.
+
+    Restituisce i mesi per azzerare tutti i debiti (`inf` se non ci si riesce entro
+    `mesi_massimi`), gli interessi totali e per debito, il mese di estinzione di
+    ciascun debito e il debito residuo totale a fine di ogni mese.
+    """
+    
+    saldi = np.asarray(saldi, dtype=float)
+    tassi_mensili = np.asarray(tassi, dtype=float) / 100 / 12
+    rate_minime = np.asarray(rate_minime, dtype=float)
+    extra = np.asarray(budget_extra, dtype=float)
+    scalare = extra.ndim == 0
+    extra = np.atleast_1d(extra)
+    
+    # Colonne riordinate per priorità: il primo debito attivo riceve l'eccedenza
+    ordine = ordine_strategia(saldi, tassi, strategia)
+    tassi_mensili = tassi_mensili[ordine]
+    rate_minime = rate_minime[ordine]
+    budget = rate_minime.sum() + extra
+    
+    residui = np.broadcast_to(saldi[ordine], (extra.size, saldi.size)).copy()
+    interessi = np.zeros_like(residui)
+    estinzione = np.full(residui.shape, np.inf)
+    estinzione[residui <= TOLLERANZA_SALDO] = 0
+    debito_residuo = []
+    
+    for mese in range(1, mesi_massimi + 1):
+        attivi = residui > TOLLERANZA_SALDO
+        if not attivi.any():
+            break
+        
+        interesse = residui * tassi_mensili
+        interessi += interesse
+        residui += interesse
+        
+        minimi = np.minimum(rate_minime, residui)
+        residui -= minimi
+        disponibile = budget - minimi.sum(axis=1)
+        
+        # Eccedenza distribuita a cascata secondo la priorità
+        precedenti = np.cumsum(residui, axis=1) - residui
+        versamento = np.clip(disponibile[:, None] - precedenti, 0, residui)
+        residui -= versamento
+        
+        chiusi = attivi & (residui <= TOLLERANZA_SALDO)
+        residui[chiusi] = 0
+        estinzione[chiusi] = mese
+        debito_residuo.append(residui.sum(axis=1))
+    
+    # Riporta le colonne nell'ordine originale dei debiti
+    inverso = np.argsort(ordine)
+    interessi = interessi[:, inverso]
+    estinzione = estinzione[:, inverso]
+    debito_residuo = np.array(debito_residuo).T if debito_residuo else np.zeros((extra.size, 0))
+    
+    risultato = {
+        "strategia": strategia,
+        "ordine": ordine,
+        "mesi": estinzione.max(axis=1),
+        "interessi_totali": interessi.sum(axis=1),
+        "interessi_per_debito": interessi,
+        "mese_estinzione": estinzione,
+        "debito_residuo": debito_residuo
+    }
+    if scalare:
+        for chiave in ("mesi", "interessi_totali", "interessi_per_debito", "mese_estinzione", "debito_residuo"):
+            risultato[chiave] = risultato[chiave][0]
+    return risultato
+
+
+@cronometra
+@memoizza
+def confronta_strategie(debiti: list, risorse_extra: float) -> dict:
+    """Confronta le strategie Snowball e Avalanche
+    
+    Oltre ai debiti ordinati per priorità, restituisce in "simulazione" il
+    risultato di `simula_rimborso` per ciascuna strategia.
+    """
+    
+    saldi = [d['saldo'] for d in debiti]
+    tassi = [d['tasso'] for d in debiti]
+    rate_minime = [d['rata_min'] for d in debiti]
+    
+    risultato = {"simulazione": {}}
+    for strategia in STRATEGIE:
+        simulazione = simula_rimborso(saldi, tassi, rate_minime, risorse_extra, strategia)
+        # Copie: il risultato è condiviso dalla cache e non deve riferire gli input
+        risultato[strategia] = [dict(debiti[i]) for i in simulazione["ordine"]]
+        risultato["simulazione"][strategia] = simulazione
+    
+    return risultato
@@ -0,0 +1,114 @@
+"""
+Impatto della fiscalità
+InvestAccademy - Corso di Finanza Personale
+"""
+
+import numpy as np
+
+from .cache import memoizza
+from .tempi import cronometra
+
+
+@cronometra
+def calcola_impatto_tasse(capitale: float, rendimento: float, anni: int, 
+                          tassazione_annua: float, tassazione_differita: float) -> dict:
+    """Confronta tassazione annua vs differita
+    
+    Accetta anche array (combinati con il broadcasting NumPy) per valutare molti
+    scenari in una chiamata.
+    """
+    
+    # Tassazione annua
+    rend_netto_annuo = rendimento * (1 - tassazione_annua / 100)
+    capitale_tass_annua = capitale * ((1 + rend_netto_annuo / 100) ** anni)
+    
+    # Tassazione differita
+    capitale_lordo = capitale * ((1 + rendimento / 100) ** anni)
+    guadagno = capitale_lordo - capitale
+    tasse_finali = guadagno * (tassazione_differita / 100)
+    capitale_tass_diff = capitale_lordo - tasse_finali
+    
+    # Differenza
+    vantaggio_differimento = capitale_tass_diff - capitale_tass_annua
+    
+    return {
+        "capitale_tass_annua": capitale_tass_annua,
+        "capitale_tass_differita": capitale_tass_diff,
+        "vantaggio_differimento": vantaggio_differimento,
+        "tasse_annua_totali": capitale_tass_annua - capitale - (capitale * ((1 + rendimento / 100) ** anni) - capitale_tass_annua),
+        "tasse_differita_totali": tasse_finali
+    }
+
+
+@cronometra
+def calcola_rendimento_netto(rendimento_lordo: float, tassazione: float, costi: float) -> float:
+    """Calcola il rendimento netto dopo tasse e costi"""
+    return rendimento_lordo - tassazione - costi
+
+
+def _trading_vs_hold(capitale, rendimento_annuo, anni, operazioni_anno, tassa_capital_gain) -> dict:
+    """Trading frequente vs buy and hold in forma chiusa, con broadcasting NumPy
+
+    Con g = rendimento per operazione e t = aliquota, dopo ogni operazione il
+    capitale si moltiplica per q = 1 + g(1 - t): dopo N = anni × operazioni
+    vale C0·q^N. Le tasse sono la somma geometrica t·g·C0·(q^N - 1)/(q - 1),
+    che per q = 1 (aliquota al 100% o rendimento nullo) vale t·g·C0·N.
+    """
+    
+    rendimento = np.asarray(rendimento_annuo, dtype=float) / 100
+    tassa = np.asarray(tassa_capital_gain, dtype=float) / 100
+    operazioni = np.asarray(operazioni_anno, dtype=float)
+    
+    # Buy and Hold
+    capitale_finale_hold = capitale * (1 + rendimento) ** anni
+    tasse_hold = (capitale_finale_hold - capitale) * tassa
+    netto_hold = capitale_finale_hold - tasse_hold
+    
+    # Trading frequente: log1p/expm1 restano precisi anche con migliaia di operazioni piccole
+    rend_per_operazione = rendimento / operazioni
+    crescita_netta = rend_per_operazione * (1 - tassa)
+    n_operazioni = anni * operazioni
+    crescita_totale = np.expm1(n_operazioni * np.log1p(crescita_netta))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        somma_geometrica = np.where(crescita_netta != 0, crescita_totale / crescita_netta, n_operazioni)
+    netto_trading = capitale * (1 + crescita_totale)
+    tasse_trading = tassa * rend_per_operazione * capitale * somma_geometrica
+    
+    return {
+        "netto_hold": netto_hold,
+        "tasse_hold": tasse_hold,
+        "netto_trading": netto_trading,
+        "tasse_trading": tasse_trading,
+        "differenza": netto_hold - netto_trading
+    }
+
+
+@cronometra
+@memoizza
+def simula_trading_vs_hold(capitale: float, rendimento_annuo: float, anni: int,
+                           operazioni_anno: int, tassa_capital_gain: float) -> dict:
+    """Confronta trading frequente vs buy and hold"""
+    
+    risultato = _trading_vs_hold(capitale, rendimento_annuo, anni, operazioni_anno, tassa_capital_gain)
+    return {chiave: float(valore) for chiave, valore in risultato.items()}
+
+
+@cronometra
+@memoizza(max_voci=32)
+def mappa_trading_vs_hold(capitale: float, rendimento_annuo: float, anni: int,
+                          operazioni_anno, tasse_capital_gain) -> dict:
+    """Differenza hold - trading per tutte le combinazioni di frequenze e aliquote
+
+    Restituisce matrici di forma (aliquote, frequenze), pronte per un grafico
+    con una linea per aliquota.
+    """
+    
+    operazioni = np.asarray(operazioni_anno, dtype=float)
+    tasse = np.asarray(tasse_capital_gain, dtype=float)
+    risultato = _trading_vs_hold(capitale, rendimento_annuo, anni, operazioni[np.newaxis, :], tasse[:, np.newaxis])
+    
+    return {
+        "operazioni_anno": operazioni,
+        "tasse_capital_gain": tasse,
+        **{chiave: np.broadcast_to(valore, (tasse.size, operazioni.size)) for chiave, valore in risultato.items()}
+    }
@@ -0,0 +1,61 @@
+"""
+Interesse semplice e composto, rendimento reale
+InvestAccademy - Corso di Finanza Personale
+"""
+
+import numpy as np
+
+from .cache import memoizza
+from .serie import Serie
+from .tempi import cronometra
+
+
+@cronometra
+def interesse_semplice(capitale: float, tasso: float, anni: int) -> float:
+    """Calcola l'interesse semplice"""
+    return capitale * (tasso / 100) * anni
+
+
+@cronometra
+def montante_semplice(capitale: float, tasso: float, anni: int) -> float:
+    """Calcola il montante con interesse semplice"""
+    return capitale + interesse_semplice(capitale, tasso, anni)
+
+
+@cronometra
+def montante_composto(capitale: float, tasso: float, anni: int) -> float:
+    """Calcola il montante con interesse composto"""
+    return capitale * ((1 + tasso / 100) ** anni)
+
+
+@cronometra
+def rendimento_reale(nominale: float, inflazione: float) -> float:
+    """Calcola il rendimento reale approssimato"""
+    return nominale - inflazione
+
+
+@cronometra
+@memoizza
+def evoluzione_capitale(capitale: float, tasso: float, anni: int) -> Serie:
+    """Restituisce l'evoluzione anno per anno (colonne anno, capitale, interesse)"""
+    anno = np.arange(1, anni + 1)
+    capitale_anno = capitale * (1 + tasso / 100) ** anno
+    interesse = capitale * (1 + tasso / 100) ** (anno - 1) * (tasso / 100)
+    return Serie(
+        "anno",
+        anno=anno,
+        capitale=np.round(capitale_anno, 2),
+        interesse=np.round(interesse, 2)
+    )
+
+
+@cronometra
+def calcola_rendimento_reale(nominale: float, inflazione: float) -> float:
+    """Calcola il rendimento reale approssimato"""
+    return nominale - inflazione
+
+
+@cronometra
+def calcola_rendimento_reale_esatto(nominale: float, inflazione: float) -> float:
+    """Calcola il rendimento reale con formula esatta"""
+    return ((1 + nominale / 100) / (1 + inflazione / 100) - 1) * 100
@@ -0,0 +1,72 @@
+"""
+Crescita degli investimenti e asset class
+InvestAccademy - Corso di Finanza Personale
+"""
+
+import numpy as np
+
+from .cache import memoizza
+from .serie import Serie
+from .tempi import cronometra
+
+
+@cronometra
+@memoizza
+def simula_crescita_investimento(capitale: float, tasso: float, anni: int) -> Serie:
+    """Simula la crescita di un investimento nel tempo
+    
+    Colonne: anno, capitale, guadagno_anno, guadagno_totale.
+    """
+    anno = np.arange(1, anni + 1)
+    capitale_anno = capitale * (1 + tasso / 100) ** anno
+    guadagno = capitale * (1 + tasso / 100) ** (anno - 1) * (tasso / 100)
+    
+    return Serie(
+        "anno",
+        anno=anno,
+        capitale=np.round(capitale_anno, 2),
+        guadagno_anno=np.round(guadagno, 2),
+        guadagno_totale=np.round(capitale_anno - capitale, 2)
+    )
+
+
+@cronometra
+def confronta_asset_class(capitale: float, anni: int) -> dict:
+    """Confronta performance di diverse asset class con tassi storici medi"""
+    
+    # Tassi storici approssimativi (solo esempio educativo)
+    tassi = {
+        "Liquidità": 1.0,
+        "Obbligazioni": 3.5,
+        "Azioni": 8.0
+    }
+    
+    risultati = {}
+    
+    for asset, tasso in tassi.items():
+        montante = capitale * ((1 + tasso / 100) ** anni)
+        risultati[asset] = {
+            "tasso": tasso,
+            "montante": montante,
+            "guadagno": montante - capitale
+        }
+    
+    return risultati
+
+
+@cronometra
+def calcola_impatto_inflazione(capitale: float, rendimento: float, inflazione: float, anni: int) -> dict:
+    """Calcola l'impatto dell'inflazione sul rendimento"""
+    
+    rendimento_reale = rendimento - inflazione
+    
+    montante_nominale = capitale * ((1 + rendimento / 100) ** anni)
+    montante_reale = capitale * ((1 + rendimento_reale / 100) ** anni)
+    
+    return {
+        "rendimento_nominale": rendimento,
+        "rendimento_reale": rendimento_reale,
+        "montante_nominale": montante_nominale,
+        "montante_reale": montante_reale,
+        "perdita_inflazione": montante_nominale - montante_reale
+    }
@@ -0,0 +1,249 @@
+"""
+Piani di accumulo (PAC) e Dollar Cost Averaging
+InvestAccademy - Corso di Finanza Personale
+"""
+
+import numpy as np
+
+from .cache import memoizza
+from .tempi import cronometra
+from .casuale import SEME_BASE, normali
+from .parallelo import esegui_percorsi
+from .serie import Serie
+
+
+def _scalare(valore):
+    """Restituisce uno scalare NumPy se l'array ha dimensione zero"""
+    return valore[()]
+
+
+@cronometra
+def fattore_accumulo(mesi, rendimento_mensile):
+    """Capitale accumulato versando 1 all'inizio di ogni mese per `mesi` mesi
+
+    Formula dell'annualità anticipata: (1 + r) * ((1 + r)^m - 1) / r, che vale m
+    quando r = 0. Gli argomenti vengono combinati secondo il broadcasting NumPy.
+    """
+    mesi = np.asarray(mesi, dtype=float)
+    r = np.asarray(rendimento_mensile, dtype=float)
+    fattore = 1 + r
+    with np.errstate(divide="ignore", invalid="ignore"):
+        annualita = fattore * np.expm1(mesi * np.log1p(r)) / r
+    return np.where(r == 0, mesi, annualita)
+
+
+@cronometra
+def totali_pac(importo_mensile, mesi, rendimento_annuo) -> dict:
+    """Versato, capitale finale e guadagno di uno o più PAC a rendimento costante
+
+    Tutti gli argomenti, compresa la durata in mesi, possono essere array
+    (combinati con il broadcasting NumPy): migliaia di piani con durate diverse
+    si valutano in una sola chiamata.
+    """
+    importo = np.asarray(importo_mensile, dtype=float)
+    mesi = np.asarray(mesi, dtype=float)
+    rendimento_mensile = np.asarray(rendimento_annuo, dtype=float) / 100 / 12
+    
+    versato_totale = importo * mesi
+    capitale_finale = importo * fattore_accumulo(mesi, rendimento_mensile)
+    
+    return {
+        "versato_totale": _scalare(versato_totale),
+        "capitale_finale": _scalare(capitale_finale),
+        "guadagno_totale": _scalare(capitale_finale - versato_totale)
+    }
+
+
+@cronometra
+@memoizza
+def simula_pac(importo_mensile, mesi: int, rendimento_annuo) -> dict:
+    """Simula un PAC con rendimento costante
+
+    `importo_mensile` e `rendimento_annuo` possono essere scalari o array: i piani
+    vengono valutati tutti insieme. "evoluzione" è una `Serie` per mese con
+    colonne di forma (..., mesi), dove "..." è la forma combinata dei due
+    argomenti; i totali hanno la forma combinata (scalari se gli argomenti sono
+    scalari).
+    """
+    
+    importo = np.asarray(importo_mensile, dtype=float)
+    rendimento_mensile = np.asarray(rendimento_annuo, dtype=float) / 100 / 12
+    importo, rendimento_mensile = np.broadcast_arrays(importo, rendimento_mensile)
+    
+    mese = np.arange(1, mesi + 1)
+    versato = importo[..., None] * mese
+    capitale = importo[..., None] * fattore_accumulo(mese, rendimento_mensile[..., None])
+    
+    return {
+        "evoluzione": Serie(
+            "mese",
+            mese=mese,
+            versato=versato,
+            capitale=capitale,
+            guadagno=capitale - versato
+        ),
+        **totali_pac(importo, mesi, rendimento_annuo)
+    }
+
+
+@cronometra
+def confronta_pac_vs_pic(importo_totale: float, rendimento_annuo: float, mesi: int) -> dict:
+    """Confronta PAC vs investimento in unica soluzione (PIC)"""
+    
+    # PIC: tutto investito subito
+    capitale_pic = importo_totale * ((1 + rendimento_annuo / 100) ** (mesi / 12))
+    
+    # PAC: investimento mensile
+    importo_mensile = importo_totale / mesi
+    risultato_pac = simula_pac(importo_mensile, mesi, rendimento_annuo)
+    capitale_pac = risultato_pac['capitale_finale']
+    
+    return {
+        "capitale_pic": capitale_pic,
+        "capitale_pac": capitale_pac,
+        "differenza": capitale_pic - capitale_pac,
+        "pac_migliore": capitale_pac > capitale_pic
+    }
+
+
+# Modello dei prezzi per le simulazioni DCA: rendimenti mensili normali
+PREZZO_INIZIALE = 100.0
+PREZZO_MINIMO = 1.0
+MEDIA_MENSILE = 0.005
+VOLATILITA_MENSILE = 0.05
+
+PERCENTILI = (5, 10, 25, 50, 75, 90, 95)
+
+# Memoria massima per blocco di percorsi generati (byte)
+MEMORIA_BLOCCO = 32 * 1024 * 1024
+
+
+def _prezzi_con_minimo(prezzi):
+    """Prezzi senza minimo, forma (mesi - 1, percorsi), riportati al minimo PREZZO_MINIMO
+
+    Equivale a p_t = max(p_{t-1} * (1 + v_t), PREZZO_MINIMO) senza ciclo sui mesi:
+    in scala logaritmica il minimo è una ricorsione di Lindley, risolta con somme
+    cumulate e minimo progressivo. Le somme cumulate dei log(1 + v_t) sono i
+    logaritmi dei prezzi senza minimo, che quindi bastano.
+    """
+    log_minimo = np.log(PREZZO_MINIMO)
+    cumulati = np.log(np.maximum(prezzi, np.finfo(float).tiny) / PREZZO_INIZIALE)
+    distanza = np.maximum(np.log(PREZZO_INIZIALE) - log_minimo, -np.minimum.accumulate(cumulati, axis=0))
+    return np.exp(log_minimo + cumulati + distanza)
+
+
+def _verifica_mesi(mesi: int):
+    if mesi < 1:
+        raise ValueError(f"La simulazione DCA richiede almeno un mese (ricevuti: {mesi})")
+
+
+def _percorsi_dca(uscita, rng, inizio, importo_mensile, mesi, media, volatilita, percorsi_salvati, memoria_blocco):
+    """Quote (colonna 0) e prezzo finale (colonna 1) dei percorsi di un blocco
+
+    Restituisce i prezzi completi dei percorsi con indice globale minore di
+    `percorsi_salvati`, forma (percorsi, mesi), o None.
+    """
+    prezzi_salvati = []
+    
+    # Una matrice (mesi x passo): variazioni, fattori e prezzi la riusano sul posto
+    passo = max(1, memoria_blocco // (8 * max(mesi, 1)))
+    for da in range(0, len(uscita), passo):
+        a = min(da + passo, len(uscita))
+        
+        # Mesi sulle righe: fattori 1 + v_t e prezzi usano la stessa matrice, e il prodotto
+        # cumulato procede riga per riga su memoria contigua (più rapido di np.cumprod)
+        prezzi = normali(None, (mesi - 1, a - da), 1 + media, volatilita, rng=rng)
+        # Un fattore non positivo (v_t <= -100%) porta il prezzo al minimo: eps lo fa senza
+        # mandare in underflow i prodotti successivi, da cui `_prezzi_con_minimo` ricava i passi
+        np.maximum(prezzi, np.finfo(float).eps, out=prezzi)
+        prezzi[:1] *= PREZZO_INIZIALE
+        for mese in range(1, len(prezzi)):
+            np.multiply(prezzi[mese - 1], prezzi[mese], out=prezzi[mese])
+        if prezzi.size:
+            sotto_minimo = prezzi.min(axis=0) < PREZZO_MINIMO
+            if sotto_minimo.any():
+                prezzi[:, sotto_minimo] = _prezzi_con_minimo(prezzi[:, sotto_minimo])
+        
+        uscita[da:a, 1] = prezzi[-1] if prezzi.size else PREZZO_INIZIALE
+        if inizio + da < percorsi_salvati:
+            salvati = prezzi[:, :percorsi_salvati - inizio - da].T
+            iniziali = np.full((salvati.shape[0], 1), PREZZO_INIZIALE)
+            prezzi_salvati.append(np.hstack([iniziali, salvati]))
+        
+        np.reciprocal(prezzi, out=prezzi)
+        uscita[da:a, 0] = importo_mensile * (1 / PREZZO_INIZIALE + prezzi.sum(axis=0))
+    
+    return np.concatenate(prezzi_salvati) if prezzi_salvati else None
+
+
+def _prezzi_salvati(extra, mesi):
+    salvati = [prezzi for prezzi in extra if prezzi is not None]
+    return np.concatenate(salvati) if salvati else np.empty((0, mesi))
+
+
+@cronometra
+@memoizza(max_voci=32)
+def simula_dca_percorsi(importo_mensile: float, mesi: int, n_percorsi: int, seme: int = SEME_BASE,
+                        media: float = MEDIA_MENSILE, volatilita: float = VOLATILITA_MENSILE,
+                        percorsi_salvati: int = 0, memoria_blocco: int = MEMORIA_BLOCCO,
+                        processi: int = None) -> dict:
+    """Distribuzione dei risultati di un PAC su molti percorsi di prezzo
+
+    Per ogni percorso calcola quote acquistate e valore finale del PAC,
+    confrontandolo con l'investimento dello stesso totale in un'unica soluzione
+    (PIC) al primo prezzo. I prezzi sono il prodotto cumulato dei rendimenti
+    mensili; solo i percorsi che scendono sotto PREZZO_MINIMO vengono ricalcolati
+    con il minimo. I percorsi sono divisi tra i processi di `finanza.parallelo` e
+    generati a blocchi entro `memoria_blocco` byte. Restituisce solo percentili e
+    probabilità, più i prezzi completi dei primi `percorsi_salvati` percorsi in
+    "prezzi" (forma (percorsi, mesi)) per i grafici.
+    """
+    
+    _verifica_mesi(mesi)
+    investito = importo_mensile * mesi
+    
+    def riduzione(risultati, extra):
+        quote, prezzo_finale = risultati[:, 0], risultati[:, 1]
+        valore_finale = quote * prezzo_finale
+        valore_pic = investito / PREZZO_INIZIALE * prezzo_finale
+        return {
+            "investito": investito,
+            "percentili": {p: float(v) for p, v in zip(PERCENTILI, np.percentile(valore_finale, PERCENTILI))},
+            "percentili_pic": {p: float(v) for p, v in zip(PERCENTILI, np.percentile(valore_pic, PERCENTILI))},
+            "prob_perdita": float((valore_finale < investito).mean()),
+            "prob_perdita_pic": float((valore_pic < investito).mean()),
+            "prob_pac_migliore": float((valore_finale > valore_pic).mean()),
+            "prezzi": _prezzi_salvati(extra, mesi)
+        }
+    
+    return esegui_percorsi(
+        _percorsi_dca, riduzione, n_percorsi, 2, seme,
+        (importo_mensile, mesi, media, volatilita, percorsi_salvati, memoria_blocco), processi=processi
+    )
+
+
+@cronometra
+def simula_dca_con_volatilita(importo_mensile: float, mesi: int, seme: int = SEME_BASE) -> dict:
+    """Simula l'effetto Dollar Cost Averaging con prezzi variabili (un solo percorso)"""
+    
+    _verifica_mesi(mesi)
+    
+    def riduzione(risultati, extra):
+        return float(risultati[0, 0]), _prezzi_salvati(extra, mesi)[0]
+    
+    quote, prezzi = esegui_percorsi(
+        _percorsi_dca, riduzione, 1, 2, seme,
+        (importo_mensile, mesi, MEDIA_MENSILE, VOLATILITA_MENSILE, 1, MEMORIA_BLOCCO)
+    )
+    investito = importo_mensile * mesi
+    valore_finale = quote * float(prezzi[-1])
+    
+    return {
+        "prezzi": prezzi,
+        "quote_totali": quote,
+        "prezzo_medio": investito / quote if quote > 0 else 0,
+        "prezzo_finale": float(prezzi[-1]),
+        "investito": investito,
+        "valore_finale": valore_finale,
+        "guadagno": valore_finale - investito
+    }
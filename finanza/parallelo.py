@@ -0,0 +1,200 @@
+"""
+Simulazioni Monte Carlo su più processi
+InvestAccademy - Corso di Finanza Personale
+
+Una sessione Streamlit è un thread: anche con NumPy la generazione dei percorsi
+resta di fatto su un solo core. `esegui_percorsi` divide i percorsi in un blocco
+per processo (mai più piccolo di PERCORSI_MINIMI_PER_BLOCCO) e li distribuisce a
+un pool di processi persistente; ogni processo scrive i propri risultati direttamente in un buffer
+`multiprocessing.shared_memory` creato dal chiamante, quindi tra i processi
+viaggiano solo nome del buffer, indici e parametri, mai gli array. Il buffer
+viene ridotto a percentili e probabilità e liberato subito: all'interfaccia
+arrivano solo gli aggregati.
+
+I semi non seguono i blocchi: ogni gruppo di PERCORSI_PER_SEME percorsi ha un
+generatore figlio dello stesso `SeedSequence`, e un blocco calcola i suoi gruppi
+uno dopo l'altro. A parità di seme il risultato è identico con 1 o N processi, e
+in cache resta valido.
+
+Il numero di processi si imposta con la variabile d'ambiente
+`INVESTACCADEMY_PROCESSI` (predefinito: numero di CPU); con 1, o quando i
+percorsi stanno in un solo blocco, vengono calcolati nel processo chiamante
+senza memoria condivisa.
+"""
+
+import atexit
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+
+# Percorsi per generatore: fissa la suddivisione del seme, non dipende dai processi
+PERCORSI_PER_SEME = 1_000
+
+# Percorsi minimi per blocco inviato al pool: sotto, il costo del processo supera il guadagno
+PERCORSI_MINIMI_PER_BLOCCO = 2_000
+
+
+def _processi_da_ambiente() -> int:
+    try:
+        return max(1, int(os.environ.get("INVESTACCADEMY_PROCESSI", "")))
+    except ValueError:
+        return os.cpu_count() or 1
+
+
+PROCESSI = _processi_da_ambiente()
+
+# Un pool per numero di processi: cambiare numero non interrompe le simulazioni in corso
+_pool = {}
+_lock = threading.Lock()
+
+
+def pool(processi: int = None) -> ProcessPoolExecutor:
+    """Pool di processi condiviso, creato alla prima richiesta
+
+    I processi sono avviati con "spawn" (sicuro anche dai thread di Streamlit) e
+    restano attivi tra una simulazione e l'altra; ogni numero di processi ha il
+    suo pool, quindi un'altra sessione che ne chiede un numero diverso non tocca
+    le simulazioni in corso.
+    """
+    import multiprocessing
+
+    processi = processi or PROCESSI
+    with _lock:
+        if processi not in _pool:
+            _pool[processi] = ProcessPoolExecutor(
+                max_workers=processi,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _pool[processi]
+
+
+def _scarta_pool(esecutore: ProcessPoolExecutor):
+    """Toglie un pool rotto (un processo è terminato): verrà ricreato alla richiesta successiva"""
+    with _lock:
+        for processi, attivo in list(_pool.items()):
+            if attivo is esecutore:
+                del _pool[processi]
+    esecutore.shutdown(wait=False)
+
+
+def chiudi_pool():
+    """Termina i processi dei pool dopo il lavoro in corso (vengono ricreati alla simulazione successiva)"""
+    with _lock:
+        esecutori = list(_pool.values())
+        _pool.clear()
+    for esecutore in esecutori:
+        esecutore.shutdown(wait=True)
+
+
+atexit.register(chiudi_pool)
+
+
+def _apri_memoria(nome: str):
+    """Collega un processo del pool a un buffer creato dal chiamante
+
+    Il buffer appartiene al chiamante, che lo distrugge: da Python 3.13 il
+    collegamento non lo registra nel resource tracker. Prima la registrazione
+    avviene, ma nel tracker del chiamante (ereditato dai processi del pool),
+    dove il buffer è già presente e viene rimosso da `unlink`.
+    """
+    from multiprocessing import shared_memory
+
+    try:
+        return shared_memory.SharedMemory(name=nome, track=False)
+    except TypeError:
+        return shared_memory.SharedMemory(name=nome)
+
+
+def _gruppi(n_percorsi: int, seme: int):
+    """(inizio, fine, seme) per ogni gruppo di PERCORSI_PER_SEME percorsi"""
+    inizi = range(0, n_percorsi, PERCORSI_PER_SEME)
+    semi = np.random.SeedSequence(seme).spawn(len(inizi))
+    return [(inizio, min(inizio + PERCORSI_PER_SEME, n_percorsi), s) for inizio, s in zip(inizi, semi)]
+
+
+def _blocchi(gruppi: list, processi: int):
+    """Gruppi consecutivi riuniti in al massimo `processi` blocchi di almeno PERCORSI_MINIMI_PER_BLOCCO percorsi"""
+    minimo = -(-PERCORSI_MINIMI_PER_BLOCCO // PERCORSI_PER_SEME)
+    per_blocco = max(-(-len(gruppi) // processi), minimo, 1)
+    return [gruppi[i:i + per_blocco] for i in range(0, len(gruppi), per_blocco)]
+
+
+def _calcola_blocco(calcolo, risultati, blocco, argomenti):
+    return [
+        calcolo(risultati[inizio:fine], np.random.default_rng(seme_gruppo), inizio, *argomenti)
+        for inizio, fine, seme_gruppo in blocco
+    ]
+
+
+def _blocco_in_processo(nome: str, forma: tuple, calcolo, blocco, argomenti):
+    """Eseguito nel pool: scrive i gruppi di un blocco nel buffer condiviso `nome`"""
+    memoria = _apri_memoria(nome)
+    try:
+        risultati = np.ndarray(forma, dtype=np.float64, buffer=memoria.buf)
+        extra = _calcola_blocco(calcolo, risultati, blocco, argomenti)
+        del risultati  # il buffer non si chiude con viste ancora attive
+        return extra
+    finally:
+        memoria.close()
+
+
+def _in_processo(calcolo, forma, gruppi, argomenti):
+    risultati = np.empty(forma)
+    return risultati, _calcola_blocco(calcolo, risultati, gruppi, argomenti)
+
+
+def esegui_percorsi(calcolo, riduzione, n_percorsi: int, colonne: int, seme: int, argomenti: tuple = (),
+                    processi: int = None):
+    """Calcola la matrice (percorsi, colonne) a blocchi, anche su più processi, e la riduce
+
+    `calcolo(uscita, rng, inizio, *argomenti)` deve essere una funzione di modulo
+    (ai processi viene passata per nome) che riempie `uscita`, la vista delle
+    righe `inizio:inizio + len(uscita)`, usando solo `rng`. Può restituire un
+    oggetto piccolo (es. pochi percorsi da disegnare).
+
+    `riduzione(risultati, extra)` riceve la matrice completa e la lista di ciò
+    che hanno restituito le chiamate a `calcolo`, in ordine, e ne ricava il risultato (es.
+    percentili): la matrice vive in memoria condivisa e viene liberata subito
+    dopo, quindi la riduzione non deve restituirne viste.
+    """
+    processi = processi or PROCESSI
+    forma = (n_percorsi, colonne)
+    gruppi = _gruppi(n_percorsi, seme)
+    blocchi = _blocchi(gruppi, processi)
+
+    if processi < 2 or len(blocchi) < 2:
+        return riduzione(*_in_processo(calcolo, forma, gruppi, argomenti))
+
+    from multiprocessing import shared_memory
+
+    memoria = shared_memory.SharedMemory(create=True, size=n_percorsi * colonne * 8)
+    risultati = None
+    try:
+        risultati = np.ndarray(forma, dtype=np.float64, buffer=memoria.buf)
+        futuri = []
+        esecutore = pool(processi)
+        try:
+            futuri = [
+                esecutore.submit(_blocco_in_processo, memoria.name, forma, calcolo, blocco, argomenti)
+                for blocco in blocchi
+            ]
+            extra = [e for futuro in futuri for e in futuro.result()]
+        except BrokenProcessPool:
+            # Un processo è terminato (es. memoria esaurita): si ricrea il pool alla prossima
+            _scarta_pool(esecutore)
+            extra = _calcola_blocco(calcolo, risultati, gruppi, argomenti)
+        except BaseException:
+            for futuro in futuri:
+                futuro.cancel()
+            raise
+        return riduzione(risultati, extra)
+    finally:
+        risultati = None  # il buffer non si chiude con viste ancora attive
+        memoria.unlink()
+        try:
+            memoria.close()
+        except BufferError:
+            pass  # viste trattenute da un'eccezione: la mappatura si libera con loro
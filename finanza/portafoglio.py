@@ -0,0 +1,148 @@
+"""
+Profilo di rischio e simulazione di portafoglio
+InvestAccademy - Corso di Finanza Personale
+"""
+
+import numpy as np
+
+from .cache import memoizza
+from .tempi import cronometra
+from .casuale import SEME_BASE
+from .parallelo import esegui_percorsi
+
+
+@cronometra
+def calcola_profilo_rischio(domande_risposte: dict) -> dict:
+    """Calcola il profilo di rischio basato sulle risposte"""
+    punteggio = sum(domande_risposte.values())
+    
+    if punteggio <= 10:
+        profilo = "Prudente"
+        descrizione = "Preferisci stabilità e hai bassa tolleranza alle oscillazioni"
+        allocazione = {"Azioni": 30, "Obbligazioni": 60, "Oro": 10}
+        colore = "🟢"
+    elif punteggio <= 17:
+        profilo = "Bilanciato"
+        descrizione = "Cerchi equilibrio tra crescita e stabilità"
+        allocazione = {"Azioni": 60, "Obbligazioni": 35, "Oro": 5}
+        colore = "🔵"
+    else:
+        profilo = "Dinamico"
+        descrizione = "Punti alla crescita di lungo periodo e accetti volatilità"
+        allocazione = {"Azioni": 80, "Obbligazioni": 15, "Oro": 5}
+        colore = "🔴"
+    
+    return {
+        "punteggio": punteggio,
+        "profilo": profilo,
+        "descrizione": descrizione,
+        "allocazione": allocazione,
+        "colore": colore
+    }
+
+
+# Parametri storici approssimativi (solo esempio educativo), in % annuo
+ASSET = ("Azioni", "Obbligazioni", "Oro")
+RENDIMENTI_ATTESI = (8.0, 3.5, 2.5)
+VOLATILITA = (18.0, 6.0, 15.0)
+CORRELAZIONI = (
+    (1.00, 0.10, 0.05),
+    (0.10, 1.00, 0.20),
+    (0.05, 0.20, 1.00)
+)
+
+PERCENTILI = (5, 10, 25, 50, 75, 90, 95)
+N_PERCORSI = 20_000
+
+# Memoria massima per blocco di percorsi generati (byte)
+MEMORIA_BLOCCO = 32 * 1024 * 1024
+
+
+@cronometra
+def matrice_covarianza(volatilita=VOLATILITA, correlazioni=CORRELAZIONI):
+    """Matrice di covarianza dei rendimenti annui (in frazioni, non in %)"""
+    vol = np.asarray(volatilita, dtype=float) / 100
+    return np.asarray(correlazioni, dtype=float) * np.outer(vol, vol)
+
+
+def _percorsi_portafoglio(uscita, rng, inizio, capitale, anni, media, deviazione, memoria_blocco):
+    """Capitale finale dei percorsi di un blocco, nella colonna 0 di `uscita`"""
+    passo = max(1, memoria_blocco // (8 * max(anni, 1)))
+    for da in range(0, len(uscita), passo):
+        a = min(da + passo, len(uscita))
+        rendimenti_annui = rng.standard_normal((a - da, anni))
+        rendimenti_annui *= deviazione
+        rendimenti_annui += media
+        # Un anno non può far perdere più del 100%
+        np.maximum(rendimenti_annui, -1.0, out=rendimenti_annui)
+        uscita[da:a, 0] = capitale * np.exp(np.log1p(rendimenti_annui).sum(axis=1))
+
+
+@cronometra
+def montecarlo_portafoglio(pesi, capitale: float, anni: int, n_percorsi: int = N_PERCORSI,
+                           seme: int = SEME_BASE, rendimenti=RENDIMENTI_ATTESI,
+                           covarianza=None, memoria_blocco: int = MEMORIA_BLOCCO,
+                           processi: int = None) -> dict:
+    """Distribuzione del capitale finale di un portafoglio ribilanciato ogni anno
+
+    I rendimenti annui degli asset sono normali multivariati con la covarianza data.
+    Con ribilanciamento annuo il rendimento del portafoglio è w·r, quindi è normale
+    con varianza w'Σw: si simula direttamente quello, un numero per anno e percorso.
+    I percorsi sono divisi tra i processi di `finanza.parallelo` e generati a
+    blocchi che restano entro `memoria_blocco` byte; di ogni percorso si conserva
+    solo il capitale finale, e di questi solo percentili e probabilità.
+    """
+    
+    pesi = np.asarray(pesi, dtype=float)
+    if covarianza is None:
+        covarianza = matrice_covarianza()
+    media = float(pesi @ (np.asarray(rendimenti, dtype=float) / 100))
+    deviazione = float(np.sqrt(pesi @ np.asarray(covarianza, dtype=float) @ pesi))
+    
+    def riduzione(risultati, _):
+        finali = risultati[:, 0]
+        return {
+            "percentili": {p: float(v) for p, v in zip(PERCENTILI, np.percentile(finali, PERCENTILI))},
+            "media": float(finali.mean()),
+            "prob_perdita": float((finali < capitale).mean())
+        }
+    
+    aggregati = esegui_percorsi(
+        _percorsi_portafoglio, riduzione, n_percorsi, 1, seme,
+        (capitale, anni, media, deviazione, memoria_blocco), processi=processi
+    )
+    
+    return {
+        **aggregati,
+        "rendimento_atteso": media * 100,
+        "volatilita": deviazione * 100,
+        "n_percorsi": n_percorsi
+    }
+
+
+@cronometra
+@memoizza
+def simula_portafoglio(azioni_perc: float, obblig_perc: float, oro_perc: float, 
+                       capitale: float, anni: int, seme: int = SEME_BASE) -> dict:
+    """Simula l'andamento di un portafoglio con diversa asset allocation
+    
+    Il montante atteso compone il rendimento medio; gli scenari pessimistico e
+    ottimistico sono il 10° e il 90° percentile di una simulazione Monte Carlo.
+    """
+    
+    pesi = np.array([azioni_perc, obblig_perc, oro_perc]) / 100
+    simulazione = montecarlo_portafoglio(pesi, capitale, anni, seme=seme)
+    
+    rendimento_portafoglio = simulazione["rendimento_atteso"]
+    montante = capitale * ((1 + rendimento_portafoglio / 100) ** anni)
+    
+    return {
+        "rendimento_atteso": rendimento_portafoglio,
+        "volatilita": simulazione["volatilita"],
+        "montante_atteso": montante,
+        "montante_pessimistico": simulazione["percentili"][10],
+        "montante_ottimistico": simulazione["percentili"][90],
+        "montante_mediano": simulazione["percentili"][50],
+        "prob_perdita": simulazione["prob_perdita"],
+        "percentili": simulazione["percentili"]
+    }
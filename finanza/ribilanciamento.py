@@ -0,0 +1,400 @@
+"""
+Ribilanciamento e drift del portafoglio
+InvestAccademy - Corso di Finanza Personale
+"""
+
+import numpy as np
+
+from .cache import memoizza
+from .serie import Serie
+from .tempi import cronometra
+from .casuale import SEME_BASE, normali_multivariate
+from .portafoglio import RENDIMENTI_ATTESI, matrice_covarianza
+
+
+@cronometra
+def calcola_ribilanciamento(portafoglio_attuale: dict, target: dict, soglia: float = 5.0) -> dict:
+    """Calcola le operazioni necessarie per il ribilanciamento"""
+    
+    valore_totale = sum(portafoglio_attuale.values())
+    
+    scostamenti = {}
+    operazioni = {}
+    
+    for asset, valore_attuale in portafoglio_attuale.items():
+        perc_attuale = (valore_attuale / valore_totale * 100) if valore_totale > 0 else 0
+        perc_target = target.get(asset, 0)
+        
+        scostamento = perc_attuale - perc_target
+        valore_target = valore_totale * (perc_target / 100)
+        operazione = valore_target - valore_attuale
+        
+        scostamenti[asset] = {
+            "valore_attuale": valore_attuale,
+            "perc_attuale": perc_attuale,
+            "perc_target": perc_target,
+            "scostamento": scostamento,
+            "valore_target": valore_target,
+            "operazione": operazione
+        }
+        
+        operazioni[asset] = operazione
+    
+    return {
+        "scostamenti": scostamenti,
+        "operazioni": operazioni,
+        "valore_totale": valore_totale,
+        "necessario": any(abs(s["scostamento"]) > soglia for s in scostamenti.values())
+    }
+
+
+def _valori_drift(azioni_iniz, obblig_iniz, anno, rend_azioni, rend_obblig) -> dict:
+    """Valori e pesi dopo `anno` anni senza ribilanciamento (broadcasting NumPy)"""
+    azioni = np.asarray(azioni_iniz, dtype=float) * (1 + np.asarray(rend_azioni, dtype=float) / 100) ** anno
+    obblig = np.asarray(obblig_iniz, dtype=float) * (1 + np.asarray(rend_obblig, dtype=float) / 100) ** anno
+    totale = azioni + obblig
+    
+    with np.errstate(divide="ignore", invalid="ignore"):
+        perc_azioni = np.where(totale > 0, azioni / totale * 100, 0.0)
+        perc_obblig = np.where(totale > 0, obblig / totale * 100, 0.0)
+    
+    return {
+        "azioni": azioni,
+        "obbligazioni": obblig,
+        "totale": totale,
+        "perc_azioni": perc_azioni,
+        "perc_obbligazioni": perc_obblig
+    }
+
+
+@cronometra
+def drift_finale(azioni_iniz, obblig_iniz, anni, rend_azioni, rend_obblig) -> dict:
+    """Composizione finale di uno o più portafogli lasciati senza ribilanciamento
+
+    Gli argomenti possono essere array con orizzonti diversi: si calcola solo
+    l'ultimo anno di ogni portafoglio. "drift" è la variazione in punti
+    percentuali del peso delle azioni.
+    """
+    iniziale = _valori_drift(azioni_iniz, obblig_iniz, 0, 0, 0)
+    finale = _valori_drift(azioni_iniz, obblig_iniz, np.asarray(anni, dtype=float), rend_azioni, rend_obblig)
+    finale["drift"] = finale["perc_azioni"] - iniziale["perc_azioni"]
+    return {chiave: valore[()] for chiave, valore in finale.items()}
+
+
+@cronometra
+@memoizza
+def simula_drift(azioni_iniz: float, obblig_iniz: float, anni: int, 
+                 rend_azioni: float, rend_obblig: float) -> Serie:
+    """Simula il drift del portafoglio senza ribilanciamento
+    
+    Colonne dall'anno 0 ad `anni`: valori di azioni, obbligazioni e totale, e
+    pesi percentuali (zero se il portafoglio è vuoto).
+    """
+    
+    anno = np.arange(anni + 1)
+    return Serie("anno", anno=anno, **_valori_drift(azioni_iniz, obblig_iniz, anno, rend_azioni, rend_obblig))
+
+
+POLITICHE = ("mai", "annuale", "trimestrale", "bande")
+
+# Scambi sotto questa frazione del portafoglio non contano come operazioni
+SOGLIA_OPERAZIONE = 1e-9
+
+
+def politica_mai():
+    """Nessun ribilanciamento: il portafoglio deriva liberamente"""
+    return lambda periodo, pesi, pesi_target: False
+
+
+def politica_calendario(ogni_periodi: int):
+    """Ribilancia alla fine di ogni blocco di `ogni_periodi` periodi"""
+    return lambda periodo, pesi, pesi_target: (periodo + 1) % ogni_periodi == 0
+
+
+def politica_bande(banda: float):
+    """Ribilancia i percorsi in cui un asset si scosta dal target di oltre ±`banda` punti %"""
+    return lambda periodo, pesi, pesi_target: (np.abs(pesi - pesi_target) > banda / 100).any(axis=-1)
+
+
+def crea_politica(nome: str, periodi_anno: int = 12, banda: float = 5.0):
+    """Politica di ribilanciamento a partire dal nome (vedi POLITICHE)"""
+    if nome == "mai":
+        return politica_mai()
+    if nome == "annuale":
+        return politica_calendario(periodi_anno)
+    if nome == "trimestrale":
+        if periodi_anno % 4:
+            raise ValueError(f"Ribilanciamento trimestrale impossibile con {periodi_anno} periodi all'anno")
+        return politica_calendario(periodi_anno // 4)
+    if nome == "bande":
+        return politica_bande(banda)
+    raise ValueError(f"Politica sconosciuta: {nome!r} (attese: {', '.join(POLITICHE)})")
+
+
+@cronometra
+def genera_rendimenti(n_percorsi: int, anni: int, periodi_anno: int = 12, seme: int = SEME_BASE,
+                      rendimenti=RENDIMENTI_ATTESI, covarianza=None) -> np.ndarray:
+    """Rendimenti semplici per periodo, forma (percorsi, periodi, asset)
+
+    Normali multivariate con media e covarianza annue (in %) riscalate al periodo.
+    """
+    if covarianza is None:
+        covarianza = matrice_covarianza()
+    media = np.asarray(rendimenti, dtype=float) / 100 / periodi_anno
+    covarianza = np.asarray(covarianza, dtype=float) / periodi_anno
+    periodi = anni * periodi_anno
+    estratti = normali_multivariate(seme, media, covarianza, n_percorsi * periodi)
+    return estratti.reshape(n_percorsi, periodi, media.size)
+
+
+@cronometra
+def backtest_ribilanciamento(rendimenti, pesi_target, politica="mai", periodi_anno: int = 12,
+                             banda: float = 5.0, capitale: float = 100_000.0,
+                             costo_transazione: float = 0.0) -> dict:
+    """Backtest di una politica di ribilanciamento su N asset e M percorsi
+
+    `rendimenti` ha forma (percorsi, periodi, asset), simulati o storici. La
+    politica è un nome di POLITICHE o una funzione (periodo, pesi, pesi_target)
+    che restituisce, per ogni percorso, se ribilanciare a fine periodo. Si
+    itera sui periodi, ma ogni passo elabora tutti i percorsi insieme.
+    `costo_transazione` è in % dell'importo scambiato.
+    """
+    
+    rendimenti = np.asarray(rendimenti, dtype=float)
+    n_percorsi, periodi, n_asset = rendimenti.shape
+    target = np.asarray(pesi_target, dtype=float)
+    target = target / target.sum()
+    if isinstance(politica, str):
+        politica = crea_politica(politica, periodi_anno, banda)
+    
+    valori = np.tile(capitale * target, (n_percorsi, 1))
+    pesi_medi = np.empty((periodi + 1, n_asset))
+    pesi_medi[0] = target
+    drift_massimo = np.zeros(n_percorsi)
+    turnover = np.zeros(n_percorsi)
+    costi = np.zeros(n_percorsi)
+    n_ribilanciamenti = np.zeros(n_percorsi, dtype=int)
+    n_operazioni = np.zeros(n_percorsi, dtype=int)
+    
+    for periodo in range(periodi):
+        valori *= 1 + rendimenti[:, periodo]
+        totale = valori.sum(axis=1)
+        pesi = valori / totale[:, np.newaxis]
+        np.maximum(drift_massimo, np.abs(pesi - target).max(axis=1), out=drift_massimo)
+        
+        da_ribilanciare = np.broadcast_to(politica(periodo, pesi, target), (n_percorsi,))
+        if da_ribilanciare.any():
+            totale_sel = totale[da_ribilanciare]
+            scambi = np.abs(totale_sel[:, np.newaxis] * target - valori[da_ribilanciare])
+            scambiato = scambi.sum(axis=1)
+            costo = scambiato * costo_transazione / 100
+            
+            valori[da_ribilanciare] = (totale_sel - costo)[:, np.newaxis] * target
+            pesi[da_ribilanciare] = target
+            turnover[da_ribilanciare] += scambiato / 2 / totale_sel
+            costi[da_ribilanciare] += costo
+            n_ribilanciamenti[da_ribilanciare] += 1
+            n_operazioni[da_ribilanciare] += (scambi > SOGLIA_OPERAZIONE * totale_sel[:, np.newaxis]).sum(axis=1)
+        
+        pesi_medi[periodo + 1] = pesi.mean(axis=0)
+    
+    valore_finale = valori.sum(axis=1)
+    
+    return {
+        "valore_finale": valore_finale,
+        "pesi_finali": valori / valore_finale[:, np.newaxis],
+        "pesi_medi": pesi_medi,
+        "drift_massimo": drift_massimo * 100,
+        "drift_finale": np.abs(valori / valore_finale[:, np.newaxis] - target).max(axis=1) * 100,
+        "turnover": turnover * 100,
+        "costi": costi,
+        "n_ribilanciamenti": n_ribilanciamenti,
+        "n_operazioni": n_operazioni
+    }
+
+
+@cronometra
+@memoizza(max_voci=32)
+def confronta_politiche(pesi_target, anni: int, banda: float = 5.0, n_percorsi: int = 2_000,
+                        seme: int = SEME_BASE, periodi_anno: int = 12, capitale: float = 100_000.0,
+                        costo_transazione: float = 0.0, politiche=POLITICHE) -> dict:
+    """Confronta le politiche di ribilanciamento sugli stessi percorsi simulati
+
+    Per ogni politica restituisce medie e percentili di valore finale, drift,
+    turnover (in % del portafoglio) e numero di operazioni, più l'allocazione
+    media periodo per periodo.
+    """
+    
+    rendimenti = genera_rendimenti(n_percorsi, anni, periodi_anno, seme)
+    confronto = {}
+    
+    for nome in politiche:
+        esito = backtest_ribilanciamento(rendimenti, pesi_target, nome, periodi_anno,
+                                         banda, capitale, costo_transazione)
+        confronto[nome] = {
+            "valore_mediano": float(np.median(esito["valore_finale"])),
+            "valore_p5": float(np.percentile(esito["valore_finale"], 5)),
+            "valore_p95": float(np.percentile(esito["valore_finale"], 95)),
+            "drift_massimo_medio": float(esito["drift_massimo"].mean()),
+            "drift_finale_medio": float(esito["drift_finale"].mean()),
+            "turnover_medio": float(esito["turnover"].mean()),
+            "ribilanciamenti_medi": float(esito["n_ribilanciamenti"].mean()),
+            "operazioni_medie": float(esito["n_operazioni"].mean()),
+            "costi_medi": float(esito["costi"].mean()),
+            "pesi_medi": esito["pesi_medi"]
+        }
+    
+    return confronto
+
+
+# Iterazioni massime per stabilizzare i costi di transazione, e tolleranza (€)
+ITERAZIONI_COSTI = 20
+TOLLERANZA_COSTI = 0.005
+
+
+def _riempi(importo: float, capacita: np.ndarray, ordine: np.ndarray) -> np.ndarray:
+    """Distribuisce `importo` riempiendo le capacità nell'ordine dato, una alla volta"""
+    assegnato = np.zeros_like(capacita)
+    capacita_ordinata = capacita[ordine]
+    gia_usato = np.cumsum(capacita_ordinata) - capacita_ordinata
+    assegnato[ordine] = np.clip(importo - gia_usato, 0, capacita_ordinata)
+    return assegnato
+
+
+def _obiettivo_classi(valori_classe: np.ndarray, target: np.ndarray, bande: np.ndarray,
+                      totale: float) -> np.ndarray:
+    """Valori per classe dopo il ribilanciamento con il minimo di importi scambiati
+
+    Le classi fuori banda vengono portate al bordo più vicino (non al target);
+    la differenza con il totale disponibile (versamenti, vendite) va alle classi
+    sotto target o viene presa da quelle sopra target, preferendo quelle che
+    già si muovono nella stessa direzione, così da toccare meno classi.
+    """
+    minimo = np.clip(target - bande, 0, None) * totale
+    massimo = (target + bande) * totale
+    obiettivo = np.clip(valori_classe, minimo, massimo)
+    residuo = totale - obiettivo.sum()
+    
+    if residuo > 0:
+        spazio = np.clip(target * totale - obiettivo, 0, None)
+        gia_in_acquisto = obiettivo > valori_classe
+        obiettivo += _riempi(residuo, spazio, np.lexsort((-spazio, ~gia_in_acquisto)))
+    elif residuo < 0:
+        eccesso = np.clip(obiettivo - target * totale, 0, None)
+        gia_in_vendita = obiettivo < valori_classe
+        obiettivo -= _riempi(-residuo, eccesso, np.lexsort((-eccesso, ~gia_in_vendita)))
+    
+    return obiettivo
+
+
+def _costi_operazioni(operazioni: np.ndarray, costo_fisso: float, costo_percentuale: float) -> float:
+    """Costi fissi per operazione più costi in % degli importi scambiati"""
+    return np.count_nonzero(operazioni) * costo_fisso + np.abs(operazioni).sum() * costo_percentuale / 100
+
+
+def _limita_acquisti(operazioni: np.ndarray, contributo: float, costo_fisso: float,
+                     costo_percentuale: float) -> np.ndarray:
+    """Riduce gli acquisti in proporzione finché acquisti e costi stanno nella liquidità
+
+    La liquidità è il contributo più il ricavato delle vendite. Ridurre gli
+    acquisti abbassa i costi in % e, azzerandone qualcuno, quelli fissi: il
+    vincolo resta rispettato.
+    """
+    acquisti = operazioni[operazioni > 0].sum()
+    vendite = -operazioni[operazioni < 0].sum()
+    costi = _costi_operazioni(operazioni, costo_fisso, costo_percentuale)
+    if acquisti <= 0 or contributo + vendite - acquisti - costi >= 0:
+        return operazioni
+    
+    costi_fissi = np.count_nonzero(operazioni) * costo_fisso
+    disponibile = contributo + vendite * (1 - costo_percentuale / 100) - costi_fissi
+    fattore = np.clip(disponibile / (acquisti * (1 + costo_percentuale / 100)), 0.0, 1.0)
+    # Arrotondamento per difetto al centesimo: la somma in virgola mobile non deve sforare
+    ridotti = np.floor(operazioni * fattore * 100) / 100
+    return np.where(operazioni > 0, ridotti, operazioni)
+
+
+@cronometra
+def ottimizza_ribilanciamento(valori, classi, target, bande=5.0, contributo: float = 0.0,
+                              costo_fisso: float = 0.0, costo_percentuale: float = 0.0) -> dict:
+    """Insieme minimo di operazioni per riportare le classi di asset entro le bande
+
+    `valori` e `classi` descrivono le posizioni (una riga per titolo, classe come
+    indice intero); `target` e `bande` sono per classe, in punti %. Il nuovo
+    `contributo` viene investito prima di vendere: se basta a rientrare nelle
+    bande non si vende nulla. Per classe si compra un solo titolo (la posizione
+    più grande) e si vende dalle posizioni più grandi, così il numero di
+    operazioni resta minimo. I costi (fissi per operazione e in % dell'importo)
+    sono pagati dalla liquidità disponibile: se non si stabilizzano entro
+    ITERAZIONI_COSTI passaggi, gli acquisti vengono ridotti in proporzione
+    perché operazioni e costi non superino contributo e vendite.
+    """
+    
+    valori = np.asarray(valori, dtype=float)
+    classi = np.asarray(classi, dtype=int)
+    target = np.asarray(target, dtype=float) / 100
+    target = target / target.sum()
+    bande = np.broadcast_to(np.asarray(bande, dtype=float) / 100, target.shape)
+    n_classi = target.size
+    
+    valori_classe = np.bincount(classi, weights=valori, minlength=n_classi)
+    patrimonio = valori_classe.sum()
+    pesi_prima = valori_classe / patrimonio if patrimonio > 0 else np.zeros(n_classi)
+    
+    # Posizioni ordinate per classe e valore decrescente: la prima di ogni classe è la più grande
+    ordine = np.lexsort((-valori, classi))
+    inizio_classe = np.searchsorted(classi[ordine], np.arange(n_classi))
+    ha_posizioni = np.bincount(classi, minlength=n_classi) > 0
+    
+    costi = 0.0
+    for _ in range(ITERAZIONI_COSTI):
+        totale = max(patrimonio + contributo - costi, 0.0)
+        obiettivo = _obiettivo_classi(valori_classe, target, bande, totale)
+        flussi = obiettivo - valori_classe
+        
+        operazioni = np.zeros_like(valori)
+        
+        # Acquisti: un'unica operazione sulla posizione più grande della classe
+        acquisti = (flussi > 0) & ha_posizioni
+        operazioni[ordine[inizio_classe[acquisti]]] = flussi[acquisti]
+        
+        # Vendite: dalle posizioni più grandi finché l'importo è coperto
+        da_vendere = np.clip(-flussi, 0, None)[classi[ordine]]
+        valori_ordinati = valori[ordine]
+        cumulato = np.cumsum(valori_ordinati)
+        base_classe = (cumulato - valori_ordinati)[inizio_classe[classi[ordine]]]
+        gia_venduto = cumulato - valori_ordinati - base_classe
+        operazioni[ordine] -= np.clip(da_vendere - gia_venduto, 0, valori_ordinati)
+        
+        operazioni[np.abs(operazioni) <= SOGLIA_OPERAZIONE * max(totale, 1.0)] = 0.0
+        nuovi_costi = _costi_operazioni(operazioni, costo_fisso, costo_percentuale)
+        if abs(nuovi_costi - costi) < TOLLERANZA_COSTI:
+            break
+        costi = nuovi_costi
+    
+    # Le operazioni sono calcolate con i costi del passaggio precedente: se differiscono
+    # ancora (es. oscillano con il numero di operazioni) gli acquisti potrebbero sforare
+    if contributo >= 0:
+        operazioni = _limita_acquisti(operazioni, contributo, costo_fisso, costo_percentuale)
+    eseguite = operazioni != 0
+    costi = _costi_operazioni(operazioni, costo_fisso, costo_percentuale)
+    
+    valori_dopo = np.bincount(classi, weights=valori + operazioni, minlength=n_classi)
+    totale_dopo = valori_dopo.sum()
+    pesi_dopo = valori_dopo / totale_dopo if totale_dopo > 0 else np.zeros(n_classi)
+    
+    return {
+        "operazioni": operazioni,
+        "operazioni_classe": np.bincount(classi, weights=operazioni, minlength=n_classi),
+        "valori_classe": valori_classe,
+        "valori_classe_dopo": valori_dopo,
+        "pesi_prima": pesi_prima * 100,
+        "pesi_dopo": pesi_dopo * 100,
+        "dentro_bande_prima": bool(np.all(np.abs(pesi_prima - target) <= bande + 1e-12)),
+        "n_operazioni": int(eseguite.sum()),
+        "n_vendite": int((eseguite & (operazioni < 0)).sum()),
+        "solo_contributo": not bool((eseguite & (operazioni < 0)).any()),
+        "costi": float(costi),
+        # Al centesimo: investendo tutto resterebbe solo rumore di arrotondamento (es. -1e-11)
+        "liquidita_residua": round(float(contributo - operazioni.sum() - costi), 2) + 0.0
+    }
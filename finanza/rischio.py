@@ -0,0 +1,108 @@
+"""
+Correlazione e diversificazione
+InvestAccademy - Corso di Finanza Personale
+"""
+
+import numpy as np
+
+from .cache import memoizza
+from .tempi import cronometra
+from .casuale import SEME_BASE, normali_multivariate
+from .parallelo import esegui_percorsi
+from .serie import Serie
+
+
+@cronometra
+@memoizza
+def simula_correlazione(corr: float, volatilita_a: float, volatilita_b: float, periodi: int = 100,
+                        seme: int = SEME_BASE) -> dict:
+    """Simula due asset con correlazione specifica"""
+    
+    # Genera rendimenti correlati
+    mean = [0, 0]
+    cov = [[volatilita_a**2, corr * volatilita_a * volatilita_b],
+           [corr * volatilita_a * volatilita_b, volatilita_b**2]]
+    
+    rendimenti = normali_multivariate(seme, mean, cov, periodi)
+    
+    asset_a = 100 * np.exp(np.cumsum(rendimenti[:, 0] / 100))
+    asset_b = 100 * np.exp(np.cumsum(rendimenti[:, 1] / 100))
+    portafoglio = (asset_a + asset_b) / 2
+    
+    return {
+        "asset_a": asset_a,
+        "asset_b": asset_b,
+        "portafoglio": portafoglio,
+        "vol_a": np.std(rendimenti[:, 0]),
+        "vol_b": np.std(rendimenti[:, 1]),
+        "vol_portafoglio": np.std((rendimenti[:, 0] + rendimenti[:, 1]) / 2)
+    }
+
+
+# Griglia di correlazioni e percorsi per la curva della diversificazione
+CORRELAZIONI_CURVA = tuple(round(c, 1) for c in np.linspace(-1, 1, 21))
+N_PERCORSI_CURVA = 5_000
+PERCENTILI_CURVA = (5, 50, 95)
+
+# Memoria massima per blocco di percorsi generati (byte)
+MEMORIA_BLOCCO = 32 * 1024 * 1024
+
+
+def _percorsi_correlazione(uscita, rng, inizio, correlazioni, volatilita_a, volatilita_b, periodi, memoria_blocco):
+    """Volatilità del portafoglio 50/50 per percorso (righe) e correlazione (colonne)
+
+    Le stesse due serie di normali standard z1, z2 servono per tutte le
+    correlazioni: con r_a = σa·z1 e r_b = σb·(ρ·z1 + √(1-ρ²)·z2) il portafoglio
+    è c1·z1 + c2·z2, e la sua deviazione standard campionaria si ricava dalle
+    varianze e dalla covarianza campionarie di z1 e z2, senza rigenerare nulla.
+    """
+    rho = np.asarray(correlazioni, dtype=float)
+    c1 = (volatilita_a + volatilita_b * rho) / 2
+    c2 = volatilita_b * np.sqrt(np.clip(1 - rho**2, 0, None)) / 2
+    
+    # Due matrici (passo x periodi) vive contemporaneamente
+    passo = max(1, memoria_blocco // (8 * 2 * max(periodi, 1)))
+    for da in range(0, len(uscita), passo):
+        a = min(da + passo, len(uscita))
+        z1 = rng.standard_normal((a - da, periodi))
+        z2 = rng.standard_normal((a - da, periodi))
+        z1 -= z1.mean(axis=1, keepdims=True)
+        z2 -= z2.mean(axis=1, keepdims=True)
+        var1 = np.einsum("ij,ij->i", z1, z1)[:, None] / periodi
+        var2 = np.einsum("ij,ij->i", z2, z2)[:, None] / periodi
+        cov12 = np.einsum("ij,ij->i", z1, z2)[:, None] / periodi
+        varianza = c1**2 * var1 + c2**2 * var2 + 2 * c1 * c2 * cov12
+        uscita[da:a] = np.sqrt(np.maximum(varianza, 0))
+
+
+@cronometra
+@memoizza
+def curva_diversificazione(volatilita_a: float, volatilita_b: float, periodi: int = 100,
+                           n_percorsi: int = N_PERCORSI_CURVA, correlazioni=CORRELAZIONI_CURVA,
+                           seme: int = SEME_BASE, processi: int = None) -> Serie:
+    """Volatilità del portafoglio 50/50 al variare della correlazione tra i due asset
+
+    Per ogni correlazione simula `n_percorsi` coppie di serie di `periodi`
+    rendimenti (come `simula_correlazione`) e restituisce i percentili
+    PERCENTILI_CURVA della volatilità realizzata ("p5", "p50", "p95") accanto a
+    quella teorica √(σa² + σb² + 2ρσaσb) / 2. I percorsi sono divisi tra i
+    processi di `finanza.parallelo`.
+    """
+    
+    rho = np.asarray(correlazioni, dtype=float)
+    
+    def riduzione(risultati, _):
+        return np.percentile(risultati, PERCENTILI_CURVA, axis=0)
+    
+    percentili = esegui_percorsi(
+        _percorsi_correlazione, riduzione, n_percorsi, rho.size, seme,
+        (rho, volatilita_a, volatilita_b, periodi, MEMORIA_BLOCCO), processi=processi
+    )
+    teorica = np.sqrt(volatilita_a**2 + volatilita_b**2 + 2 * rho * volatilita_a * volatilita_b) / 2
+    
+    return Serie(
+        "correlazione",
+        correlazione=rho,
+        teorica=teorica,
+        **{f"p{p}": valori for p, valori in zip(PERCENTILI_CURVA, percentili)}
+    )
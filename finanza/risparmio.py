@@ -0,0 +1,172 @@
+"""
+Piani di risparmio e fondo di emergenza
+InvestAccademy - Corso di Finanza Personale
+"""
+
+import math
+
+import numpy as np
+
+from .cache import memoizza
+from .serie import Serie
+from .tempi import cronometra
+
+# Tolleranza sul numero di mesi calcolato con i logaritmi (evita 12.0000001 -> 13)
+TOLLERANZA_MESI = 1e-9
+
+# Durata massima di un piano mese per mese (100 anni): oltre, il piano non viene generato
+MESI_MASSIMI = 1200
+
+
+def _tasso_mensile(rendimento_annuo: float) -> float:
+    """Tasso mensile equivalente a un rendimento annuo composto, in frazione"""
+    return (1 + rendimento_annuo / 100) ** (1 / 12) - 1
+
+
+@cronometra
+def mesi_per_obiettivo(obiettivo: float, risparmio_mensile: float, rendimento_annuo: float = 0.0,
+                       capitale_iniziale: float = 0.0) -> float:
+    """Mesi necessari per raggiungere l'obiettivo, arrotondati per eccesso
+
+    Con versamenti R a fine mese, tasso mensile i e capitale iniziale P il saldo
+    dopo n mesi è P·g^n + R·(g^n - 1)/i con g = 1 + i; si risolve per n con i
+    logaritmi. Restituisce `math.inf` se l'obiettivo non è raggiungibile.
+    """
+    if capitale_iniziale >= obiettivo:
+        return 0
+    
+    i = _tasso_mensile(rendimento_annuo)
+    if i == 0:
+        if risparmio_mensile <= 0:
+            return math.inf
+        mesi = (obiettivo - capitale_iniziale) / risparmio_mensile
+    else:
+        numeratore = obiettivo * i + risparmio_mensile
+        denominatore = capitale_iniziale * i + risparmio_mensile
+        if denominatore <= 0 or numeratore / denominatore <= 0:
+            return math.inf
+        mesi = math.log(numeratore / denominatore) / math.log1p(i)
+        if mesi < 0:
+            return math.inf
+    
+    return math.ceil(mesi - TOLLERANZA_MESI)
+
+
+@cronometra
+def risparmio_necessario(obiettivo: float, mesi: int, rendimento_annuo: float = 0.0,
+                         capitale_iniziale: float = 0.0) -> float:
+    """Versamento mensile che porta all'obiettivo in `mesi` mesi"""
+    if mesi <= 0:
+        return 0
+    
+    i = _tasso_mensile(rendimento_annuo)
+    crescita = (1 + i) ** mesi
+    mancante = obiettivo - capitale_iniziale * crescita
+    if mancante <= 0:
+        return 0
+    if i == 0:
+        return mancante / mesi
+    return mancante * i / (crescita - 1)
+
+
+@cronometra
+@memoizza
+def piano_accumulo(obiettivo: float, risparmio_mensile: float, rendimento_annuo: float = 0.0,
+                   capitale_iniziale: float = 0.0) -> dict:
+    """Piano mese per mese fino al raggiungimento dell'obiettivo
+
+    Il numero di mesi è calcolato in forma chiusa e tutte le colonne sono
+    costruite in un solo passaggio vettoriale. L'ultimo versamento è ridotto al
+    solo importo mancante (a zero se bastano gli interessi).
+    
+    Se l'obiettivo non è raggiungibile, o richiede più di MESI_MASSIMI mesi, il
+    piano è vuoto e "raggiungibile" vale False; "oltre_limite" distingue il
+    secondo caso, in cui "mesi" resta la durata calcolata. Nessun troncamento
+    silenzioso, e la memoria usata resta limitata qualunque sia l'obiettivo.
+    
+    "evoluzione" è una `Serie` per mese con versamento, interessi, accumulato e
+    percentuale dell'obiettivo raggiunta.
+    """
+    
+    mesi = mesi_per_obiettivo(obiettivo, risparmio_mensile, rendimento_annuo, capitale_iniziale)
+    oltre_limite = math.isfinite(mesi) and mesi > MESI_MASSIMI
+    raggiungibile = math.isfinite(mesi) and not oltre_limite
+    n = mesi if raggiungibile else 0
+    
+    i = _tasso_mensile(rendimento_annuo)
+    mese = np.arange(1, n + 1)
+    crescita = (1 + i) ** mese
+    if i == 0:
+        accumulato = capitale_iniziale + risparmio_mensile * mese
+    else:
+        accumulato = capitale_iniziale * crescita + risparmio_mensile * (crescita - 1) / i
+    
+    precedente = np.concatenate(([float(capitale_iniziale)], accumulato))[:n]
+    interessi = precedente * i
+    versamento = np.full(n, float(risparmio_mensile))
+    if n:
+        versamento[-1] = max(obiettivo - precedente[-1] - interessi[-1], 0)
+        accumulato[-1] = precedente[-1] + interessi[-1] + versamento[-1]
+    
+    return {
+        "mesi": mesi,
+        "raggiungibile": raggiungibile,
+        "oltre_limite": oltre_limite,
+        "evoluzione": Serie(
+            "mese",
+            mese=mese,
+            versamento=versamento,
+            interessi=interessi,
+            accumulato=accumulato,
+            percentuale=np.minimum(accumulato / obiettivo * 100, 100) if obiettivo > 0 else np.full(n, 100.0)
+        ),
+        "versato_totale": float(versamento.sum()),
+        "interessi_totali": float(interessi.sum())
+    }
+
+
+@cronometra
+def calcola_risparmio_periodico(obiettivo: float, mesi: int, rendimento_annuo: float = 0.0) -> float:
+    """Calcola il risparmio mensile necessario"""
+    return risparmio_necessario(obiettivo, mesi, rendimento_annuo)
+
+
+@cronometra
+def calcola_tempo_obiettivo(obiettivo: float, risparmio_mensile: float, rendimento_annuo: float = 0.0) -> int:
+    """Calcola i mesi necessari per raggiungere l'obiettivo"""
+    if risparmio_mensile <= 0:
+        return 0
+    return mesi_per_obiettivo(obiettivo, risparmio_mensile, rendimento_annuo)
+
+
+@cronometra
+def calcola_fondo_emergenze(spese_mensili: float, mesi: int) -> float:
+    """Calcola l'importo del fondo emergenze"""
+    return spese_mensili * mesi
+
+
+@cronometra
+def piano_risparmio(obiettivo: float, risparmio_mensile: float, rendimento_annuo: float = 0.0) -> dict:
+    """Genera il piano di accumulo mese per mese"""
+    return piano_accumulo(obiettivo, risparmio_mensile, rendimento_annuo)
+
+
+@cronometra
+def tempo_costruzione(obiettivo: float, risparmio_mensile: float, rendimento_annuo: float = 0.0,
+                      capitale_iniziale: float = 0.0) -> int:
+    """Calcola i mesi necessari per costruire il fondo"""
+    if risparmio_mensile <= 0:
+        return 0
+    return mesi_per_obiettivo(obiettivo, risparmio_mensile, rendimento_annuo, capitale_iniziale)
+
+
+@cronometra
+def piano_costruzione(obiettivo: float, risparmio_mensile: float, rendimento_annuo: float = 0.0,
+                      capitale_iniziale: float = 0.0, mesi_copertura: int = 6) -> dict:
+    """Genera il piano di costruzione del fondo"""
+    piano = dict(piano_accumulo(obiettivo, risparmio_mensile, rendimento_annuo, capitale_iniziale))
+    accumulato = piano["evoluzione"]["accumulato"]
+    piano["evoluzione"] = piano["evoluzione"].con(
+        copertura_mesi=accumulato / (obiettivo / mesi_copertura) if obiettivo > 0 else accumulato * 0
+    )
+    return piano
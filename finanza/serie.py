@@ -0,0 +1,124 @@
+"""
+Serie temporali in colonne NumPy
+InvestAccademy - Corso di Finanza Personale
+
+I calcoli che producono un valore per periodo (anno, mese) restituiscono una
+`Serie`: una colonna NumPy per grandezza invece di una lista di dizionari, uno
+per periodo. Grafici e tabelle leggono direttamente le colonne, e il DataFrame
+per Streamlit viene costruito una sola volta e conservato insieme alla serie
+(che, restituita dalla cache condivisa, vale per tutte le sessioni).
+
+Le colonne sono in sola lettura, perché i risultati in cache sono condivisi.
+"""
+
+from collections.abc import Mapping
+
+import numpy as np
+
+
+class Serie(Mapping):
+    """Colonne della stessa lunghezza indicizzate da un periodo (es. "anno")
+
+    Si usa come un dizionario di array: `serie["capitale"]`, `serie["capitale"][-1]`,
+    `dict(serie)`. Le colonne possono avere dimensioni in più per valutare molti
+    scenari insieme: il periodo è sempre l'ultimo asse.
+    """
+
+    __slots__ = ("indice", "_colonne", "_tabella")
+
+    def __init__(self, indice: str, **colonne):
+        if indice not in colonne:
+            raise ValueError(f"La colonna indice {indice!r} non è tra le colonne")
+        lunghezza = np.shape(colonne[indice])[-1]
+        self.indice = indice
+        self._colonne = {}
+        for nome, valori in colonne.items():
+            valori = np.asarray(valori).view()  # nessuna copia dei dati
+            if valori.ndim == 0 or valori.shape[-1] != lunghezza:
+                raise ValueError(f"La colonna {nome!r} non ha {lunghezza} periodi")
+            valori.setflags(write=False)
+            self._colonne[nome] = valori
+        self._tabella = None
+
+    def __getitem__(self, nome: str) -> np.ndarray:
+        return self._colonne[nome]
+
+    def __iter__(self):
+        return iter(self._colonne)
+
+    def __len__(self) -> int:
+        return self._colonne[self.indice].shape[-1]
+
+    def __repr__(self) -> str:
+        return f"Serie({self.indice!r}, periodi={len(self)}, colonne={list(self._colonne)})"
+
+    @property
+    def colonne(self) -> tuple:
+        return tuple(self._colonne)
+
+    def riga(self, posizione: int) -> dict:
+        """Valori di un singolo periodo (es. `riga(-1)` per l'ultimo)"""
+        return {nome: valori[..., posizione] for nome, valori in self._colonne.items()}
+
+    def con(self, **colonne) -> "Serie":
+        """Nuova serie con le colonne aggiunte o sostituite"""
+        return Serie(self.indice, **{**self._colonne, **colonne})
+
+    def tabella(self, *colonne: str, nomi: dict = None):
+        """DataFrame con l'indice della serie e le colonne scelte (tutte se omesse)
+
+        Il DataFrame completo viene creato alla prima richiesta e riutilizzato (va
+        trattato in sola lettura); la selezione e i nomi di colonne e indice
+        (`nomi={"capitale": "Capitale (€)"}`) ne ricavano un nuovo DataFrame.
+        pandas viene importato solo qui.
+        """
+        if self._tabella is None:
+            import pandas as pd
+
+            if any(valori.ndim != 1 for valori in self._colonne.values()):
+                raise ValueError("Solo le serie di un singolo scenario diventano una tabella")
+            self._tabella = pd.DataFrame(
+                {nome: valori for nome, valori in self._colonne.items() if nome != self.indice},
+                index=pd.Index(self._colonne[self.indice], name=self.indice)
+            )
+        tabella = self._tabella[list(colonne)] if colonne else self._tabella
+        if nomi:
+            tabella = tabella.rename(columns=nomi)
+            if self.indice in nomi:
+                tabella = tabella.rename_axis(nomi[self.indice])
+        return tabella
+
+
+def indici_lttb(x, y, punti: int) -> np.ndarray:
+    """Indici dei `punti` campioni che conservano la forma della curva (x, y)
+
+    Algoritmo Largest-Triangle-Three-Buckets: primo e ultimo punto restano, i
+    punti interni sono divisi in `punti - 2` gruppi e da ogni gruppo si tiene il
+    punto che forma il triangolo più grande con quello scelto nel gruppo
+    precedente e con la media del gruppo successivo. Picchi e minimi locali
+    sopravvivono, a differenza di un campionamento a passo fisso. Se i punti
+    sono già entro il limite restituisce tutti gli indici.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = y.size
+    if punti >= n or punti < 3:
+        return np.arange(n)
+
+    # Confini dei gruppi; l'ultimo "gruppo successivo" è il solo ultimo punto
+    bordi = np.append(np.linspace(1, n - 1, punti - 1).astype(int), n)
+    indici = np.empty(punti, dtype=int)
+    indici[0], indici[-1] = 0, n - 1
+
+    scelto = 0
+    for gruppo in range(punti - 2):
+        inizio, fine = bordi[gruppo], bordi[gruppo + 1]
+        media_x = x[fine:bordi[gruppo + 2]].mean()
+        media_y = y[fine:bordi[gruppo + 2]].mean()
+        area = np.abs(
+            (x[scelto] - media_x) * (y[inizio:fine] - y[scelto])
+            - (x[scelto] - x[inizio:fine]) * (media_y - y[scelto])
+        )
+        scelto = inizio + int(np.argmax(np.nan_to_num(area, nan=-1.0)))
+        indici[gruppo + 1] = scelto
+    return indici
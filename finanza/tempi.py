@@ -0,0 +1,179 @@
+"""
+Misura dei tempi di esecuzione delle funzioni
+InvestAccademy - Corso di Finanza Personale
+
+Le funzioni decorate con `@cronometra` (e i blocchi `with misura(...)`) registrano
+la durata di ogni chiamata in memoria del processo, per nome qualificato. Per
+ogni nome vengono conservati i totali e gli ultimi `CAMPIONI_MAX` campioni, da
+cui si ricavano p50/p95/p99.
+
+La misura si attiva con la variabile d'ambiente `INVESTACCADEMY_TEMPI=1`, letta
+all'import: quando è spenta `@cronometra` restituisce la funzione originale e
+`misura` un contesto vuoto, quindi il costo è nullo.
+
+I tempi sono inclusivi: una funzione di render comprende quelli delle funzioni
+che chiama.
+"""
+
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+from statistics import quantiles
+
+ATTIVA = os.environ.get("INVESTACCADEMY_TEMPI", "").lower() in ("1", "true", "si", "sì", "on")
+
+# Campioni più recenti conservati per ogni funzione (per i percentili)
+CAMPIONI_MAX = 4096
+
+PERCENTILI = (50, 95, 99)
+
+# Misure di tutte le funzioni e i blocchi cronometrati, per nome
+_REGISTRO = {}
+_LOCK_REGISTRO = threading.Lock()
+
+_CONTESTO_VUOTO = nullcontext()
+
+
+class _Misure:
+    """Durate (ns) raccolte per un singolo nome"""
+
+    __slots__ = ("campioni", "chiamate", "totale", "massimo", "lock")
+
+    def __init__(self):
+        self.campioni = deque(maxlen=CAMPIONI_MAX)
+        self.chiamate = 0
+        self.totale = 0
+        self.massimo = 0
+        self.lock = threading.Lock()
+
+    def azzera(self):
+        with self.lock:
+            self.campioni.clear()
+            self.chiamate = self.totale = self.massimo = 0
+
+    def aggiungi(self, durata: int):
+        with self.lock:
+            self.campioni.append(durata)
+            self.chiamate += 1
+            self.totale += durata
+            if durata > self.massimo:
+                self.massimo = durata
+
+    def statistiche(self) -> dict:
+        with self.lock:
+            campioni = list(self.campioni)
+            chiamate, totale, massimo = self.chiamate, self.totale, self.massimo
+        percentili = [v / 1e6 for v in _percentili(campioni)]
+        risultato = {
+            "chiamate": chiamate,
+            "totale_s": totale / 1e9,
+            "media_ms": totale / chiamate / 1e6 if chiamate else 0.0,
+            "max_ms": massimo / 1e6
+        }
+        for p, valore in zip(PERCENTILI, percentili):
+            risultato[f"p{p}_ms"] = float(valore)
+        risultato["campioni"] = len(campioni)
+        return risultato
+
+
+def _percentili(campioni: list) -> list:
+    """PERCENTILI dei campioni, con interpolazione lineare (come `numpy.percentile`)"""
+    if len(campioni) < 2:
+        return [float(campioni[0]) if campioni else 0.0] * len(PERCENTILI)
+    centili = quantiles(campioni, n=100, method="inclusive")
+    return [centili[p - 1] for p in PERCENTILI]
+
+
+def _misure(nome: str) -> _Misure:
+    misure = _REGISTRO.get(nome)
+    if misure is None:
+        with _LOCK_REGISTRO:
+            misure = _REGISTRO.setdefault(nome, _Misure())
+    return misure
+
+
+def cronometra(funzione=None, *, nome: str = None):
+    """Decoratore che registra la durata di ogni chiamata
+
+    Utilizzabile come `@cronometra` oppure `@cronometra(nome="...")`; il nome
+    predefinito è quello qualificato della funzione (modulo.funzione).
+    """
+
+    def decoratore(f):
+        if not ATTIVA:
+            return f
+        misure = _misure(nome or f"{f.__module__}.{f.__qualname__}")
+        orologio = time.perf_counter_ns
+
+        @functools.wraps(f)
+        def wrapper(*args, **kwargs):
+            inizio = orologio()
+            try:
+                return f(*args, **kwargs)
+            finally:
+                misure.aggiungi(orologio() - inizio)
+
+        return wrapper
+
+    if funzione is not None:
+        return decoratore(funzione)
+    return decoratore
+
+
+class _Cronometro:
+    """Contesto che registra la durata del blocco `with`"""
+
+    __slots__ = ("misure", "inizio")
+
+    def __init__(self, misure: _Misure):
+        self.misure = misure
+
+    def __enter__(self):
+        self.inizio = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *errore):
+        self.misure.aggiungi(time.perf_counter_ns() - self.inizio)
+        return False
+
+
+def misura(nome: str):
+    """Contesto che cronometra un blocco di codice (es. `with misura("app.main"):`)"""
+    if not ATTIVA:
+        return _CONTESTO_VUOTO
+    return _Cronometro(_misure(nome))
+
+
+def statistiche() -> dict:
+    """Chiamate, totale e percentili (ms) di ogni nome misurato"""
+    with _LOCK_REGISTRO:
+        registro = list(_REGISTRO.items())
+    return {nome: misure.statistiche() for nome, misure in registro}
+
+
+def esporta_json(indentazione: int = 2) -> str:
+    """Statistiche in formato JSON, con data e PID del processo"""
+    return json.dumps({
+        "generato": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "pid": os.getpid(),
+        "attiva": ATTIVA,
+        "funzioni": statistiche()
+    }, indent=indentazione, ensure_ascii=False)
+
+
+def salva_json(percorso):
+    """Scrive le statistiche in un file JSON"""
+    with open(percorso, "w", encoding="utf-8") as file:
+        file.write(esporta_json())
+
+
+def azzera():
+    """Cancella tutte le misure raccolte finora"""
+    with _LOCK_REGISTRO:
+        registro = list(_REGISTRO.values())
+    for misure in registro:
+        misure.azzera()
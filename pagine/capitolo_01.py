@@ -0,0 +1,8 @@
+"""
+Pagina del capitolo 1 (URL /capitolo-1)
+InvestAccademy - Corso di Finanza Personale
+"""
+
+from capitoli import capitolo_01
+
+capitolo_01.render()
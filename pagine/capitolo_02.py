@@ -0,0 +1,8 @@
+"""
+Pagina del capitolo 2 (URL /capitolo-2)
+InvestAccademy - Corso di Finanza Personale
+"""
+
+from capitoli import capitolo_02
+
+capitolo_02.render()
@@ -0,0 +1,8 @@
+"""
+Pagina del capitolo 3 (URL /capitolo-3)
+InvestAccademy - Corso di Finanza Personale
+"""
+
+from capitoli import capitolo_03
+
+capitolo_03.render()
@@ -0,0 +1,8 @@
+"""
+Pagina del capitolo 4 (URL /capitolo-4)
+InvestAccademy - Corso di Finanza Personale
+"""
+
+from capitoli import capitolo_04
+
+capitolo_04.render()
@@ -0,0 +1,8 @@
+"""
+Pagina del capitolo 5 (URL /capitolo-5)
+InvestAccademy - Corso di Finanza Personale
+"""
+
+from capitoli import capitolo_05
+
+capitolo_05.render()
@@ -0,0 +1,8 @@
+"""
+Pagina del capitolo 6 (URL /capitolo-6)
+InvestAccademy - Corso di Finanza Personale
+"""
+
+from capitoli import capitolo_06
+
+capitolo_06.render()
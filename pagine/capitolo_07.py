@@ -0,0 +1,8 @@
+"""
+Pagina del capitolo 7 (URL /capitolo-7)
+InvestAccademy - Corso di Finanza Personale
+"""
+
+from capitoli import capitolo_07
+
+capitolo_07.render()
@@ -0,0 +1,8 @@
+"""
+Pagina del capitolo 8 (URL /capitolo-8)
+InvestAccademy - Corso di Finanza Personale
+"""
+
+from capitoli import capitolo_08
+
+capitolo_08.render()
@@ -0,0 +1,8 @@
+"""
+Pagina del capitolo 9 (URL /capitolo-9)
+InvestAccademy - Corso di Finanza Personale
+"""
+
+from capitoli import capitolo_09
+
+capitolo_09.render()
@@ -0,0 +1,8 @@
+"""
+Pagina del capitolo 10 (URL /capitolo-10)
+InvestAccademy - Corso di Finanza Personale
+"""
+
+from capitoli import capitolo_10
+
+capitolo_10.render()
@@ -0,0 +1,8 @@
+"""
+Pagina del capitolo 11 (URL /capitolo-11)
+InvestAccademy - Corso di Finanza Personale
+"""
+
+from capitoli import capitolo_11
+
+capitolo_11.render()
@@ -0,0 +1,8 @@
+"""
+Pagina del capitolo 12 (URL /capitolo-12)
+InvestAccademy - Corso di Finanza Personale
+"""
+
+from capitoli import capitolo_12
+
+capitolo_12.render()
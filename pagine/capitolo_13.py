@@ -0,0 +1,8 @@
+"""
+Pagina del capitolo 13 (URL /capitolo-13)
+InvestAccademy - Corso di Finanza Personale
+"""
+
+from capitoli import capitolo_13
+
+capitolo_13.render()
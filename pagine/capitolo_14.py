@@ -0,0 +1,8 @@
+"""
+Pagina del capitolo 14 (URL /capitolo-14)
+InvestAccademy - Corso di Finanza Personale
+"""
+
+from capitoli import capitolo_14
+
+capitolo_14.render()
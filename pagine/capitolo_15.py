@@ -0,0 +1,8 @@
+"""
+Pagina del capitolo 15 (URL /capitolo-15)
+InvestAccademy - Corso di Finanza Personale
+"""
+
+from capitoli import capitolo_15
+
+capitolo_15.render()
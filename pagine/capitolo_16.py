@@ -0,0 +1,8 @@
+"""
+Pagina del capitolo 16 (URL /capitolo-16)
+InvestAccademy - Corso di Finanza Personale
+"""
+
+from capitoli import capitolo_16
+
+capitolo_16.render()
@@ -0,0 +1,8 @@
+"""
+Pagina delle prestazioni (URL /prestazioni, solo amministratori)
+InvestAccademy - Corso di Finanza Personale
+"""
+
+from capitoli import prestazioni
+
+prestazioni.render()